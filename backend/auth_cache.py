@@ -0,0 +1,123 @@
+"""
+Authenticated-principal cache.
+
+`get_current_user` / `get_optional_user` used to decode the JWT and read the
+user from MongoDB on every protected request. Here both steps are cached:
+
+- decoded token payloads are memoized per token string until the token's
+  own `exp` (so expiry is still enforced exactly);
+- user documents are cached by token subject (email) for a short TTL and
+  dropped explicitly whenever the user document changes.
+
+Callers always get a shallow copy, so handlers that mutate the user dict
+(e.g. /auth/me popping the password) cannot corrupt the cache. With several
+API workers the TTL bounds how long another worker can serve a stale user.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import jwt
+
+from caching import TTLCache
+
+
+class PrincipalCache:
+    def __init__(
+        self,
+        users_collection,
+        secret_key: str,
+        algorithms: List[str],
+        ttl_seconds: float = 30.0,
+        max_entries: int = 10000,
+    ):
+        self._users = users_collection
+        self._secret_key = secret_key
+        self._algorithms = algorithms
+        self.enabled = ttl_seconds > 0
+        self.users = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        # Payloads are immutable for the token's lifetime; the TTL is set per entry from `exp`
+        self.tokens = TTLCache(max_entries=max_entries, ttl_seconds=24 * 3600)
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._generation = 0
+        self.db_loads = 0
+
+    def decode_token(self, token: str) -> dict:
+        """jwt.decode with memoization; raises the same PyJWT errors"""
+        if self.enabled:
+            payload = self.tokens.get(token)
+            if payload is not None:
+                exp = payload.get("exp")
+                if exp is not None and exp <= time.time():
+                    self.tokens.pop(token)
+                    raise jwt.ExpiredSignatureError("Signature has expired")
+                return payload
+
+        payload = jwt.decode(token, self._secret_key, algorithms=self._algorithms)
+        if self.enabled:
+            exp = payload.get("exp")
+            ttl = exp - time.time() if exp is not None else None
+            self.tokens.set(token, payload, ttl_seconds=ttl)
+        return payload
+
+    async def get_user(self, email: str) -> Optional[dict]:
+        if not self.enabled:
+            self.db_loads += 1
+            return await self._users.find_one({"email": email})
+
+        user = self.users.get(email)
+        if user is None:
+            user = await self._load(email)
+        return dict(user) if user is not None else None
+
+    async def _load(self, email: str) -> Optional[dict]:
+        # Concurrent misses for one user (a dashboard's parallel calls) share one query
+        future = self._loading.get(email)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The loading request was cancelled, not this one: load again
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    return await self._load(email)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[email] = future
+        generation = self._generation
+        try:
+            self.db_loads += 1
+            user = await self._users.find_one({"email": email})
+            # An invalidation during the query means this result may already be stale
+            if user is not None and generation == self._generation:
+                self.users.set(email, user)
+            future.set_result(user)
+            return user
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            if self._loading.get(email) is future:
+                del self._loading[email]
+
+    def invalidate(self, email: Optional[str] = None) -> None:
+        """Forget one user (after updating their document) or everyone"""
+        self._generation += 1
+        if email is None:
+            self.users.clear()
+        else:
+            self.users.pop(email)
+            self._loading.pop(email, None)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "users": self.users.stats(),
+            "tokens": self.tokens.stats(),
+            "db_loads": self.db_loads,
+        }
@@ -0,0 +1,285 @@
+"""
+In-process room availability index.
+
+Each room's active (pending/confirmed) bookings are loaded once into a
+RoomIntervals structure sorted by start date with a prefix maximum of end
+dates, so overlap queries are two binary searches plus the matches. Rooms
+are cached in a bounded LRU with a TTL and invalidated whenever a booking
+for the room is created or changes status.
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_BOOKING_STATUSES = ["pending", "confirmed"]
+
+Interval = Tuple[datetime, datetime, str]
+
+
+class InvalidDayRange(ValueError):
+    """A YYYY-MM-DD range that cannot be parsed or ends before it starts"""
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Mongo returns naive UTC datetimes; request bodies may carry an offset"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def merge_day_ranges(ranges: Iterable[Tuple[date, date]]) -> List[Tuple[date, date]]:
+    """Merge inclusive day ranges that overlap or touch"""
+    merged: List[Tuple[date, date]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def expand_day_ranges(ranges: Iterable[Tuple[date, date]]) -> List[str]:
+    """Expand inclusive day ranges into YYYY-MM-DD strings"""
+    days = []
+    for start, end in ranges:
+        current = start
+        while current <= end:
+            days.append(current.strftime("%Y-%m-%d"))
+            current += timedelta(days=1)
+    return days
+
+
+class RoomIntervals:
+    """Immutable, sorted set of booking intervals for a single room"""
+
+    __slots__ = ("_starts", "_ends", "_ids", "_max_end")
+
+    def __init__(self, intervals: Iterable[Interval]):
+        ordered = sorted(
+            ((to_naive_utc(start), to_naive_utc(end), booking_id) for start, end, booking_id in intervals),
+            key=lambda item: (item[0], item[1]),
+        )
+        self._starts = [item[0] for item in ordered]
+        self._ends = [item[1] for item in ordered]
+        self._ids = [item[2] for item in ordered]
+        self._max_end = []
+        running = None
+        for end in self._ends:
+            running = end if running is None or end > running else running
+            self._max_end.append(running)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Interval]:
+        """Intervals with interval.start <= end and interval.end >= start"""
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        hi = bisect_right(self._starts, end)
+        # _max_end is non-decreasing, so everything before lo ends before start
+        lo = bisect_left(self._max_end, start, 0, hi)
+        return [
+            (self._starts[i], self._ends[i], self._ids[i])
+            for i in range(lo, hi)
+            if self._ends[i] >= start
+        ]
+
+    def booked_ranges(self, start: datetime, end: datetime) -> List[Tuple[date, date]]:
+        """Compressed, inclusive day ranges booked inside [start, end]"""
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        first_day, last_day = start.date(), end.date()
+        clipped = []
+        for booking_start, booking_end, _ in self.overlapping(start, end):
+            clipped.append((max(booking_start.date(), first_day), min(booking_end.date(), last_day)))
+        return merge_day_ranges(clipped)
+
+    def free_ranges(self, start: datetime, end: datetime) -> List[Tuple[date, date]]:
+        """Inclusive day ranges inside [start, end] with no active booking"""
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        free = []
+        cursor = start.date()
+        for booked_start, booked_end in self.booked_ranges(start, end):
+            if booked_start > cursor:
+                free.append((cursor, booked_start - timedelta(days=1)))
+            cursor = max(cursor, booked_end + timedelta(days=1))
+        if cursor <= end.date():
+            free.append((cursor, end.date()))
+        return free
+
+
+def serialize_day_ranges(ranges: List[Tuple[date, date]]) -> List[Dict[str, str]]:
+    return [{"start": start.strftime("%Y-%m-%d"), "end": end.strftime("%Y-%m-%d")} for start, end in ranges]
+
+
+def day_range(start_date: str, end_date: str) -> Tuple[datetime, datetime]:
+    """Parse YYYY-MM-DD bounds into a range covering the end date completely"""
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise InvalidDayRange("Invalid date format. Use YYYY-MM-DD")
+    if end < start:
+        raise InvalidDayRange("end_date must not be before start_date")
+    return start, end + timedelta(days=1) - timedelta(microseconds=1)
+
+
+def overlap_query(start: datetime, end: datetime, room_ids: Optional[List[str]] = None) -> dict:
+    """Active bookings overlapping [start, end], optionally of `room_ids` only"""
+    query = {
+        "status": {"$in": ACTIVE_BOOKING_STATUSES},
+        "start_date": {"$lte": end},
+        "end_date": {"$gte": start},
+    }
+    if room_ids is not None:
+        query["room_id"] = {"$in": room_ids}
+    return query
+
+
+async def booked_room_ids(bookings, start: datetime, end: datetime,
+                          room_ids: Optional[List[str]] = None) -> List[str]:
+    """Room ids with at least one active booking overlapping [start, end]"""
+    return await bookings.distinct("room_id", overlap_query(start, end, room_ids))
+
+
+async def unavailable_room_ids(bookings, available_from: Optional[str],
+                               available_to: Optional[str]) -> Optional[List[str]]:
+    """Rooms booked in an optional available_from/available_to filter (None when it is not given)"""
+    if not (available_from or available_to):
+        return None
+    if not (available_from and available_to):
+        raise InvalidDayRange("available_from and available_to must be used together")
+    start, end = day_range(available_from, available_to)
+    return await booked_room_ids(bookings, start, end)
+
+
+async def availability_summaries(bookings, room_ids: List[str], start: datetime,
+                                 end: datetime) -> Dict[str, dict]:
+    """Availability of each room over one range, from a single aggregation"""
+    room_ids = list(dict.fromkeys(room_ids))
+    pipeline = [
+        {"$match": overlap_query(start, end, room_ids)},
+        {"$group": {
+            "_id": "$room_id",
+            "bookings": {"$push": {"id": "$id", "start_date": "$start_date", "end_date": "$end_date"}}
+        }},
+    ]
+    grouped = await bookings.aggregate(pipeline).to_list(length=len(room_ids))
+    bookings_by_room = {group["_id"]: group["bookings"] for group in grouped}
+
+    summaries = {}
+    for room_id in room_ids:
+        booked = bookings_by_room.get(room_id, [])
+        intervals = RoomIntervals((b["start_date"], b["end_date"], b["id"]) for b in booked)
+        summaries[room_id] = {
+            "is_available": not booked,
+            "conflicting_bookings": len(booked),
+            "booked_ranges": serialize_day_ranges(intervals.booked_ranges(start, end)),
+        }
+    return summaries
+
+
+class AvailabilityIndex:
+    """
+    Bounded LRU of RoomIntervals keyed by room id.
+
+    Loads are single-flight per room. An invalidation that races with a load
+    wins: it unregisters the in-flight load, so its result is not cached and
+    later callers start a fresh load instead of joining the stale one. Only
+    cached rooms and loads in flight are tracked.
+    The TTL bounds staleness across processes that cannot see each other's
+    invalidations.
+    """
+
+    def __init__(self, bookings_collection, ttl_seconds: float = 60.0, max_rooms: int = 2000):
+        self._collection = bookings_collection
+        self._ttl = ttl_seconds
+        self._max_rooms = max_rooms
+        self._rooms: "OrderedDict[str, Tuple[float, RoomIntervals]]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, room_id: str) -> None:
+        self._rooms.pop(room_id, None)
+        self._loading.pop(room_id, None)
+
+    def clear(self) -> None:
+        for room_id in list(self._rooms) + list(self._loading):
+            self.invalidate(room_id)
+
+    async def _load(self, room_id: str) -> RoomIntervals:
+        cursor = self._collection.find(
+            {"room_id": room_id, "status": {"$in": ACTIVE_BOOKING_STATUSES}},
+            {"_id": 0, "id": 1, "start_date": 1, "end_date": 1},
+        )
+        intervals = []
+        async for booking in cursor:
+            intervals.append((booking["start_date"], booking["end_date"], booking["id"]))
+        return RoomIntervals(intervals)
+
+    async def get(self, room_id: str) -> RoomIntervals:
+        entry = self._rooms.get(room_id)
+        if entry is not None and time.monotonic() - entry[0] < self._ttl:
+            self._rooms.move_to_end(room_id)
+            self.hits += 1
+            return entry[1]
+
+        pending = self._loading.get(room_id)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The loading request was cancelled, not this one: load again
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.get(room_id)
+                raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[room_id] = future
+        try:
+            intervals = await self._load(room_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged as a leak
+            future.exception()
+            raise
+        finally:
+            # Still registered: no invalidation happened while loading
+            fresh = self._loading.get(room_id) is future
+            if fresh:
+                del self._loading[room_id]
+
+        if fresh:
+            self._rooms[room_id] = (time.monotonic(), intervals)
+            self._rooms.move_to_end(room_id)
+            while len(self._rooms) > self._max_rooms:
+                self._rooms.popitem(last=False)
+        future.set_result(intervals)
+        return intervals
+
+    async def check(self, room_id: str, start_date: datetime, end_date: datetime) -> dict:
+        intervals = await self.get(room_id)
+        conflicts = intervals.overlapping(start_date, end_date)
+        return {
+            "is_available": len(conflicts) == 0,
+            "conflicting_bookings": [booking_id for _, _, booking_id in conflicts],
+            "suggested_dates": [],
+        }
+
+    def stats(self) -> dict:
+        return {
+            "rooms_cached": len(self._rooms),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,319 @@
+"""
+Content-addressed storage for uploaded images and videos.
+
+Each distinct file is stored once, named after its SHA-256 and sharded by
+the first two byte pairs of the hash:
+
+    <root>/ab/cd/abcd1234....jpg
+
+and tracked in the media_blobs collection:
+
+    {sha256, filename, size, content_type, refcount, created_at,
+     referenced_at, variants, stream, stream_owners}
+
+`refcount` is the number of URL entries on hotel/room documents (images,
+videos, videos_360) pointing at the blob. `ingest` takes a reference while
+it stores the file, so a blob being uploaded again can never be deleted in
+between; callers hand the reference back with `release` when the URL was
+already on the document or is removed from it. The last release deletes the
+file and everything derived from it, which is named `<sha256>_...` in the
+same shard (image variants, HLS renditions and posters of videos).
+
+Reference counts are kept per URL entry, so documents deleted wholesale
+(delete_hotel, which also deletes its rooms) leave counts too high;
+`collect_garbage` recounts from the documents and removes what is no longer
+referenced. Within one process, ingest and release of the same hash are
+serialized; across processes the garbage collector repairs any drift.
+"""
+
+import asyncio
+import logging
+import mimetypes
+import os
+import re
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from uploads import StoredUpload, UploadWriter
+
+logger = logging.getLogger(__name__)
+
+_CONTENT_HASH = re.compile(r"^[0-9a-f]{64}$")
+_EXTENSION = re.compile(r"^[a-z0-9]{1,8}$")
+
+# Document fields holding media URLs
+MEDIA_FIELDS = {
+    "hotels": ("images", "videos", "videos_360"),
+    "conference_rooms": ("images", "videos"),
+}
+
+
+class Blob(NamedTuple):
+    sha256: str
+    filename: str
+    size: int
+    created: bool  # False when identical bytes were already stored
+
+
+def is_content_hash(stem: str) -> bool:
+    return bool(_CONTENT_HASH.match(stem))
+
+
+def blob_hash(filename: str) -> Optional[str]:
+    """The SHA-256 of a content-addressed blob filename (`<sha256>.<ext>`), else None"""
+    stem = filename.rsplit(".", 1)[0]
+    return stem if is_content_hash(stem) else None
+
+
+def safe_extension(extension: Optional[str], content_type: Optional[str] = None) -> str:
+    """`extension` if it is short and alphanumeric, else one derived from the content type
+
+    Client extensions can hold `/`, `?` or `#`, which would break the blob
+    path and its URL, or be the whole filename.
+    """
+    extension = (extension or "").lower()
+    if _EXTENSION.match(extension):
+        return extension
+    guessed = (mimetypes.guess_extension(content_type or "") or "").lstrip(".")
+    return guessed if _EXTENSION.match(guessed) else "bin"
+
+
+def file_extension(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """The safe extension to store an uploaded file under"""
+    return safe_extension(filename.rsplit(".", 1)[1] if filename and "." in filename else None, content_type)
+
+
+def content_hash_of(filename: str) -> Optional[str]:
+    """The SHA-256 a content-addressed filename (or variant filename) refers to, else None"""
+    stem = filename.rsplit(".", 1)[0].split("_", 1)[0]
+    return stem if is_content_hash(stem) else None
+
+
+def _remove_blob_files(directory: Path, sha256: str) -> int:
+    removed = 0
+    if not directory.is_dir():
+        return removed
+    for entry in os.scandir(directory):
+        if entry.name.startswith(sha256):
+            os.unlink(entry.path)
+            removed += 1
+    return removed
+
+
+async def scan_references(db) -> Tuple[Counter, Set[str]]:
+    """Blob reference counts and the filenames of legacy (per-upload named) media still referenced"""
+    counts: Counter = Counter()
+    legacy: Set[str] = set()
+    for collection, fields in MEDIA_FIELDS.items():
+        projection = {"_id": 0, **{field: 1 for field in fields}}
+        async for doc in db[collection].find({}, projection):
+            for field in fields:
+                for url in doc.get(field) or []:
+                    filename = url.rsplit("/", 1)[-1]
+                    sha256 = content_hash_of(filename)
+                    if sha256:
+                        counts[sha256] += 1
+                    else:
+                        legacy.add(filename)
+    return counts, legacy
+
+
+def legacy_orphans(directories: Iterable[Path], referenced: Set[str], grace_seconds: float) -> List[Path]:
+    """Per-upload named files (and their variants) no document points at any more"""
+    referenced_stems = {name.rsplit(".", 1)[0] for name in referenced}
+    cutoff = time.time() - grace_seconds
+    orphans = []
+    for directory in directories:
+        for folder, is_variant in ((directory, False), (directory / "variants", True)):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder):
+                if not entry.is_file() or entry.stat().st_mtime >= cutoff:
+                    continue
+                stem = entry.name.rsplit("_w", 1)[0] if is_variant else entry.name.rsplit(".", 1)[0]
+                if stem not in referenced_stems:
+                    orphans.append(Path(entry.path))
+    return orphans
+
+
+class BlobStore:
+    def __init__(self, collection, root: Path, writer: UploadWriter):
+        self.collection = collection
+        self.root = root
+        self.writer = writer
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+        self.ingested = 0
+        self.deduplicated = 0
+        self.released = 0
+        self.deleted = 0
+
+    def directory_for(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4]
+
+    def path_for(self, filename: str) -> Path:
+        return self.directory_for(filename[:64]) / filename
+
+    @asynccontextmanager
+    async def _locked(self, sha256: str):
+        """Serialize work on one hash; the lock is dropped once nobody holds or waits for it"""
+        lock, users = self._locks.get(sha256, (asyncio.Lock(), 0))
+        self._locks[sha256] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[sha256]
+            if users <= 1:
+                del self._locks[sha256]
+            else:
+                self._locks[sha256] = (lock, users - 1)
+
+    async def ingest(self, stored: StoredUpload, extension: str, content_type: Optional[str] = None) -> Blob:
+        """Store a saved upload under its hash (or drop it as a duplicate) and take one reference"""
+        sha256 = stored.sha256
+        extension = safe_extension(extension, content_type)
+        now = datetime.now(timezone.utc)
+        async with self._locked(sha256):
+            try:
+                doc = await self.collection.find_one_and_update(
+                    {"sha256": sha256},
+                    {
+                        "$inc": {"refcount": 1},
+                        "$set": {"referenced_at": now},
+                        "$setOnInsert": {
+                            "filename": f"{sha256}.{extension}",
+                            "size": stored.size,
+                            "content_type": content_type,
+                            "created_at": now,
+                        },
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                    projection={"_id": 0},
+                )
+            except DuplicateKeyError:
+                # Another process inserted the same hash concurrently; its document is there now
+                doc = await self.collection.find_one_and_update(
+                    {"sha256": sha256}, {"$inc": {"refcount": 1}, "$set": {"referenced_at": now}},
+                    return_document=ReturnDocument.AFTER, projection={"_id": 0}
+                )
+            path = self.path_for(doc["filename"])
+            exists = await self.writer.run(path.exists)
+            if exists:
+                await self.writer.run(os.unlink, stored.path)
+                self.deduplicated += 1
+            else:
+                await self.writer.run(lambda: path.parent.mkdir(parents=True, exist_ok=True))
+                await self.writer.run(os.replace, stored.path, path)
+                self.ingested += 1
+            return Blob(sha256, doc["filename"], doc.get("size", stored.size), not exists)
+
+    async def release(self, sha256: str, count: int = 1) -> bool:
+        """Drop `count` references; deletes the blob when none are left. Returns True if deleted"""
+        if count <= 0:
+            return False
+        async with self._locked(sha256):
+            await self.collection.update_one({"sha256": sha256}, {"$inc": {"refcount": -count}})
+            self.released += count
+            return await self._delete_if_unreferenced(sha256)
+
+    async def _delete_if_unreferenced(self, sha256: str) -> bool:
+        doc = await self.collection.find_one_and_delete({"sha256": sha256, "refcount": {"$lte": 0}})
+        if doc is None:
+            return False
+        await self.writer.run(_remove_blob_files, self.directory_for(sha256), sha256)
+        self.deleted += 1
+        return True
+
+    async def set_variants(self, sha256: str, manifest: dict) -> None:
+        await self.collection.update_one({"sha256": sha256}, {"$set": {"variants": manifest}})
+
+    async def variants(self, sha256: str) -> Optional[dict]:
+        doc = await self.collection.find_one({"sha256": sha256}, {"_id": 0, "variants": 1})
+        return (doc or {}).get("variants")
+
+    async def add_stream_owner(self, sha256: str, owner: dict) -> Optional[dict]:
+        """Record a document showing this video; returns its HLS stream status, if any"""
+        doc = await self.collection.find_one_and_update(
+            {"sha256": sha256}, {"$addToSet": {"stream_owners": owner}},
+            return_document=ReturnDocument.AFTER, projection={"_id": 0, "stream": 1}
+        )
+        return (doc or {}).get("stream")
+
+    async def remove_stream_owner(self, sha256: str, owner: dict) -> None:
+        await self.collection.update_one({"sha256": sha256}, {"$pull": {"stream_owners": owner}})
+
+    async def set_stream(self, sha256: str, stream: dict) -> List[dict]:
+        """Store the HLS stream status of a video; returns the documents showing it"""
+        doc = await self.collection.find_one_and_update(
+            {"sha256": sha256}, {"$set": {"stream": stream}},
+            return_document=ReturnDocument.AFTER, projection={"_id": 0, "stream_owners": 1}
+        )
+        return (doc or {}).get("stream_owners") or []
+
+    async def reference_counts(self, db) -> Counter:
+        """Actual number of URL entries pointing at each blob, from the hotel and room documents"""
+        counts, _ = await scan_references(db)
+        return counts
+
+    def _stray_files(self, known: Iterable[str], grace_seconds: float) -> List[Path]:
+        """Files under the root whose hash has no media_blobs document (e.g. a crash mid-ingest)"""
+        known = set(known)
+        cutoff = time.time() - grace_seconds
+        stray = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = Path(dirpath) / name
+                if content_hash_of(name) not in known and path.stat().st_mtime < cutoff:
+                    stray.append(path)
+        return stray
+
+    async def collect_garbage(self, db, grace_seconds: float = 3600.0, dry_run: bool = False) -> dict:
+        """Recount references, delete unreferenced blobs and stray files; returns a report"""
+        counts = await self.reference_counts(db)
+        report = {"blobs": 0, "recounted": 0, "deleted": 0, "stray_files": 0}
+        cutoff = datetime.now(timezone.utc).timestamp() - grace_seconds
+        known = []
+        async for doc in self.collection.find({}, {"_id": 0, "sha256": 1, "refcount": 1, "referenced_at": 1}):
+            report["blobs"] += 1
+            sha256 = doc["sha256"]
+            known.append(sha256)
+            actual = counts.get(sha256, 0)
+            referenced_at = doc.get("referenced_at")
+            if referenced_at is not None and referenced_at.replace(tzinfo=timezone.utc).timestamp() > cutoff:
+                continue  # an upload may still be between ingest and adding its URL
+            if doc.get("refcount") == actual:
+                continue
+            report["recounted"] += 1
+            if dry_run:
+                report["deleted"] += actual == 0
+                continue
+            async with self._locked(sha256):
+                await self.collection.update_one(
+                    {"sha256": sha256, "refcount": doc.get("refcount")}, {"$set": {"refcount": actual}}
+                )
+                if actual == 0 and await self._delete_if_unreferenced(sha256):
+                    report["deleted"] += 1
+
+        if await self.writer.run(self.root.is_dir):
+            stray = await self.writer.run(self._stray_files, known, grace_seconds)
+            report["stray_files"] = len(stray)
+            if not dry_run:
+                for path in stray:
+                    await self.writer.run(os.unlink, path)
+        return report
+
+    def stats(self) -> dict:
+        return {
+            "ingested": self.ingested,
+            "deduplicated": self.deduplicated,
+            "released": self.released,
+            "deleted": self.deleted,
+        }
@@ -0,0 +1,78 @@
+"""
+Hotel and manager ids denormalized onto bookings.
+
+Bookings are created with the `hotel_id` and `manager_id` of the booked
+room's hotel, so manager listings and ownership checks are one indexed
+query on bookings instead of hotel -> rooms -> bookings chains. The copies
+are kept in sync when a hotel changes manager (`set_hotel_manager`), and
+`backfill` fills in bookings written before the fields existed; until it
+has run, `booking_manager_id` falls back to the room/hotel lookup.
+"""
+
+from typing import Optional
+
+from pymongo import UpdateMany
+
+
+async def booking_manager_id(db, booking: dict) -> Optional[str]:
+    """Manager of the booking's hotel (legacy bookings are resolved through the room)"""
+    if booking.get("manager_id"):
+        return booking["manager_id"]
+    room = await db.conference_rooms.find_one({"id": booking["room_id"]}, {"_id": 0, "hotel_id": 1})
+    if not room:
+        return None
+    hotel = await db.hotels.find_one({"id": room["hotel_id"]}, {"_id": 0, "manager_id": 1})
+    return hotel.get("manager_id") if hotel else None
+
+
+async def find_room_with_manager(db, room_id: str) -> Optional[dict]:
+    """The room document plus its hotel's `manager_id`, in one round trip"""
+    pipeline = [
+        {"$match": {"id": room_id}},
+        {"$limit": 1},
+        {"$lookup": {
+            "from": "hotels",
+            "localField": "hotel_id",
+            "foreignField": "id",
+            "pipeline": [{"$project": {"_id": 0, "manager_id": 1}}],
+            "as": "hotel",
+        }},
+        {"$set": {"manager_id": {"$first": "$hotel.manager_id"}}},
+        {"$project": {"_id": 0, "hotel": 0}},
+    ]
+    rooms = await db.conference_rooms.aggregate(pipeline).to_list(1)
+    return rooms[0] if rooms else None
+
+
+async def set_hotel_manager(db, hotel_id: str, manager_id: str) -> int:
+    """Propagate a hotel's new manager to its bookings; returns bookings updated"""
+    result = await db.bookings.update_many(
+        {"hotel_id": hotel_id, "manager_id": {"$ne": manager_id}},
+        {"$set": {"manager_id": manager_id}}
+    )
+    return result.modified_count
+
+
+async def backfill(db, batch_size: int = 200) -> int:
+    """Set hotel_id/manager_id on every booking missing or disagreeing with them; returns bookings updated"""
+    managers = {
+        hotel["id"]: hotel.get("manager_id")
+        async for hotel in db.hotels.find({}, {"_id": 0, "id": 1, "manager_id": 1})
+    }
+    requests = []
+    updated = 0
+    async for room in db.conference_rooms.find({}, {"_id": 0, "id": 1, "hotel_id": 1}):
+        hotel_id = room.get("hotel_id")
+        if hotel_id not in managers:
+            continue  # hotel was deleted
+        manager_id = managers[hotel_id]
+        requests.append(UpdateMany(
+            {"room_id": room["id"], "$or": [{"hotel_id": {"$ne": hotel_id}}, {"manager_id": {"$ne": manager_id}}]},
+            {"$set": {"hotel_id": hotel_id, "manager_id": manager_id}}
+        ))
+        if len(requests) >= batch_size:
+            updated += (await db.bookings.bulk_write(requests, ordered=False)).modified_count
+            requests = []
+    if requests:
+        updated += (await db.bookings.bulk_write(requests, ordered=False)).modified_count
+    return updated
@@ -0,0 +1,119 @@
+"""
+Dashboard statistics as one MongoDB aggregation.
+
+The pipeline starts from the manager's hotels, joins rooms and then
+bookings with $lookup (both joins use the hotel_id / room_id indexes) and
+splits the flattened stream with $facet into totals, the most recent
+bookings and an optional per-hotel breakdown. Hotels without rooms or
+bookings are kept (preserveNullAndEmptyArrays) so they still count.
+
+$lookup with both localField and a sub-pipeline needs MongoDB 5.0+.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+PAID = "paid"
+
+
+def _booking_count(condition: Optional[dict] = None) -> dict:
+    """$sum expression counting joined bookings (optionally only matching `condition`)"""
+    has_booking = {"$gt": ["$booking", None]}
+    test = {"$and": [has_booking, condition]} if condition else has_booking
+    return {"$sum": {"$cond": [test, 1, 0]}}
+
+
+def _paid_revenue() -> dict:
+    return {"$sum": {"$cond": [
+        {"$eq": ["$booking.payment_status", PAID]},
+        {"$ifNull": ["$booking.total_price", 0]},
+        0
+    ]}}
+
+
+def _booking_totals() -> dict:
+    return {
+        "total_bookings": _booking_count(),
+        "confirmed_bookings": _booking_count({"$eq": ["$booking.status", "confirmed"]}),
+        "pending_bookings": _booking_count({"$eq": ["$booking.status", "pending"]}),
+        "cancelled_bookings": _booking_count({"$eq": ["$booking.status", "cancelled"]}),
+        "completed_bookings": _booking_count({"$eq": ["$booking.status", "completed"]}),
+        "total_revenue": _paid_revenue(),
+    }
+
+
+def booking_date_match(start: Optional[datetime], end: Optional[datetime]) -> dict:
+    """Bookings whose event starts inside [start, end] (either bound optional)"""
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = start
+    if end is not None:
+        bounds["$lte"] = end
+    return {"start_date": bounds} if bounds else {}
+
+
+def dashboard_stats_pipeline(
+    hotel_match: dict,
+    booking_match: Optional[dict] = None,
+    recent_limit: int = 10,
+    per_hotel: bool = False,
+) -> List[dict]:
+    booking_pipeline = [{"$project": {"_id": 0}}]
+    if booking_match:
+        booking_pipeline.insert(0, {"$match": booking_match})
+
+    facets = {
+        "totals": [
+            {"$group": {"_id": None, "hotel_ids": {"$addToSet": "$id"}, **_booking_totals()}},
+            {"$project": {"_id": 0, "hotel_ids": 0, "total_hotels": {"$size": "$hotel_ids"},
+                          **{field: 1 for field in _booking_totals()}}},
+        ],
+        "recent_bookings": [
+            {"$match": {"booking": {"$exists": True}}},
+            {"$sort": {"booking.created_at": -1}},
+            {"$limit": recent_limit},
+            {"$replaceRoot": {"newRoot": "$booking"}},
+        ],
+    }
+    if per_hotel:
+        facets["hotels"] = [
+            {"$group": {"_id": "$id", "hotel_name": {"$first": "$name"}, **_booking_totals()}},
+            {"$sort": {"total_revenue": -1, "total_bookings": -1}},
+            {"$project": {"_id": 0, "hotel_id": "$_id", "hotel_name": 1,
+                          **{field: 1 for field in _booking_totals()}}},
+        ]
+
+    return [
+        {"$match": hotel_match},
+        {"$project": {"_id": 0, "id": 1, "name": 1}},
+        {"$lookup": {
+            "from": "conference_rooms",
+            "localField": "id",
+            "foreignField": "hotel_id",
+            "pipeline": [{"$project": {"_id": 0, "id": 1}}],
+            "as": "room",
+        }},
+        {"$unwind": {"path": "$room", "preserveNullAndEmptyArrays": True}},
+        {"$lookup": {
+            "from": "bookings",
+            "localField": "room.id",
+            "foreignField": "room_id",
+            "pipeline": booking_pipeline,
+            "as": "booking",
+        }},
+        {"$unwind": {"path": "$booking", "preserveNullAndEmptyArrays": True}},
+        {"$facet": facets},
+    ]
+
+
+def shape_dashboard_stats(result: List[dict], per_hotel: bool = False) -> dict:
+    """Turn the single $facet document into the /dashboard/stats response"""
+    facets = result[0] if result else {}
+    totals = (facets.get("totals") or [{}])[0]
+    stats = {"total_hotels": totals.get("total_hotels", 0)}
+    for field in _booking_totals():
+        stats[field] = totals.get(field, 0)
+    stats["recent_bookings"] = facets.get("recent_bookings", [])
+    if per_hotel:
+        stats["hotels"] = facets.get("hotels", [])
+    return stats
@@ -0,0 +1,325 @@
+"""
+MongoDB index registry for the collections queried by server.py.
+
+Every index the API relies on is declared in INDEX_SPECS. ensure_indexes()
+creates the missing ones at startup and check_indexes() reports the drift
+between the declaration and what the database actually has, so the same
+registry can be used from the app and from scripts/migrate_indexes.py.
+"""
+
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: Tuple[Tuple[str, Union[int, str]], ...]
+    unique: bool = False
+    sparse: bool = False
+    name: Optional[str] = None
+    default_language: Optional[str] = None  # text indexes only
+    expire_after_seconds: Optional[int] = None  # TTL indexes only
+
+    @property
+    def index_name(self) -> str:
+        if self.name:
+            return self.name
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+
+def _idx(
+    collection: str,
+    *keys: Tuple[str, Union[int, str]],
+    unique: bool = False,
+    sparse: bool = False,
+    default_language: Optional[str] = None,
+    expire_after_seconds: Optional[int] = None,
+) -> IndexSpec:
+    return IndexSpec(collection=collection, keys=tuple(keys), unique=unique, sparse=sparse,
+                     default_language=default_language, expire_after_seconds=expire_after_seconds)
+
+
+INDEX_SPECS: List[IndexSpec] = [
+    # Users - login, get_current_user, verify_email
+    _idx("users", ("id", ASCENDING), unique=True),
+    _idx("users", ("email", ASCENDING), unique=True),
+    _idx("users", ("verification_token", ASCENDING), sparse=True),
+
+    # Hotels - get_hotel, get_hotels, manager dashboards, admin approval lists
+    _idx("hotels", ("id", ASCENDING), unique=True),
+    _idx("hotels", ("manager_id", ASCENDING)),
+    # city/name filters are prefix matches on the folded keys (hotel_keys.py)
+    _idx("hotels", ("is_active", ASCENDING), ("approval_status", ASCENDING), ("city_key", ASCENDING),
+         ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("hotels", ("is_active", ASCENDING), ("approval_status", ASCENDING), ("name_key", ASCENDING)),
+    # Keyset pages sort on (key, id), so id is the last key of every listing index
+    _idx("hotels", ("is_active", ASCENDING), ("approval_status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("hotels", ("approval_status", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)),
+
+    # Conference rooms - get_room, get_hotel_rooms, search_rooms sorts
+    _idx("conference_rooms", ("id", ASCENDING), unique=True),
+    _idx("conference_rooms", ("hotel_id", ASCENDING), ("is_available", ASCENDING), ("approval_status", ASCENDING),
+         ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("conference_rooms", ("is_available", ASCENDING), ("hotel_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("conference_rooms", ("is_available", ASCENDING), ("price_per_day", ASCENDING), ("id", ASCENDING)),
+    _idx("conference_rooms", ("is_available", ASCENDING), ("capacity", DESCENDING), ("id", DESCENDING)),
+    _idx("conference_rooms", ("approval_status", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)),
+
+    # Extra services - get_hotel_services, create_default_services
+    _idx("extra_services", ("id", ASCENDING), unique=True),
+    _idx("extra_services", ("hotel_id", ASCENDING), ("is_available", ASCENDING), ("name", ASCENDING), ("id", ASCENDING)),
+    _idx("extra_services", ("hotel_id", ASCENDING), ("name", ASCENDING)),
+
+    # Bookings - check_room_availability, get_room_availability, get_user_bookings
+    _idx("bookings", ("id", ASCENDING), unique=True),
+    _idx("bookings", ("room_id", ASCENDING), ("status", ASCENDING), ("start_date", ASCENDING), ("end_date", ASCENDING)),
+    # Booking lists (newest first) and the dashboard's recent bookings across a manager's rooms
+    _idx("bookings", ("customer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("bookings", ("room_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("bookings", ("created_at", DESCENDING), ("id", DESCENDING)),
+    # Manager listings and manager changes on denormalized bookings
+    _idx("bookings", ("manager_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("bookings", ("hotel_id", ASCENDING), ("manager_id", ASCENDING)),
+    # get_room_bookings schedule pages
+    _idx("bookings", ("room_id", ASCENDING), ("start_date", ASCENDING), ("id", ASCENDING)),
+    # Reminder scheduler - upcoming confirmed bookings not reminded yet, then its claim lookup
+    _idx("bookings", ("status", ASCENDING), ("start_date", ASCENDING), ("reminder_sent_at", ASCENDING)),
+    _idx("bookings", ("reminder_claim", ASCENDING), sparse=True),
+
+    # Reviews - listing sorts, duplicate checks, rating recomputation
+    _idx("reviews", ("id", ASCENDING), unique=True),
+    _idx("reviews", ("booking_id", ASCENDING)),
+    # Keyset pages sort on (key, id), so id is the last key of every listing index
+    _idx("reviews", ("hotel_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("reviews", ("hotel_id", ASCENDING), ("rating", DESCENDING), ("id", DESCENDING)),
+    _idx("reviews", ("hotel_id", ASCENDING), ("helpful_count", DESCENDING), ("id", DESCENDING)),
+    _idx("reviews", ("hotel_id", ASCENDING), ("user_id", ASCENDING)),
+    _idx("reviews", ("room_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+
+    # Advertisements - get_public_advertisements (equality, sort, then range)
+    _idx("advertisements", ("id", ASCENDING), unique=True),
+    _idx("advertisements", ("status", ASCENDING), ("is_active", ASCENDING),
+         ("priority", DESCENDING), ("created_at", DESCENDING), ("id", DESCENDING), ("start_date", ASCENDING)),
+    _idx("advertisements", ("status", ASCENDING), ("is_active", ASCENDING), ("ad_type", ASCENDING),
+         ("priority", DESCENDING), ("created_at", DESCENDING), ("id", DESCENDING), ("start_date", ASCENDING)),
+    _idx("advertisements", ("advertiser_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("advertisements", ("created_at", DESCENDING), ("id", DESCENDING)),
+    _idx("ad_views", ("ad_id", ASCENDING), ("timestamp", DESCENDING)),
+
+    # Payments - get_payment_status, stripe_webhook, duplicate checkout check
+    _idx("payment_transactions", ("id", ASCENDING), unique=True),
+    _idx("payment_transactions", ("session_id", ASCENDING), unique=True, sparse=True),
+    _idx("payment_transactions", ("booking_id", ASCENDING), ("payment_status", ASCENDING)),
+
+    # Exchange rate cache lookups
+    _idx("exchange_rates", ("cache_key", ASCENDING), ("created_at", DESCENDING)),
+
+    # Room search documents - text relevance, facet filters and the listing sorts
+    _idx("room_search", ("room_id", ASCENDING), unique=True),
+    _idx("room_search", ("hotel_id", ASCENDING)),
+    _idx("room_search", ("text", TEXT), default_language="none"),
+    _idx("room_search", ("city_key", ASCENDING), ("created_at", DESCENDING), ("room_id", DESCENDING)),
+    _idx("room_search", ("city_key", ASCENDING), ("rating", DESCENDING), ("room_id", DESCENDING)),
+    _idx("room_search", ("city_key", ASCENDING), ("price_eur", ASCENDING), ("room_id", ASCENDING)),
+    _idx("room_search", ("created_at", DESCENDING), ("room_id", DESCENDING)),
+    _idx("room_search", ("rating", DESCENDING), ("room_id", DESCENDING)),
+    _idx("room_search", ("price_eur", ASCENDING), ("room_id", ASCENDING)),
+    _idx("room_search", ("price_per_day", ASCENDING), ("room_id", ASCENDING)),
+    _idx("room_search", ("capacity", DESCENDING), ("room_id", DESCENDING)),
+    _idx("room_search", ("features", ASCENDING)),
+    _idx("room_search", ("synced_at", ASCENDING)),
+
+    # Per-hotel daily statistics rollups
+    _idx("hotel_stats_daily", ("hotel_id", ASCENDING), ("day", ASCENDING), unique=True),
+
+    # Content-addressed media - one document per stored file, looked up by hash; pending transcodes on startup
+    _idx("media_blobs", ("sha256", ASCENDING), unique=True),
+    _idx("media_blobs", ("stream.status", ASCENDING), sparse=True),
+
+    # Resumable upload sessions - documents expire at expires_at
+    _idx("upload_sessions", ("id", ASCENDING), unique=True),
+    _idx("upload_sessions", ("expires_at", ASCENDING), expire_after_seconds=0),
+
+    # Email outbox - worker claims due / lease-expired messages
+    _idx("email_outbox", ("id", ASCENDING), unique=True),
+    _idx("email_outbox", ("status", ASCENDING), ("next_attempt_at", ASCENDING)),
+    _idx("email_outbox", ("status", ASCENDING), ("locked_until", ASCENDING)),
+]
+
+
+def _key_signature(keys) -> Tuple[Tuple[str, Union[int, str]], ...]:
+    return tuple((field, direction if isinstance(direction, str) else int(direction)) for field, direction in keys)
+
+
+def _existing_signature(info: dict) -> Tuple[Tuple[str, Union[int, str]], ...]:
+    """Key signature of an existing index; text indexes report their fields as weights"""
+    keys = []
+    for field, direction in info["key"]:
+        if field == "_fts":
+            keys.extend((weighted, TEXT) for weighted in sorted(info.get("weights", {})))
+        elif field != "_ftsx":
+            keys.append((field, direction))
+    return _key_signature(keys)
+
+
+def _is_text(keys) -> bool:
+    return any(direction == TEXT for _, direction in keys)
+
+
+def _options_match(spec: IndexSpec, info: dict) -> bool:
+    """unique/sparse flags, TTL and text options of an existing index agree with the declaration"""
+    if bool(info.get("unique", False)) != spec.unique or bool(info.get("sparse", False)) != spec.sparse:
+        return False
+    if info.get("expireAfterSeconds") != spec.expire_after_seconds:
+        return False
+    if _is_text(spec.keys):
+        # Declared text indexes weight every field 1; MongoDB defaults the language to english
+        if info.get("default_language", "english") != (spec.default_language or "english"):
+            return False
+        if any(weight != 1 for weight in info.get("weights", {}).values()):
+            return False
+    return True
+
+
+def diff_indexes(specs: List[IndexSpec], existing: Dict[str, dict]) -> Tuple[List[IndexSpec], List[str]]:
+    """
+    Compare declared specs for one collection with its index_information().
+
+    Returns (missing specs, names of extra indexes). An existing index only
+    counts as matching when its key pattern, its unique/sparse flags, its TTL
+    and (for text indexes) its language and weights agree with the
+    declaration.
+    """
+    existing_by_keys = {}
+    for name, info in existing.items():
+        if name == "_id_":
+            continue
+        existing_by_keys[_existing_signature(info)] = (name, info)
+
+    missing = []
+    matched = set()
+    for spec in specs:
+        entry = existing_by_keys.get(_key_signature(spec.keys))
+        if entry is None:
+            missing.append(spec)
+            continue
+        name, info = entry
+        if not _options_match(spec, info):
+            missing.append(spec)
+            continue
+        matched.add(name)
+
+    extra = [name for name, _ in existing_by_keys.values() if name not in matched]
+    return missing, extra
+
+
+def conflicting_indexes(missing: List[IndexSpec], existing: Dict[str, dict], extra: List[str]) -> Dict[str, List[str]]:
+    """
+    Extra indexes that would make creating a missing spec fail, per spec name.
+
+    MongoDB refuses a second index with the same key pattern or the same
+    name (IndexOptionsConflict / IndexKeySpecsConflict), and a second text
+    index on a collection, so these have to be dropped before their
+    replacement is created.
+    """
+    conflicts: Dict[str, List[str]] = {}
+    for spec in missing:
+        signature = _key_signature(spec.keys)
+        for name in extra:
+            info = existing[name]
+            if (
+                name == spec.index_name
+                or _existing_signature(info) == signature
+                or (_is_text(spec.keys) and any(field == "_fts" for field, _ in info["key"]))
+            ):
+                conflicts.setdefault(spec.index_name, []).append(name)
+    return conflicts
+
+
+def _specs_by_collection(specs: List[IndexSpec]) -> Dict[str, List[IndexSpec]]:
+    grouped: Dict[str, List[IndexSpec]] = {}
+    for spec in specs:
+        grouped.setdefault(spec.collection, []).append(spec)
+    return grouped
+
+
+async def check_indexes(db, specs: Optional[List[IndexSpec]] = None) -> Dict[str, dict]:
+    """Report missing and extra indexes per collection without changing anything"""
+    report = {}
+    for collection, collection_specs in _specs_by_collection(specs or INDEX_SPECS).items():
+        existing = await db[collection].index_information()
+        missing, extra = diff_indexes(collection_specs, existing)
+        conflicts = conflicting_indexes(missing, existing, extra)
+        report[collection] = {
+            "missing": [spec.index_name for spec in missing],
+            "extra": extra,
+            "conflicting": sorted({name for names in conflicts.values() for name in names}),
+        }
+    return report
+
+
+async def ensure_indexes(db, specs: Optional[List[IndexSpec]] = None, drop_extra: bool = False) -> Dict[str, dict]:
+    """
+    Create every declared index that is missing.
+
+    An existing index with the same keys or name but other options is
+    replaced: it is dropped first, since MongoDB would refuse to create the
+    declared one next to it. Failures (for example a unique index over
+    existing duplicate data) are logged and reported instead of raised, so a
+    bad collection never stops the API from starting.
+    """
+    report = {}
+    for collection, collection_specs in _specs_by_collection(specs or INDEX_SPECS).items():
+        existing = await db[collection].index_information()
+        missing, extra = diff_indexes(collection_specs, existing)
+        conflicts = conflicting_indexes(missing, existing, extra)
+        created, failed, dropped = [], [], []
+
+        for spec in missing:
+            try:
+                for name in conflicts.get(spec.index_name, []):
+                    if name not in dropped:
+                        await db[collection].drop_index(name)
+                        dropped.append(name)
+                options = {"default_language": spec.default_language} if spec.default_language else {}
+                if spec.expire_after_seconds is not None:
+                    options["expireAfterSeconds"] = spec.expire_after_seconds
+                await db[collection].create_index(
+                    list(spec.keys),
+                    name=spec.index_name,
+                    unique=spec.unique,
+                    sparse=spec.sparse,
+                    background=True,
+                    **options
+                )
+                created.append(spec.index_name)
+            except PyMongoError as e:
+                logger.error(f"Failed to create index {collection}.{spec.index_name}: {e}")
+                failed.append(spec.index_name)
+
+        if drop_extra:
+            for name in extra:
+                if name in dropped:
+                    continue
+                try:
+                    await db[collection].drop_index(name)
+                    dropped.append(name)
+                except PyMongoError as e:
+                    logger.error(f"Failed to drop index {collection}.{name}: {e}")
+
+        remaining = [name for name in extra if name not in dropped]
+        if remaining:
+            logger.warning(f"Undeclared indexes on {collection}: {', '.join(remaining)}")
+
+        report[collection] = {
+            "created": created,
+            "failed": failed,
+            "extra": remaining,
+            "dropped": dropped,
+        }
+    return report
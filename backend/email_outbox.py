@@ -0,0 +1,298 @@
+"""
+Persistent email outbox.
+
+Request handlers only insert a document into the email_outbox collection.
+A background worker claims due messages in batches and sends them over one
+long-lived SMTP connection, which lives on a dedicated thread so smtplib
+never blocks the event loop. Failed messages are retried with exponential
+backoff and left as status "failed" after max_attempts.
+"""
+
+import asyncio
+import logging
+import random
+import smtplib
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import Message
+from typing import Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+
+class SMTPSender:
+    """
+    Blocking SMTP client that keeps its connection open between batches.
+
+    Only ever used from the outbox's single worker thread. The connection is
+    checked with NOOP before reuse and dropped after `idle_timeout` seconds
+    without traffic, so servers that cut idle clients do not cause failures.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        use_ssl: bool = True,
+        starttls: bool = True,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        timeout: float = 30.0,
+        idle_timeout: float = 60.0,
+    ):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._connection: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self.connections_opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            connection = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                connection.starttls()
+        if self.user and self.password:
+            connection.login(self.user, self.password)
+        self.connections_opened += 1
+        return connection
+
+    def _ensure_connection(self) -> smtplib.SMTP:
+        if self._connection is not None:
+            idle = time.monotonic() - self._last_used
+            try:
+                if idle > self.idle_timeout or self._connection.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("stale connection")
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+
+    def send_batch(self, messages: List[Message]) -> List[Optional[str]]:
+        """Send messages in order; returns None or an error string per message"""
+        results: List[Optional[str]] = []
+        for message in messages:
+            try:
+                self._ensure_connection().send_message(message)
+                self._last_used = time.monotonic()
+                results.append(None)
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                # Connection-level failure: reconnect for the next message
+                self.close()
+                results.append(str(e) or e.__class__.__name__)
+            except smtplib.SMTPException as e:
+                results.append(str(e) or e.__class__.__name__)
+        return results
+
+    def close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._connection = None
+
+
+class EmailOutbox:
+    def __init__(
+        self,
+        collection,
+        sender: SMTPSender,
+        build_message: Callable[[dict], Message],
+        batch_size: int = 20,
+        poll_interval: float = 5.0,
+        max_attempts: int = 5,
+        base_backoff_seconds: float = 30.0,
+        lease_seconds: float = 300.0,
+    ):
+        self._collection = collection
+        self.sender = sender
+        self._build_message = build_message
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff_seconds
+        self.lease_seconds = lease_seconds
+        # One thread, so the SMTP connection is never shared between threads
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._pending_inserts: Set[asyncio.Task] = set()
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_batch_size = 0
+
+    async def enqueue(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+    ) -> str:
+        now = datetime.utcnow()
+        message_id = str(uuid.uuid4())
+        await self._collection.insert_one({
+            "id": message_id,
+            "to_email": to_email,
+            "subject": subject,
+            "html_content": html_content,
+            "text_content": text_content,
+            "status": PENDING,
+            "attempts": 0,
+            "last_error": None,
+            "created_at": now,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "sent_at": None,
+        })
+        self.enqueued += 1
+        self._wakeup.set()
+        return message_id
+
+    def submit(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> bool:
+        """Fire-and-forget enqueue for synchronous callers running on the event loop"""
+        task = asyncio.get_running_loop().create_task(
+            self.enqueue(to_email, subject, html_content, text_content)
+        )
+        self._pending_inserts.add(task)
+        task.add_done_callback(self._insert_done)
+        return True
+
+    def _insert_done(self, task: asyncio.Task) -> None:
+        self._pending_inserts.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to enqueue email: {task.exception()}")
+
+    async def _claim_batch(self) -> List[dict]:
+        now = datetime.utcnow()
+        batch = []
+        for _ in range(self.batch_size):
+            # Atomic claim; expired leases cover a worker that died mid-send
+            doc = await self._collection.find_one_and_update(
+                {"$or": [
+                    {"status": PENDING, "next_attempt_at": {"$lte": now}},
+                    {"status": SENDING, "locked_until": {"$lt": now}},
+                ]},
+                {"$set": {"status": SENDING, "locked_until": now + timedelta(seconds=self.lease_seconds)}},
+                sort=[("next_attempt_at", 1)],
+                projection={"_id": 0},
+            )
+            if doc is None:
+                break
+            batch.append(doc)
+        return batch
+
+    def backoff_seconds(self, attempts: int) -> float:
+        delay = self.base_backoff * (2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def process_batch(self) -> int:
+        """Send one batch of due messages; returns how many were claimed"""
+        batch = await self._claim_batch()
+        self.last_batch_size = len(batch)
+        if not batch:
+            return 0
+
+        messages, errors = [], {}
+        for doc in batch:
+            try:
+                messages.append(self._build_message(doc))
+            except Exception as e:
+                errors[doc["id"]] = str(e)
+                messages.append(None)
+        sendable = [m for m in messages if m is not None]
+
+        loop = asyncio.get_running_loop()
+        results = iter(await loop.run_in_executor(self._executor, self.sender.send_batch, sendable))
+
+        now = datetime.utcnow()
+        for doc, message in zip(batch, messages):
+            error = errors.get(doc["id"]) if message is None else next(results)
+            if error is None:
+                self.sent += 1
+                await self._collection.update_one(
+                    {"id": doc["id"]},
+                    {"$set": {"status": SENT, "sent_at": now, "locked_until": None, "last_error": None}}
+                )
+                continue
+
+            attempts = doc.get("attempts", 0) + 1
+            if attempts >= self.max_attempts:
+                self.failed += 1
+                logger.error(f"Giving up on email to {doc['to_email']} after {attempts} attempts: {error}")
+                update = {"status": FAILED}
+            else:
+                self.retried += 1
+                logger.warning(f"Email to {doc['to_email']} failed (attempt {attempts}): {error}")
+                update = {
+                    "status": PENDING,
+                    "next_attempt_at": now + timedelta(seconds=self.backoff_seconds(attempts)),
+                }
+            update.update({"attempts": attempts, "last_error": error, "locked_until": None})
+            await self._collection.update_one({"id": doc["id"]}, {"$set": update})
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                # Nothing more due right now: sleep until a new message or the next poll
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._pending_inserts:
+            await asyncio.gather(*self._pending_inserts, return_exceptions=True)
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.sender.close)
+
+    async def stats(self) -> dict:
+        pending = await self._collection.count_documents({"status": {"$in": [PENDING, SENDING]}})
+        failed = await self._collection.count_documents({"status": FAILED})
+        return {
+            "queued": pending,
+            "dead_letters": failed,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "last_batch_size": self.last_batch_size,
+            "smtp_connections_opened": self.sender.connections_opened,
+        }
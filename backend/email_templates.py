@@ -0,0 +1,53 @@
+"""
+Compiled email templates.
+
+Templates live in backend/templates/email and share one layout (_layout.html,
+_styles.css, _detail_rows.html). Every template is parsed and compiled once
+at import; rendering only evaluates the compiled code. `render_many` renders
+one template for many recipients in a single call for reminder/batch sends.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+TEMPLATE_DIR = Path(__file__).parent / "templates" / "email"
+
+
+def format_datetime(value: Any, fmt: str = "%d.%m.%Y %H:%M") -> str:
+    return value.strftime(fmt) if isinstance(value, datetime) else str(value)
+
+
+class EmailTemplates:
+    def __init__(self, template_dir: Path = TEMPLATE_DIR, **globals_):
+        self.env = Environment(
+            loader=FileSystemLoader(str(template_dir)),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False,  # templates never change at runtime
+            cache_size=-1,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        self.env.filters["datetime"] = format_datetime
+        self.env.globals.update(globals_)
+        # Compile everything up front; partials (leading "_") are pulled in by the layout
+        self._templates: Dict[str, Template] = {
+            path.stem: self.env.get_template(path.name)
+            for path in sorted(Path(template_dir).glob("*.html"))
+            if not path.name.startswith("_")
+        }
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(self._templates)
+
+    def render(self, name: str, **context) -> str:
+        return self._templates[name].render(**context)
+
+    def render_many(self, name: str, contexts: Iterable[dict], **shared) -> List[str]:
+        """Render one template per context; `shared` values apply to all of them"""
+        template = self._templates[name]
+        return [template.render({**shared, **context}) for context in contexts]
+
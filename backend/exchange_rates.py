@@ -0,0 +1,204 @@
+"""
+Process-wide exchange-rate table.
+
+Rates for every pair of supported currencies live in memory. They are
+loaded from the exchange_rates collection at startup and refreshed by a
+background task on a jittered interval; lookups never wait on the network.
+Stale entries keep being served while a single-flight refresh runs.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from http_clients import http_clients
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_RATE_API_URL = "https://api.exchangerate-api.com/v4/latest/{base}"
+
+RateFetcher = Callable[[str], Awaitable[Dict[str, float]]]
+
+
+async def fetch_latest_rates(base_currency: str) -> Dict[str, float]:
+    """Fetch all rates for one base currency from exchangerate-api.com"""
+    response = await http_clients.get(EXCHANGE_RATE_API_URL.format(base=base_currency))
+    response.raise_for_status()
+    return response.json()["rates"]
+
+
+class ExchangeRateCache:
+    def __init__(
+        self,
+        collection,
+        currencies: Iterable[str],
+        ttl_seconds: float = 24 * 3600,
+        jitter: float = 0.1,
+        retry_seconds: float = 60.0,
+        fetcher: Optional[RateFetcher] = None,
+    ):
+        self._collection = collection
+        self.currencies = list(currencies)
+        self.ttl = ttl_seconds
+        self.jitter = jitter
+        self.retry_seconds = retry_seconds
+        self._fetch = fetcher or fetch_latest_rates
+        self._rates: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._last_attempt: Optional[float] = None
+        self.refresh_count = 0
+        self.refresh_failures = 0
+        self.last_refresh: Optional[datetime] = None
+
+    @staticmethod
+    def cache_key(base_currency: str, target_currency: str) -> str:
+        return f"exchange_rate_{base_currency}_{target_currency}"
+
+    def _pairs(self):
+        for base in self.currencies:
+            for target in self.currencies:
+                if base != target:
+                    yield base, target
+
+    def _is_stale(self, fetched_at: float) -> bool:
+        return time.monotonic() - fetched_at >= self.ttl
+
+    def _next_delay(self) -> float:
+        # Jitter downwards so the scheduled refresh lands before entries go stale
+        return self.ttl * (1 - self.jitter * random.random())
+
+    async def load(self) -> int:
+        """Seed the table from the most recent stored rate of every pair"""
+        loaded = 0
+        for base, target in self._pairs():
+            doc = await self._collection.find_one(
+                {"cache_key": self.cache_key(base, target)},
+                sort=[("created_at", -1)],
+            )
+            if not doc:
+                continue
+            age = (datetime.utcnow() - doc["created_at"]).total_seconds()
+            # Keep the stored age so old rows are refreshed soon after startup
+            self._rates[(base, target)] = (doc["rate"], time.monotonic() - max(age, 0))
+            loaded += 1
+        return loaded
+
+    def get_rate(self, base_currency: str, target_currency: str) -> float:
+        """Current rate; schedules a background refresh when missing or stale"""
+        if base_currency == target_currency:
+            return 1.0
+
+        entry = self._rates.get((base_currency, target_currency))
+        if entry is None or self._is_stale(entry[1]):
+            self.schedule_refresh()
+        if entry is not None:
+            return entry[0]
+
+        inverse = self._rates.get((target_currency, base_currency))
+        if inverse is not None and inverse[0]:
+            return 1.0 / inverse[0]
+        return 1.0  # Fallback to 1:1 rate until the first refresh lands
+
+    def schedule_refresh(self, force: bool = False) -> Optional[asyncio.Task]:
+        """
+        Start a refresh unless one is already running (single-flight).
+
+        Request-triggered refreshes are spaced by retry_seconds so an API
+        outage does not turn every lookup into another outbound call.
+        """
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return self._refresh_task
+        now = time.monotonic()
+        if not force and self._last_attempt is not None and now - self._last_attempt < self.retry_seconds:
+            return None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        self._last_attempt = now
+        self._refresh_task = loop.create_task(self._refresh())
+        return self._refresh_task
+
+    async def refresh(self) -> None:
+        task = self.schedule_refresh(force=True)
+        if task is not None:
+            await asyncio.shield(task)
+
+    async def _refresh(self) -> None:
+        fetched = {}
+        for base in self.currencies:
+            try:
+                rates = await self._fetch(base)
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.error(f"Exchange rate fetch error for {base}: {e}")
+                continue
+            for target in self.currencies:
+                if target != base and target in rates:
+                    fetched[(base, target)] = float(rates[target])
+
+        if not fetched:
+            return
+
+        now = datetime.utcnow()
+        fetched_at = time.monotonic()
+        for pair, rate in fetched.items():
+            self._rates[pair] = (rate, fetched_at)
+        self.refresh_count += 1
+        self.last_refresh = now
+
+        try:
+            await self._collection.insert_many([
+                {
+                    "cache_key": self.cache_key(base, target),
+                    "base_currency": base,
+                    "target_currency": target,
+                    "rate": rate,
+                    "created_at": now,
+                }
+                for (base, target), rate in fetched.items()
+            ])
+        except Exception as e:
+            logger.error(f"Failed to persist exchange rates: {e}")
+
+    def _needs_refresh(self) -> bool:
+        if any(pair not in self._rates for pair in self._pairs()):
+            return True
+        return any(self._is_stale(fetched_at) for _, fetched_at in self._rates.values())
+
+    async def _run(self) -> None:
+        refresh_due = self._needs_refresh()
+        while True:
+            if refresh_due:
+                await self.refresh()
+            # Retry quickly while the table is incomplete or stale
+            delay = self.retry_seconds if self._needs_refresh() else self._next_delay()
+            await asyncio.sleep(delay)
+            refresh_due = True
+
+    async def start(self) -> None:
+        loaded = await self.load()
+        logger.info(f"Loaded {loaded} exchange rates from MongoDB")
+        self._loop_task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "pairs": len(self._rates),
+            "stale_pairs": sum(1 for _, fetched_at in self._rates.values() if self._is_stale(fetched_at)),
+            "refresh_count": self.refresh_count,
+            "refresh_failures": self.refresh_failures,
+            "last_refresh": self.last_refresh,
+        }
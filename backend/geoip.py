@@ -0,0 +1,193 @@
+"""
+Client IP -> country resolution for currency detection.
+
+Lookups are cached per network prefix (/24 for IPv4, /48 for IPv6) in a
+bounded LRU+TTL cache, so neighbouring addresses share one entry. Resolvers
+are tried in order: a local range database (MaxMind .mmdb, or a CSV of
+start,end,country ranges searched with bisect) and, optionally, the
+ip-api.com HTTP service as a last resort.
+"""
+
+import csv
+import ipaddress
+import logging
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Optional, Protocol, Tuple
+
+from caching import TTLCache
+from http_clients import http_clients
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COUNTRY = "TR"
+
+
+class CountryResolver(Protocol):
+    name: str
+
+    async def resolve(self, ip: ipaddress._BaseAddress) -> Optional[str]:
+        ...
+
+
+class RangeFileResolver:
+    """
+    Offline resolver over a CSV of `start_ip,end_ip,country_code` rows.
+
+    Addresses may be dotted/colon notation or plain integers, which covers
+    the common GeoLite2/IP2Location CSV exports after a column trim.
+    """
+
+    name = "range_file"
+
+    def __init__(self, path: str):
+        ranges: List[Tuple[int, int, str]] = []
+        with open(path, newline="", encoding="utf-8") as handle:
+            for row in csv.reader(handle):
+                if len(row) < 3 or row[0].startswith("#"):
+                    continue
+                try:
+                    start, end = self._to_int(row[0]), self._to_int(row[1])
+                except ValueError:
+                    continue  # header or malformed row
+                ranges.append((start, end, row[2].strip().upper()))
+        ranges.sort()
+        self._starts = [r[0] for r in ranges]
+        self._ranges = ranges
+        logger.info(f"Loaded {len(ranges)} GeoIP ranges from {path}")
+
+    @staticmethod
+    def _to_int(value: str) -> int:
+        value = value.strip()
+        return int(value) if value.isdigit() else int(ipaddress.ip_address(value))
+
+    async def resolve(self, ip: ipaddress._BaseAddress) -> Optional[str]:
+        return self.lookup(int(ip))
+
+    def lookup(self, ip_int: int) -> Optional[str]:
+        position = bisect_right(self._starts, ip_int) - 1
+        if position >= 0:
+            start, end, country = self._ranges[position]
+            if start <= ip_int <= end:
+                return country
+        return None
+
+
+class MMDBResolver:
+    """Offline resolver over a MaxMind .mmdb file (needs the maxminddb package)"""
+
+    name = "mmdb"
+
+    def __init__(self, path: str):
+        import maxminddb
+
+        self._reader = maxminddb.open_database(path)
+
+    async def resolve(self, ip: ipaddress._BaseAddress) -> Optional[str]:
+        record = self._reader.get(str(ip))
+        if not record:
+            return None
+        country = record.get("country") or record.get("registered_country") or {}
+        return country.get("iso_code")
+
+
+class IpApiResolver:
+    """Online fallback using ip-api.com over the shared HTTP client"""
+
+    name = "ip_api"
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+
+    async def resolve(self, ip: ipaddress._BaseAddress) -> Optional[str]:
+        response = await http_clients.get(f"http://ip-api.com/json/{ip}", timeout=self.timeout)
+        if response.status_code == 200:
+            return response.json().get("countryCode")
+        return None
+
+
+def network_key(ip: ipaddress._BaseAddress) -> str:
+    """Cache key shared by every address in the same /24 (IPv4) or /48 (IPv6)"""
+    prefix = 24 if ip.version == 4 else 48
+    return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+
+
+class GeoIPLocator:
+    def __init__(
+        self,
+        resolvers: List[CountryResolver],
+        cache: TTLCache,
+        default_country: str = DEFAULT_COUNTRY,
+        negative_ttl_seconds: float = 300.0,
+    ):
+        self.resolvers = resolvers
+        self.cache = cache
+        self.default_country = default_country
+        self.negative_ttl = negative_ttl_seconds
+        self.resolver_hits = {resolver.name: 0 for resolver in resolvers}
+        self.resolver_errors = {resolver.name: 0 for resolver in resolvers}
+        self.unresolved = 0
+
+    async def country_for(self, client_ip: str) -> str:
+        try:
+            ip = ipaddress.ip_address(client_ip)
+        except ValueError:
+            # "localhost", "testclient" and other non-addresses
+            return self.default_country
+
+        # Local and internal addresses are treated as Turkey
+        if ip.is_private or ip.is_loopback or ip.is_link_local:
+            return self.default_country
+
+        key = network_key(ip)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        for resolver in self.resolvers:
+            try:
+                country = await resolver.resolve(ip)
+            except Exception as e:
+                self.resolver_errors[resolver.name] += 1
+                logger.error(f"IP geolocation error ({resolver.name}): {e}")
+                continue
+            if country:
+                self.resolver_hits[resolver.name] += 1
+                self.cache.set(key, country)
+                return country
+
+        # Remember failures briefly so an outage is not retried on every request
+        self.unresolved += 1
+        self.cache.set(key, self.default_country, ttl_seconds=self.negative_ttl)
+        return self.default_country
+
+    def stats(self) -> dict:
+        return {
+            "cache": self.cache.stats(),
+            "resolver_hits": dict(self.resolver_hits),
+            "resolver_errors": dict(self.resolver_errors),
+            "unresolved": self.unresolved,
+        }
+
+
+def build_locator(
+    database_path: Optional[str] = None,
+    remote_lookup: bool = True,
+    max_entries: int = 50000,
+    ttl_seconds: float = 24 * 3600,
+    max_bytes: Optional[int] = 16 * 1024 * 1024,
+) -> GeoIPLocator:
+    """Create a locator from configuration; a missing database is logged, not fatal"""
+    resolvers: List[CountryResolver] = []
+    if database_path:
+        try:
+            if Path(database_path).suffix == ".mmdb":
+                resolvers.append(MMDBResolver(database_path))
+            else:
+                resolvers.append(RangeFileResolver(database_path))
+        except Exception as e:
+            logger.error(f"Could not load GeoIP database {database_path}: {e}")
+    if remote_lookup:
+        resolvers.append(IpApiResolver())
+    cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+    return GeoIPLocator(resolvers, cache)
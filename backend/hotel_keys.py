@@ -0,0 +1,39 @@
+"""
+Folded search keys stored on hotel documents.
+
+`city_key` and `name_key` are the text_normalization.fold forms of `city`
+and `name`. They are set whenever a hotel is created or either field is
+updated, and GET /hotels filters on them with an anchored prefix match.
+`backfill` fills in hotels written before the keys existed.
+"""
+
+from typing import Dict
+
+from pymongo import UpdateOne
+
+from text_normalization import fold
+
+KEY_FIELDS = {"city": "city_key", "name": "name_key"}
+
+
+def hotel_keys(fields: dict) -> Dict[str, str]:
+    """Keys for whichever of the source fields are present in `fields`"""
+    return {key: fold(fields[field]) for field, key in KEY_FIELDS.items() if field in fields}
+
+
+async def backfill(db, batch_size: int = 500) -> int:
+    """Set city_key/name_key on every hotel missing or disagreeing with them; returns hotels updated"""
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in KEY_FIELDS}, **{key: 1 for key in KEY_FIELDS.values()}}
+    requests = []
+    updated = 0
+    async for hotel in db.hotels.find({}, projection):
+        keys = hotel_keys({field: hotel.get(field) for field in KEY_FIELDS})
+        if all(hotel.get(key) == value for key, value in keys.items()):
+            continue
+        requests.append(UpdateOne({"id": hotel["id"]}, {"$set": keys}))
+        if len(requests) >= batch_size:
+            updated += (await db.hotels.bulk_write(requests, ordered=False)).modified_count
+            requests = []
+    if requests:
+        updated += (await db.hotels.bulk_write(requests, ordered=False)).modified_count
+    return updated
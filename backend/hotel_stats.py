@@ -0,0 +1,237 @@
+"""
+Per-hotel daily statistics rollups (hotel_stats_daily).
+
+One document per (hotel_id, day), with day at midnight UTC:
+
+    {hotel_id, day, bookings, status_counts: {pending, confirmed, ...},
+     paid_bookings, paid_revenue, room_days, updated_at}
+
+Booking counts and revenue land on the booking's start day; room_days are
+spread one per day over the days the booking occupies, so the room-days
+summed over a date range never count days outside it.
+
+Rows are maintained with $inc deltas computed from a booking's state before
+and after a change, so every write path (create, status change, payment)
+only has to report the transition. Status/payment updates read the previous
+state atomically with find_one_and_update, which makes repeated webhooks or
+payment-status polls no-ops. `rebuild` recomputes rows from bookings.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, time as dt_time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+
+from availability import to_naive_utc
+
+logger = logging.getLogger(__name__)
+
+BOOKING_STATUSES = ["pending", "confirmed", "cancelled", "completed"]
+# Statuses whose days count towards occupancy
+OCCUPYING_STATUSES = {"pending", "confirmed", "completed"}
+PAID = "paid"
+
+Delta = Dict[Tuple[str, datetime], Dict[str, float]]
+
+
+def _value(field) -> Optional[str]:
+    """Plain string for str-Enum members (PaymentStatus.PAID -> "paid")"""
+    return getattr(field, "value", field)
+
+
+def booking_day(booking: dict) -> datetime:
+    return datetime.combine(to_naive_utc(booking["start_date"]).date(), dt_time.min)
+
+
+def occupied_days(booking: dict) -> List[datetime]:
+    """The days a booking occupies its room: total_days of them from the start day"""
+    first = booking_day(booking)
+    return [first + timedelta(days=offset) for offset in range(booking.get("total_days") or 1)]
+
+
+def contributions(booking: dict) -> Dict[datetime, Dict[str, float]]:
+    """Counters a single booking adds to its hotel's rows, by day"""
+    status = _value(booking.get("status"))
+    counters = {"bookings": 1, f"status_counts.{status}": 1}
+    if _value(booking.get("payment_status")) == PAID:
+        counters["paid_bookings"] = 1
+        counters["paid_revenue"] = float(booking.get("total_price") or 0)
+    days = {booking_day(booking): counters}
+    if status in OCCUPYING_STATUSES:
+        for day in occupied_days(booking):
+            days.setdefault(day, {})["room_days"] = 1
+    return days
+
+
+def booking_delta(before: Optional[dict], after: Optional[dict], hotel_id: str) -> Delta:
+    """Per-row counter changes for one booking transition (zero entries dropped)"""
+    delta: Delta = defaultdict(lambda: defaultdict(int))
+    for booking, sign in ((before, -1), (after, 1)):
+        if booking is None:
+            continue
+        for day, counters in contributions(booking).items():
+            row = delta[(hotel_id, day)]
+            for field, amount in counters.items():
+                row[field] += sign * amount
+    return {
+        key: {field: amount for field, amount in row.items() if amount}
+        for key, row in delta.items()
+        if any(row.values())
+    }
+
+
+class HotelStatsRollup:
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.hotel_stats_daily
+        self.applied = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def hotel_id_for(self, booking: dict) -> Optional[str]:
+        if booking.get("hotel_id"):
+            return booking["hotel_id"]
+        room = await self.db.conference_rooms.find_one({"id": booking["room_id"]}, {"_id": 0, "hotel_id": 1})
+        return room["hotel_id"] if room else None
+
+    async def apply(self, before: Optional[dict], after: Optional[dict], hotel_id: Optional[str] = None) -> None:
+        """Record a booking transition; errors are logged, never raised to the request"""
+        try:
+            hotel_id = hotel_id or await self.hotel_id_for(after or before)
+            if hotel_id is None:
+                return
+            delta = booking_delta(before, after, hotel_id)
+            if not delta:
+                return
+            now = datetime.utcnow()
+            await self.collection.bulk_write([
+                UpdateOne(
+                    {"hotel_id": row_hotel, "day": day},
+                    {"$inc": counters, "$set": {"updated_at": now}},
+                    upsert=True
+                )
+                for (row_hotel, day), counters in delta.items()
+            ], ordered=False)
+            self.applied += 1
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Hotel stats rollup update failed: {e}")
+
+    async def update_booking(self, query: dict, changes: dict, hotel_id: Optional[str] = None) -> Optional[dict]:
+        """$set `changes` on one booking and roll up the transition; returns the updated booking"""
+        before = await self.db.bookings.find_one_and_update(
+            query, {"$set": changes}, projection={"_id": 0}, return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        after = {**before, **changes}
+        await self.apply(before, after, hotel_id=hotel_id)
+        return after
+
+    async def has_rows(self, hotel_ids: List[str]) -> bool:
+        """Whether any rollup row exists for these hotels"""
+        return await self.collection.find_one({"hotel_id": {"$in": hotel_ids}}, {"_id": 1}) is not None
+
+    async def read(
+        self,
+        hotel_ids: List[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        per_hotel: bool = False,
+    ) -> dict:
+        """Totals (and optionally per-hotel rows) summed over the rollup rows in range"""
+        match: dict = {"hotel_id": {"$in": hotel_ids}}
+        if start is not None or end is not None:
+            match["day"] = {}
+            if start is not None:
+                match["day"]["$gte"] = datetime.combine(start.date(), dt_time.min)
+            if end is not None:
+                match["day"]["$lte"] = end
+        sums = {
+            "total_bookings": {"$sum": "$bookings"},
+            "paid_bookings": {"$sum": "$paid_bookings"},
+            "total_revenue": {"$sum": "$paid_revenue"},
+            "booked_room_days": {"$sum": "$room_days"},
+            **{f"{status}_bookings": {"$sum": f"$status_counts.{status}"} for status in BOOKING_STATUSES},
+        }
+        facets = {"totals": [{"$group": {"_id": None, **sums}}, {"$project": {"_id": 0}}]}
+        if per_hotel:
+            facets["hotels"] = [
+                {"$group": {"_id": "$hotel_id", **sums}},
+                {"$sort": {"total_revenue": -1, "total_bookings": -1}},
+                {"$project": {"_id": 0, "hotel_id": "$_id", **{field: 1 for field in sums}}},
+            ]
+        result = await self.collection.aggregate([{"$match": match}, {"$facet": facets}]).to_list(1)
+        facet = result[0] if result else {}
+        totals = (facet.get("totals") or [{}])[0]
+        stats = {field: totals.get(field, 0) for field in sums}
+        if per_hotel:
+            stats["hotels"] = facet.get("hotels", [])
+        return stats
+
+    async def rebuild(self, hotel_ids: Optional[Iterable[str]] = None, batch_size: int = 1000) -> int:
+        """Recompute rows from bookings (all hotels, or only `hotel_ids`); returns rows written"""
+        if hotel_ids is not None:
+            hotel_ids = list(hotel_ids)
+        room_filter = {"hotel_id": {"$in": hotel_ids}} if hotel_ids is not None else {}
+        room_hotels = {
+            room["id"]: room["hotel_id"]
+            async for room in self.db.conference_rooms.find(room_filter, {"_id": 0, "id": 1, "hotel_id": 1})
+        }
+        booking_filter = {"room_id": {"$in": list(room_hotels)}} if hotel_ids is not None else {}
+
+        rows: Delta = defaultdict(lambda: defaultdict(int))
+        projection = {"_id": 0, "room_id": 1, "hotel_id": 1, "start_date": 1, "status": 1,
+                      "payment_status": 1, "total_price": 1, "total_days": 1}
+        async for booking in self.db.bookings.find(booking_filter, projection):
+            hotel_id = booking.get("hotel_id") or room_hotels.get(booking["room_id"])
+            if hotel_id is None:
+                continue  # room was deleted
+            for day, counters in contributions(booking).items():
+                for field, amount in counters.items():
+                    rows[(hotel_id, day)][field] += amount
+
+        delete_filter = {"hotel_id": {"$in": hotel_ids}} if hotel_ids is not None else {}
+        await self.collection.delete_many(delete_filter)
+
+        now = datetime.utcnow()
+        documents = []
+        for (hotel_id, day), counters in rows.items():
+            doc = {"hotel_id": hotel_id, "day": day, "status_counts": {}, "updated_at": now}
+            for field, amount in counters.items():
+                if field.startswith("status_counts."):
+                    doc["status_counts"][field.split(".", 1)[1]] = int(amount)
+                else:
+                    doc[field] = amount
+            documents.append(doc)
+        for offset in range(0, len(documents), batch_size):
+            await self.collection.insert_many(documents[offset:offset + batch_size])
+        return len(documents)
+
+    async def _rebuild_logged(self) -> None:
+        try:
+            rows = await self.rebuild()
+            logger.info(f"Hotel stats rollups rebuilt: {rows} daily rows")
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Hotel stats rebuild failed: {e}")
+
+    def start_rebuild(self) -> None:
+        """Rebuild in a background task (no-op while one is running)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._rebuild_logged())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"applied": self.applied, "failures": self.failures}
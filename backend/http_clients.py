@@ -0,0 +1,120 @@
+"""
+Application-scoped outbound HTTP client.
+
+One pooled httpx.AsyncClient is shared by every outbound call (geolocation,
+exchange rates, ...) so TCP/TLS connections are kept alive and reused.
+Each host gets its own concurrency limit and default timeout, and HTTP/2 is
+negotiated when the optional h2 package is installed.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientRegistry:
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        default_timeout: float = 5.0,
+        default_host_limit: int = 20,
+        host_limits: Optional[Dict[str, int]] = None,
+        host_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.default_timeout = default_timeout
+        self.default_host_limit = default_host_limit
+        self.host_limits = dict(host_limits or {})
+        self.host_timeouts = dict(host_timeouts or {})
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._requests: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so scripts and tests work without the startup hook
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=self.limits,
+                timeout=httpx.Timeout(self.default_timeout),
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def start(self) -> None:
+        _ = self.client
+        logger.info(f"Outbound HTTP client ready (http2={HTTP2_AVAILABLE})")
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.host_limits.get(host, self.default_host_limit))
+            self._semaphores[host] = semaphore
+        return semaphore
+
+    async def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        host = urlsplit(url).hostname or ""
+        if timeout is None:
+            timeout = self.host_timeouts.get(host, self.default_timeout)
+        async with self._semaphore(host):
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            self._requests[host] = self._requests.get(host, 0) + 1
+            try:
+                return await self.client.request(method, url, timeout=timeout, **kwargs)
+            except httpx.HTTPError:
+                self._errors[host] = self._errors.get(host, 0) + 1
+                raise
+            finally:
+                self._in_flight[host] -= 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "open": self._client is not None and not self._client.is_closed,
+            "hosts": {
+                host: {
+                    "requests": count,
+                    "errors": self._errors.get(host, 0),
+                    "in_flight": self._in_flight.get(host, 0),
+                }
+                for host, count in self._requests.items()
+            },
+        }
+
+
+# Create singleton instance
+http_clients = HTTPClientRegistry(
+    host_limits={"ip-api.com": 10, "api.exchangerate-api.com": 4},
+    host_timeouts={"ip-api.com": 2.0, "api.exchangerate-api.com": 5.0},
+)
@@ -0,0 +1,215 @@
+"""
+Resized and re-encoded variants of uploaded hotel and room images.
+
+After an image is saved, `ImageProcessor.schedule` renders it on a process
+pool (decoding and resizing with Pillow is CPU bound and holds the GIL):
+one variant per configured width smaller than the original, plus one at
+the original width, each in the original format (JPEG or PNG) and in WebP,
+and AVIF when this Pillow build supports it. Files are named
+`<stem>_w<width>.<ext>` and written next to content-addressed images in the
+blob store (older uploads: under `variants/` in their upload directory).
+The manifest is stored on the media_blobs document and on the owning hotel
+or room document under `image_variants.<stem>`:
+
+    {"width": 4000, "height": 3000,
+     "variants": [{"width": 320, "height": 240, "format": "webp",
+                   "filename": "<stem>_w320.webp", "bytes": 14211}, ...]}
+
+The image endpoints pick a variant with `choose_variant`: the narrowest one
+at least `?w=` wide (the full-width one without `w`), in the best format
+the client lists in Accept. Images without a manifest (not processed yet,
+or not decodable) are served as uploaded.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+from PIL import Image, ImageOps, features
+
+from blob_store import is_content_hash
+from caching import TTLCache
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIRNAME = "variants"
+DEFAULT_WIDTHS = (320, 640, 1280)
+MEDIA_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp", "avif": "image/avif"}
+# Preferred first when the client accepts them
+MODERN_FORMATS = ("avif", "webp")
+_SAVE_OPTIONS = {
+    "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+    "png": {"optimize": True},
+    "webp": {"quality": 80, "method": 4},
+    "avif": {"quality": 60},
+}
+
+
+def available_formats() -> List[str]:
+    """Modern formats this Pillow build can encode"""
+    return [fmt for fmt in MODERN_FORMATS if features.check(fmt)]
+
+
+def image_stem(filename: str) -> str:
+    return filename.rsplit(".", 1)[0]
+
+
+def render_variants(source: str, output_dir: str, stem: str, widths: Sequence[int], formats: Sequence[str]) -> dict:
+    """Write the variants of one image and return its manifest (runs in a worker process)"""
+    with Image.open(source) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    base_format = "png" if has_alpha else "jpeg"
+    original_width, original_height = image.size
+
+    os.makedirs(output_dir, exist_ok=True)
+    variants = []
+    for width in sorted({w for w in widths if w < original_width} | {original_width}):
+        height = max(1, round(original_height * width / original_width))
+        resized = image if width == original_width else image.resize((width, height), Image.LANCZOS)
+        for fmt in [base_format, *formats]:
+            filename = f"{stem}_w{width}.{'jpg' if fmt == 'jpeg' else fmt}"
+            path = os.path.join(output_dir, filename)
+            resized.save(path, format=fmt.upper(), **_SAVE_OPTIONS[fmt])
+            variants.append({"width": width, "height": height, "format": fmt,
+                             "filename": filename, "bytes": os.path.getsize(path)})
+    return {"width": original_width, "height": original_height, "variants": variants}
+
+
+def choose_variant(manifest: Optional[dict], width: Optional[int], accept: str) -> Optional[dict]:
+    """Variant to serve for a requested width and Accept header, or None for the original file"""
+    if not manifest or not manifest.get("variants"):
+        return None
+    variants = manifest["variants"]
+    widths = sorted({v["width"] for v in variants})
+    if width:
+        chosen_width = next((w for w in widths if w >= width), widths[-1])
+    else:
+        chosen_width = widths[-1]
+    candidates = {v["format"]: v for v in variants if v["width"] == chosen_width}
+
+    accept = accept.lower()
+    for fmt in MODERN_FORMATS:
+        if fmt in candidates and MEDIA_TYPES[fmt] in accept:
+            return candidates[fmt]
+    # Full width in the original format: the uploaded file itself is as good
+    if not width:
+        return None
+    return next((v for fmt, v in candidates.items() if fmt not in MODERN_FORMATS), None)
+
+
+class ImageProcessor:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        widths: Sequence[int] = DEFAULT_WIDTHS,
+        formats: Optional[Sequence[str]] = None,
+    ):
+        self.max_workers = max_workers or min(2, os.cpu_count() or 1)
+        self.widths = tuple(widths)
+        self.formats = tuple(available_formats() if formats is None else formats)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.processed = 0
+        self.failed = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that runs an event loop and thread pools is unsafe
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def render(self, source: Path, stem: str, output_dir: Optional[Path] = None) -> dict:
+        """Manifest of the rendered variants, written to `output_dir` (default: variants/ next to the source)"""
+        loop = asyncio.get_running_loop()
+        output_dir = output_dir or source.parent / VARIANTS_DIRNAME
+        return await loop.run_in_executor(
+            self._pool(), render_variants, str(source), str(output_dir), stem, self.widths, self.formats
+        )
+
+    async def _process(self, source: Path, on_done, output_dir: Optional[Path]) -> None:
+        stem = image_stem(source.name)
+        try:
+            manifest = await self.render(source, stem, output_dir)
+            await on_done(stem, manifest)
+            self.processed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Image variants failed for {source.name}: {e}")
+
+    def schedule(
+        self,
+        source: Path,
+        on_done: Callable[[str, dict], Awaitable[None]],
+        output_dir: Optional[Path] = None,
+    ) -> None:
+        """Render variants in the background and hand the manifest to `on_done(stem, manifest)`"""
+        task = asyncio.create_task(self._process(source, on_done, output_dir))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "widths": list(self.widths),
+            "formats": list(self.formats),
+            "pending": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+class ImageManifests:
+    """Cached manifest lookups for the image endpoints
+
+    Content-addressed images (blob_store.py) keep their manifest on the
+    media_blobs document, shared by every hotel and room using the image.
+    Older upload filenames start with the owning hotel or room id, so their
+    manifest is one indexed find_one on `id`. Images without one are cached
+    too.
+    """
+
+    def __init__(self, blobs=None, ttl_seconds: float = 300.0, max_entries: int = 10000):
+        self.blobs = blobs
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    async def get(self, collection, filename: str) -> Optional[dict]:
+        stem = image_stem(filename)
+        if self.blobs is not None and is_content_hash(stem):
+            collection, query, path = self.blobs, {"sha256": stem}, ("variants",)
+        else:
+            query, path = {"id": stem.split("_", 1)[0]}, ("image_variants", stem)
+        key = (collection.name, stem)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached or None
+        manifest = await collection.find_one(query, {"_id": 0, ".".join(path): 1}) or {}
+        for field in path:
+            manifest = manifest.get(field) or {}
+        self.cache.set(key, manifest)
+        return manifest or None
+
+    def invalidate(self, collection, stem: str) -> None:
+        self.cache.pop((collection.name, stem))
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return self.cache.stats()
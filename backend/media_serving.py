@@ -0,0 +1,271 @@
+"""
+Cacheable, seekable responses for uploaded images and videos.
+
+`MediaServer.respond` wraps a file on disk with:
+
+- a strong ETag derived from the content hash: the SHA-256 in the name of
+  content-addressed files (blob_store.py), otherwise the SHA-256 of the
+  bytes, computed once per file version on a small thread pool and cached
+- `Cache-Control` chosen by the caller: content-addressed names never
+  change content, so they are cached for a year as immutable
+- `304 Not Modified` when If-None-Match carries the ETag
+- single byte ranges (`Range: bytes=a-b`, `a-`, `-n`) answered with 206 and
+  Content-Range, honouring If-Range, and 416 for ranges past the end;
+  multi-range requests get the whole file, as RFC 9110 allows
+- optional zero-copy delivery: with `accel_redirect_prefix` set, the body is
+  left to a fronting nginx (`X-Accel-Redirect` to an internal location
+  aliased to the upload directory), which sends it with sendfile and serves
+  ranges itself. Without it, full files go through FileResponse, which uses
+  the ASGI pathsend extension on servers that offer it.
+"""
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Mapping, NamedTuple, Optional
+
+import anyio
+from starlette.responses import FileResponse, Response
+
+from caching import TTLCache
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Per-upload names are unique too, but may be deleted; revalidate daily
+REVALIDATE_CACHE_CONTROL = "public, max-age=86400"
+
+
+class ByteRange(NamedTuple):
+    start: int
+    end: int  # inclusive
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested range starts past the end of the file"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[ByteRange]:
+    """The single byte range requested, or None to send the whole file
+
+    Malformed headers, other units and multi-range requests are ignored.
+    Raises RangeNotSatisfiable when no byte of the range exists.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = (part.strip() for part in spec.partition("-"))
+    if not dash or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return ByteRange(max(0, size - length), size - 1)
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return ByteRange(start, end)
+
+
+def quote_etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of If-None-Match against a quoted ETag, as RFC 9110 requires for it"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def _guess_media_type(path: Path) -> str:
+    return mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+
+def _stat_file(path: Path) -> Optional[os.stat_result]:
+    try:
+        result = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return result if stat.S_ISREG(result.st_mode) else None
+
+
+def _hash_file(path: Path, chunk_size: int) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class FileRangeResponse(Response):
+    """206 response streaming one byte range of a file"""
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        byte_range: ByteRange,
+        size: int,
+        headers: Mapping[str, str],
+        media_type: Optional[str] = None,
+    ):
+        self.path = path
+        self.byte_range = byte_range
+        self.status_code = 206
+        self.media_type = media_type or _guess_media_type(path)
+        self.background = None
+        self.init_headers({
+            **headers,
+            "Content-Range": f"bytes {byte_range.start}-{byte_range.end}/{size}",
+            "Content-Length": str(byte_range.length),
+        })
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.byte_range.start)
+            remaining = self.byte_range.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # The file shrank under us; close the body rather than hang the client
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class MediaServer:
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        accel_redirect_prefix: Optional[str] = None,
+        max_workers: int = 2,
+        hash_chunk_size: int = 1024 * 1024,
+        max_cached_hashes: int = 10000,
+    ):
+        self.root = root
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/") + "/" if accel_redirect_prefix else None
+        self.max_workers = max_workers
+        self.hash_chunk_size = hash_chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="media")
+        # (path, mtime_ns, size) -> sha256 of files whose name carries no hash
+        self.hashes = TTLCache(max_entries=max_cached_hashes, ttl_seconds=24 * 3600)
+        self.full = 0
+        self.partial = 0
+        self.not_modified = 0
+        self.unsatisfiable = 0
+        self.offloaded = 0
+        self.files_hashed = 0
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def content_hash(self, path: Path, stat_result: os.stat_result) -> str:
+        key = (str(path), stat_result.st_mtime_ns, stat_result.st_size)
+        digest = self.hashes.get(key)
+        if digest is None:
+            digest = await self.run(_hash_file, path, self.hash_chunk_size)
+            self.hashes.set(key, digest)
+            self.files_hashed += 1
+        return digest
+
+    def _accel_path(self, path: Path) -> Optional[str]:
+        if not self.accel_redirect_prefix or self.root is None:
+            return None
+        try:
+            relative = path.relative_to(self.root)
+        except ValueError:
+            return None
+        return self.accel_redirect_prefix + relative.as_posix()
+
+    async def respond(
+        self,
+        request,
+        path: Path,
+        etag: Optional[str] = None,
+        cache_control: str = REVALIDATE_CACHE_CONTROL,
+        media_type: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Optional[Response]:
+        """The response for `path` (None if there is no such file)
+
+        `etag` is the content hash when the caller knows it from the name;
+        otherwise the file is hashed (once per version).
+        """
+        stat_result = await self.run(_stat_file, path)
+        if stat_result is None:
+            return None
+        quoted = quote_etag(etag or await self.content_hash(path, stat_result))
+        headers = {
+            **(headers or {}),
+            "ETag": quoted,
+            "Cache-Control": cache_control,
+            "Accept-Ranges": "bytes",
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        }
+
+        if etag_matches(request.headers.get("if-none-match"), quoted):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        accel_path = self._accel_path(path)
+        if accel_path:
+            self.offloaded += 1
+            return Response(headers={**headers, "X-Accel-Redirect": accel_path},
+                            media_type=media_type or _guess_media_type(path))
+
+        # A range is only valid for the version the client already holds part of
+        if_range = request.headers.get("if-range")
+        range_header = request.headers.get("range") if not if_range or if_range == quoted else None
+        try:
+            byte_range = parse_range(range_header, stat_result.st_size)
+        except RangeNotSatisfiable:
+            self.unsatisfiable += 1
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat_result.st_size}"})
+        if byte_range is not None:
+            self.partial += 1
+            return FileRangeResponse(path, byte_range, stat_result.st_size, headers, media_type)
+
+        self.full += 1
+        return FileResponse(path, headers=headers, media_type=media_type, stat_result=stat_result)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "offload": bool(self.accel_redirect_prefix),
+            "full": self.full,
+            "partial": self.partial,
+            "not_modified": self.not_modified,
+            "unsatisfiable": self.unsatisfiable,
+            "offloaded": self.offloaded,
+            "files_hashed": self.files_hashed,
+            "hash_cache": self.hashes.stats(),
+        }
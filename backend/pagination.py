@@ -0,0 +1,124 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A page is sorted on one or more keys that always end with the unique `id`,
+and the cursor is the sort values of the last document on the page. The
+next page is fetched with a range filter on those values instead of
+skip(), so it costs the same at any depth and does not shift when documents
+are inserted before the cursor position.
+
+Cursors are opaque to clients: the sort values are serialized with
+bson.json_util (datetimes survive the round trip) and base64url encoded.
+Missing sort values are handled the way MongoDB orders them, i.e. null
+sorts before every other value.
+"""
+
+import base64
+import binascii
+from typing import List, Optional, Sequence, Tuple
+
+from bson import json_util
+
+Sort = Sequence[Tuple[str, int]]
+
+# List endpoints return the cursor for the next page in this header (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """The cursor is not one this API issued (or was issued for another sort)"""
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json_util.dumps(list(values)).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: Optional[Sort] = None) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json_util.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor("Malformed pagination cursor")
+    if not isinstance(values, list) or (sort is not None and len(values) != len(sort)):
+        raise InvalidCursor("Pagination cursor does not match the requested sort")
+    return values
+
+
+def _field_value(doc: dict, field: str):
+    value = doc
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def cursor_for(doc: dict, sort: Sort) -> str:
+    """Cursor pointing just past `doc` in `sort` order"""
+    return encode_cursor([_field_value(doc, field) for field, _ in sort])
+
+
+def _after(field: str, direction: int, value) -> Optional[dict]:
+    """Filter for values strictly after `value` in one sort direction (None: nothing is)"""
+    if direction < 0:
+        if value is None:
+            return None
+        return {"$or": [{field: {"$lt": value}}, {field: None}]}
+    if value is None:
+        return {field: {"$ne": None}}
+    return {field: {"$gt": value}}
+
+
+def keyset_filter(sort: Sort, values: Sequence) -> dict:
+    """
+    Match documents after the cursor `values` in `sort` order.
+
+    For sort keys k1..kn this is the usual expansion
+    (k1 after v1) or (k1 = v1 and k2 after v2) or ... ; the last key should
+    be unique (`id`) so no two documents share a position.
+    """
+    branches: List[dict] = []
+    equal: List[dict] = []
+    for (field, direction), value in zip(sort, values):
+        after = _after(field, direction, value)
+        if after is not None:
+            branches.append({"$and": equal + [after]} if equal else after)
+        equal.append({field: value})
+    if not branches:
+        return {"_id": {"$exists": False}}  # cursor was the last possible position
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def page_query(query: dict, sort: Sort, cursor: Optional[str]) -> dict:
+    """`query` restricted to documents after `cursor` (raises InvalidCursor)"""
+    if not cursor:
+        return query
+    after = keyset_filter(sort, decode_cursor(cursor, sort))
+    return {"$and": [query, after]} if query else after
+
+
+def split_page(docs: List[dict], limit: int, sort: Sort) -> Tuple[List[dict], Optional[str]]:
+    """Trim a `limit + 1` fetch to the page and the cursor for the next one"""
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    return page, cursor_for(page[-1], sort)
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    sort: Sort,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    projection: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of `collection.find(query)` in `sort` order and the cursor for the next one"""
+    limit = max(limit, 1)
+    find = collection.find(page_query(query, sort, cursor), projection).sort(list(sort))
+    if skip:
+        find = find.skip(skip)
+    docs = await find.limit(limit + 1).to_list(length=limit + 1)
+    return split_page(docs, limit, sort)
@@ -0,0 +1,109 @@
+"""
+bcrypt hashing off the event loop.
+
+bcrypt is deliberately slow (~250 ms at cost 12), so hashing and checking
+run on a small dedicated thread pool (bcrypt releases the GIL while it
+works). A semaphore caps concurrent jobs at the pool size; callers beyond
+that wait, and past `max_queue` waiting callers are rejected with
+PasswordHasherBusy instead of piling up. Queue depth and timings are kept
+for the metrics endpoint.
+"""
+
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+_COST_PATTERN = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password operations are already queued"""
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = 12, max_workers: Optional[int] = None, max_queue: int = 256):
+        self.rounds = rounds
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.running = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    def hash_sync(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds)).decode('utf-8')
+
+    @staticmethod
+    def verify_sync(password: str, hashed_password: str) -> bool:
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+        except ValueError:
+            # Malformed stored hash
+            return False
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True when the stored hash uses a different cost factor than configured"""
+        match = _COST_PATTERN.match(hashed_password or "")
+        return match is None or int(match.group(1)) != self.rounds
+
+    async def _submit(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started = time.perf_counter()
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+            finished = time.perf_counter()
+            self.completed += 1
+            self.total_wait_ms += (started - queued_at) * 1000
+            self.total_run_ms += (finished - started) * 1000
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.hash_sync, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(self.verify_sync, password, hashed_password)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "workers": self.max_workers,
+            "running": self.running,
+            "queued": self.waiting,
+            "max_queued": self.max_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "avg_wait_ms": round(self.total_wait_ms / self.completed, 2) if self.completed else None,
+            "avg_run_ms": round(self.total_run_ms / self.completed, 2) if self.completed else None,
+        }
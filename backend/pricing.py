@@ -0,0 +1,59 @@
+"""
+Batch display-price conversion for room and service listings.
+
+Items are grouped by base currency so each group uses one exchange rate,
+and amounts are rounded in integer cents (half up) instead of building a
+Decimal and a pydantic model per item. The result is a plain dict that
+matches the PricingInfo model and serializes as-is.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+
+def to_cents(amount: float) -> int:
+    """Round a float amount to integer cents, half up"""
+    scaled = amount * 100
+    # Nudge by a relative epsilon so 2.675 -> 268 like Decimal(str(2.675)) does
+    if scaled >= 0:
+        return int(math.floor(scaled + 0.5 + abs(scaled) * 1e-12))
+    return -int(math.floor(-scaled + 0.5 + abs(scaled) * 1e-12))
+
+
+def price_listings(
+    items: Iterable[dict],
+    price_field: str,
+    display_currency: str,
+    rates: Dict[str, float],
+    hourly_field: Optional[str] = None,
+    default_currency: str = "EUR",
+) -> List[dict]:
+    """
+    Attach a pricing_info dict to every item priced in another currency.
+
+    `rates` maps base currency -> rate into display_currency and is looked up
+    once per currency group, not once per item. Items already priced in the
+    display currency are left untouched, as before. Returns the items.
+    """
+    items = list(items)
+    groups: Dict[str, List[dict]] = {}
+    for item in items:
+        base_currency = item.get("currency", default_currency)
+        if base_currency != display_currency:
+            groups.setdefault(base_currency, []).append(item)
+
+    for base_currency, group in groups.items():
+        rate = rates.get(base_currency, 1.0)
+        for item in group:
+            base_price = item[price_field]
+            info = {
+                "base_price": base_price,
+                "base_currency": base_currency,
+                "display_price": to_cents(base_price * rate) / 100,
+                "display_currency": display_currency,
+                "exchange_rate": rate,
+            }
+            if hourly_field and item.get(hourly_field):
+                info["display_price_per_hour"] = to_cents(item[hourly_field] * rate) / 100
+            item["pricing_info"] = info
+    return items
@@ -0,0 +1,218 @@
+"""
+Running rating aggregates for hotels and rooms.
+
+Hotels and conference rooms carry `rating_sum` / `rating_count` next to the
+displayed `average_rating` / `total_reviews`. Creating or deleting a review
+is one pipeline update that adjusts the counters and re-derives the average
+from them, so readers never see a count without its average, concurrent
+writers always converge on the right value and no review is ever read back.
+Documents from before the counters existed start from their displayed
+average and review count; `reconcile` later replaces that with exact sums.
+
+Both review shapes in the API are supported: booking reviews score the
+hotel with `overall_rating` and the room with `room_rating`, hotel reviews
+only carry `rating`.
+
+`reconcile` recomputes the counters from the reviews collection with a
+$group (no per-hotel cap) and repairs any document that drifted; the
+scheduler runs it every `interval_seconds`. `on_change(hotel_id, room_id)`
+is awaited after every change so copies of the averages (room search
+documents) can follow.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HOTEL_SCORE_FIELDS = ("overall_rating", "rating")
+ROOM_SCORE_FIELDS = ("room_rating",)
+
+
+def _score(review: dict, fields: Tuple[str, ...]) -> Optional[float]:
+    for field in fields:
+        if review.get(field) is not None:
+            return review[field]
+    return None
+
+
+def hotel_score(review: dict) -> Optional[float]:
+    return _score(review, HOTEL_SCORE_FIELDS)
+
+
+def room_score(review: dict) -> Optional[float]:
+    return _score(review, ROOM_SCORE_FIELDS)
+
+
+def _score_expression(fields: Tuple[str, ...]):
+    """Aggregation equivalent of `_score` (first non-null field)"""
+    expression = None
+    for field in reversed(fields):
+        expression = f"${field}" if expression is None else {"$ifNull": [f"${field}", expression]}
+    return expression
+
+
+HOTEL_SCORE_EXPRESSION = _score_expression(HOTEL_SCORE_FIELDS)
+
+# Derives the displayed fields from the counters inside the same document
+AVERAGE_STAGE = {"$set": {
+    "average_rating": {"$cond": [
+        {"$gt": ["$rating_count", 0]},
+        {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 1]},
+        0.0
+    ]},
+    "total_reviews": "$rating_count",
+}}
+
+
+def adjust_pipeline(score: float, count: int) -> list:
+    """Update pipeline adding `score`/`count` to the counters, then re-deriving the average"""
+    legacy_sum = {"$multiply": [{"$ifNull": ["$average_rating", 0]}, {"$ifNull": ["$total_reviews", 0]}]}
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", legacy_sum]}, score]},
+            "rating_count": {"$add": [{"$ifNull": ["$rating_count", {"$ifNull": ["$total_reviews", 0]}]}, count]},
+        }},
+        AVERAGE_STAGE,
+    ]
+
+
+def average(rating_sum: float, rating_count: int) -> float:
+    return round(rating_sum / rating_count, 1) if rating_count else 0.0
+
+
+class RatingAggregates:
+    def __init__(
+        self,
+        db,
+        interval_seconds: float = 3600.0,
+        on_change: Optional[Callable[[Optional[str], Optional[str]], Awaitable[None]]] = None,
+    ):
+        self.db = db
+        self.interval = interval_seconds
+        self.on_change = on_change
+        self._task: Optional[asyncio.Task] = None
+        self.updates = 0
+        self.failures = 0
+        self.reconciliations = 0
+        self.hotels_repaired = 0
+        self.rooms_repaired = 0
+        self.last_reconcile_at: Optional[datetime] = None
+        self.last_reconcile_ms: Optional[float] = None
+
+    async def _adjust(self, collection, doc_id: str, score: Optional[float], sign: int) -> None:
+        if not doc_id or score is None:
+            return
+        await collection.update_one({"id": doc_id}, adjust_pipeline(sign * score, sign))
+
+    async def apply(self, review: dict, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one review; errors are logged, reconcile repairs them"""
+        try:
+            await self._adjust(self.db.hotels, review.get("hotel_id"), hotel_score(review), sign)
+            await self._adjust(self.db.conference_rooms, review.get("room_id"), room_score(review), sign)
+            self.updates += 1
+            if self.on_change is not None:
+                await self.on_change(review.get("hotel_id"), review.get("room_id"))
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Rating aggregate update failed: {e}")
+
+    async def review_added(self, review: dict) -> None:
+        await self.apply(review, 1)
+
+    async def review_removed(self, review: dict) -> None:
+        await self.apply(review, -1)
+
+    async def _expected(self, key: str, fields: Tuple[str, ...]) -> Dict[str, Tuple[float, int]]:
+        score = _score_expression(fields)
+        pipeline = [
+            {"$match": {key: {"$ne": None}}},
+            {"$project": {"_id": 0, "key": f"${key}", "score": score}},
+            {"$match": {"score": {"$ne": None}}},
+            {"$group": {"_id": "$key", "rating_sum": {"$sum": "$score"}, "rating_count": {"$sum": 1}}},
+        ]
+        return {
+            row["_id"]: (row["rating_sum"], row["rating_count"])
+            async for row in self.db.reviews.aggregate(pipeline)
+        }
+
+    async def _repair(self, collection, key: str, fields: Tuple[str, ...]) -> int:
+        # Snapshot the counters before recounting so a review written in between
+        # makes the conditional update below miss instead of being overwritten
+        projection = {"_id": 0, "id": 1, "rating_sum": 1, "rating_count": 1, "average_rating": 1}
+        docs = await collection.find({}, projection).to_list(length=None)
+        expected = await self._expected(key, fields)
+        repaired = 0
+        for doc in docs:
+            rating_sum, rating_count = expected.get(doc["id"], (0, 0))
+            if (doc.get("rating_sum") == rating_sum and doc.get("rating_count") == rating_count
+                    and doc.get("average_rating") == average(rating_sum, rating_count)):
+                continue
+            # Only overwrite if no review write landed since we read the document
+            result = await collection.update_one(
+                {"id": doc["id"], "rating_sum": doc.get("rating_sum"), "rating_count": doc.get("rating_count")},
+                {"$set": {
+                    "rating_sum": rating_sum,
+                    "rating_count": rating_count,
+                    "average_rating": average(rating_sum, rating_count),
+                    "total_reviews": rating_count,
+                }}
+            )
+            if result.modified_count:
+                repaired += 1
+                if self.on_change is not None:
+                    await self.on_change(*((doc["id"], None) if key == "hotel_id" else (None, doc["id"])))
+                logger.warning(
+                    f"Rating drift on {doc['id']}: stored {doc.get('rating_sum')}/{doc.get('rating_count')}, "
+                    f"expected {rating_sum}/{rating_count}"
+                )
+        return repaired
+
+    async def reconcile(self) -> dict:
+        """Recompute counters from reviews and fix drifted hotels/rooms; returns repair counts"""
+        started = time.perf_counter()
+        hotels = await self._repair(self.db.hotels, "hotel_id", HOTEL_SCORE_FIELDS)
+        rooms = await self._repair(self.db.conference_rooms, "room_id", ROOM_SCORE_FIELDS)
+        self.reconciliations += 1
+        self.hotels_repaired += hotels
+        self.rooms_repaired += rooms
+        self.last_reconcile_at = datetime.utcnow()
+        self.last_reconcile_ms = round((time.perf_counter() - started) * 1000, 1)
+        return {"hotels_repaired": hotels, "rooms_repaired": rooms}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Rating reconciliation failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "updates": self.updates,
+            "failures": self.failures,
+            "reconciliations": self.reconciliations,
+            "hotels_repaired": self.hotels_repaired,
+            "rooms_repaired": self.rooms_repaired,
+            "last_reconcile_at": self.last_reconcile_at,
+            "last_reconcile_ms": self.last_reconcile_ms,
+        }
@@ -0,0 +1,188 @@
+"""
+Booking reminder scheduler.
+
+Every `interval_seconds` the scheduler looks for confirmed bookings that
+start within the next `lead_hours` and have not been reminded yet (a range
+query served by the status/start_date/reminder_sent_at index). Candidates
+are claimed with one update_many that stamps `reminder_sent_at` and a
+per-scan claim token, so concurrent workers never remind the same booking
+twice. The claimed bookings are rendered in one batch and enqueued through
+EmailService; if that fails the claim is released, so the next scan tries
+the same bookings again instead of leaving them marked as reminded.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BookingReminderScheduler:
+    def __init__(
+        self,
+        db,
+        email_service,
+        lead_hours: float = 24.0,
+        interval_seconds: float = 900.0,
+        batch_size: int = 200,
+    ):
+        self.db = db
+        self.email_service = email_service
+        self.lead = timedelta(hours=lead_hours)
+        self.interval = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.scans = 0
+        self.scan_failures = 0
+        self.reminders_sent = 0
+        self.last_scan_at: Optional[datetime] = None
+        self.last_scan_ms: Optional[float] = None
+        self.max_scan_ms = 0.0
+        self.total_scan_ms = 0.0
+
+    def due_query(self, now: datetime) -> dict:
+        return {
+            "status": "confirmed",
+            "start_date": {"$gte": now, "$lte": now + self.lead},
+            "reminder_sent_at": None,
+        }
+
+    async def claim_due_bookings(self, now: datetime) -> List[dict]:
+        candidates = await self.db.bookings.find(
+            self.due_query(now), {"_id": 0, "id": 1}
+        ).sort("start_date", 1).limit(self.batch_size).to_list(self.batch_size)
+        if not candidates:
+            return []
+
+        claim = str(uuid.uuid4())
+        # Only documents still unclaimed are updated, so each booking goes to exactly one scan
+        await self.db.bookings.update_many(
+            {"id": {"$in": [b["id"] for b in candidates]}, "reminder_sent_at": None},
+            {"$set": {"reminder_sent_at": now, "reminder_claim": claim}}
+        )
+        return await self.db.bookings.find({"reminder_claim": claim}, {"_id": 0}).to_list(self.batch_size)
+
+    async def release_claim(self, claim: str) -> None:
+        """Put a scan's claimed bookings back in the due set"""
+        await self.db.bookings.update_many(
+            {"reminder_claim": claim},
+            {"$set": {"reminder_sent_at": None}, "$unset": {"reminder_claim": ""}}
+        )
+
+    async def build_reminders(self, bookings: List[dict]) -> List[dict]:
+        room_ids = list({b["room_id"] for b in bookings})
+        customer_ids = list({b["customer_id"] for b in bookings})
+        rooms = {
+            r["id"]: r for r in await self.db.conference_rooms.find(
+                {"id": {"$in": room_ids}}, {"_id": 0, "id": 1, "name": 1, "hotel_id": 1}
+            ).to_list(len(room_ids))
+        }
+        hotel_ids = list({r["hotel_id"] for r in rooms.values()})
+        hotels = {
+            h["id"]: h for h in await self.db.hotels.find(
+                {"id": {"$in": hotel_ids}}, {"_id": 0, "id": 1, "name": 1, "address": 1}
+            ).to_list(len(hotel_ids))
+        }
+        customers = {
+            u["id"]: u for u in await self.db.users.find(
+                {"id": {"$in": customer_ids}}, {"_id": 0, "id": 1, "email": 1, "full_name": 1}
+            ).to_list(len(customer_ids))
+        }
+
+        reminders = []
+        for booking in bookings:
+            room = rooms.get(booking["room_id"], {})
+            hotel = hotels.get(room.get("hotel_id"), {})
+            customer = customers.get(booking["customer_id"], {})
+            email = customer.get("email") or booking.get("contact_email")
+            if not email:
+                continue
+            start = booking["start_date"]
+            reminders.append({
+                "user_email": email,
+                "user_name": customer.get("full_name") or booking.get("contact_person", ""),
+                "booking": {
+                    "booking_id": booking["id"],
+                    "hotel_name": hotel.get("name", "N/A"),
+                    "room_name": room.get("name", "N/A"),
+                    "date": start.strftime('%d.%m.%Y'),
+                    "time": start.strftime('%H:%M') if booking.get("booking_type") == "hourly" else "Gün boyu",
+                    "address": hotel.get("address", "Adres bilgisi mevcut değil"),
+                },
+            })
+        return reminders
+
+    async def scan_once(self, now: Optional[datetime] = None) -> int:
+        """Claim and enqueue reminders for bookings starting within the lead window"""
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        sent = 0
+        try:
+            while True:
+                bookings = await self.claim_due_bookings(now)
+                if not bookings:
+                    break
+                try:
+                    reminders = await self.build_reminders(bookings)
+                    if reminders:
+                        self.email_service.send_booking_reminders(reminders)
+                except Exception:
+                    await self.release_claim(bookings[0]["reminder_claim"])
+                    raise
+                sent += len(reminders)
+                if len(bookings) < self.batch_size:
+                    break
+        except Exception:
+            self.scan_failures += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.scans += 1
+            self.reminders_sent += sent
+            self.last_scan_at = now
+            self.last_scan_ms = round(elapsed_ms, 2)
+            self.total_scan_ms += elapsed_ms
+            self.max_scan_ms = max(self.max_scan_ms, elapsed_ms)
+        if sent:
+            logger.info(f"Queued {sent} booking reminders in {self.last_scan_ms} ms")
+        return sent
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.scan_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Booking reminder scan failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "scans": self.scans,
+            "scan_failures": self.scan_failures,
+            "reminders_sent": self.reminders_sent,
+            "last_scan_at": self.last_scan_at,
+            "last_scan_ms": self.last_scan_ms,
+            "avg_scan_ms": round(self.total_scan_ms / self.scans, 2) if self.scans else None,
+            "max_scan_ms": round(self.max_scan_ms, 2),
+            "lead_hours": self.lead.total_seconds() / 3600,
+            "interval_seconds": self.interval,
+        }
@@ -0,0 +1,134 @@
+"""
+Hotel review listing (GET /reviews/hotel/{hotel_id}).
+
+A page is fetched with an indexed find on the hotel's reviews, keyset
+paginated on (sort key, id) with the helpers in pagination.py (the classic
+skip is still applied on top for old clients); every sort has a matching
+(hotel_id, key, id) index, so the filter, sort and limit are all served
+from it. The total count and the 1-5 rating histogram do not depend on the
+page and come from one $facet aggregation per hotel (previously seven round
+trips), cached on their own so paging through a hotel runs it once.
+
+Responses are cached per hotel. Every review write for a hotel gives it a
+new generation (from a counter that never repeats), which is part of the
+cache keys, so all of its cached pages and its summary become unreachable
+at once and simply age out of the LRU. A response is only stored if its
+hotel's generation did not change while it was fetched, so every entry of
+an old generation expires within one TTL of the write; the generations are
+kept in a TTLCache with the same TTL and age out with them.
+"""
+
+from typing import List, Optional, Tuple
+
+from caching import TTLCache
+from pagination import fetch_page, page_query
+from ratings import HOTEL_SCORE_EXPRESSION
+
+SORT_FIELDS = ("created_at", "rating", "helpful_count")
+
+
+def review_sort(sort_by: str) -> List[Tuple[str, int]]:
+    field = sort_by if sort_by in SORT_FIELDS else "created_at"
+    return [(field, -1), ("id", -1)]
+
+
+def review_summary_pipeline(hotel_id: str) -> List[dict]:
+    """Total and rating histogram of a hotel's reviews"""
+    return [
+        {"$match": {"hotel_id": hotel_id}},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "distribution": [{"$group": {"_id": HOTEL_SCORE_EXPRESSION, "count": {"$sum": 1}}}],
+        }},
+    ]
+
+
+def shape_review_summary(result: List[dict]) -> dict:
+    facets = result[0] if result else {}
+    total = facets.get("total") or [{}]
+    distribution = {str(rating): 0 for rating in range(1, 6)}
+    for row in facets.get("distribution", []):
+        if row["_id"] is not None and str(row["_id"]) in distribution:
+            distribution[str(row["_id"])] = row["count"]
+    return {"total_count": total[0].get("count", 0), "rating_distribution": distribution}
+
+
+def shape_review_page(reviews: List[dict], next_cursor: Optional[str], summary: dict, hotel: dict) -> dict:
+    return {
+        "reviews": reviews,
+        **summary,
+        "average_rating": hotel.get("average_rating", 0),
+        "total_reviews": hotel.get("total_reviews", 0),
+        "next_cursor": next_cursor,
+    }
+
+
+class HotelReviewListing:
+    def __init__(self, db, ttl_seconds: float = 60.0, max_entries: int = 5000):
+        self.db = db
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.summaries = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.enabled = ttl_seconds > 0
+        # hotel_id -> generation of its cached entries; absent means 0
+        self._generations = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._invalidations = 0
+
+    def generation(self, hotel_id: str) -> int:
+        return self._generations.get(hotel_id, 0, count=False)
+
+    def invalidate(self, hotel_id: str) -> None:
+        self._invalidations += 1
+        self._generations.set(hotel_id, self._invalidations)
+
+    async def summary(self, hotel_id: str) -> dict:
+        generation = self.generation(hotel_id)
+        key = (hotel_id, generation)
+        if self.enabled:
+            cached = self.summaries.get(key)
+            if cached is not None:
+                return cached
+        result = await self.db.reviews.aggregate(review_summary_pipeline(hotel_id)).to_list(length=1)
+        summary = shape_review_summary(result)
+        if self.enabled and self.generation(hotel_id) == generation:
+            self.summaries.set(key, summary)
+        return summary
+
+    async def get(
+        self,
+        hotel_id: str,
+        sort_by: str = "created_at",
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Optional[dict]:
+        """The listing response, or None if the hotel does not exist
+
+        Raises pagination.InvalidCursor for a bad cursor.
+        """
+        sort = review_sort(sort_by)
+        generation = self.generation(hotel_id)
+        key = (hotel_id, generation, sort[0][0], skip, limit, cursor)
+        if self.enabled:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        query = page_query({"hotel_id": hotel_id}, sort, cursor)
+        hotel = await self.db.hotels.find_one(
+            {"id": hotel_id}, {"_id": 0, "average_rating": 1, "total_reviews": 1}
+        )
+        if hotel is None:
+            return None
+        reviews, next_cursor = await fetch_page(self.db.reviews, query, sort, limit, skip=skip, projection={"_id": 0})
+        response = shape_review_page(reviews, next_cursor, await self.summary(hotel_id), hotel)
+        # A review written while fetching makes this response stale: do not cache it
+        if self.enabled and self.generation(hotel_id) == generation:
+            self.cache.set(key, response)
+        return response
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "summaries": self.summaries.stats(),
+            "hotels_invalidated": len(self._generations),
+        }
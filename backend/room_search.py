@@ -0,0 +1,346 @@
+"""
+Denormalized room search index (room_search collection).
+
+One document per searchable room, i.e. an available, approved room of an
+active, approved hotel:
+
+    {room_id, hotel_id, room_name, hotel_name, city, city_key, text,
+     features, room_type, capacity, price_per_day, price_per_hour, currency,
+     price_eur, rating, hotel_rating, star_rating, created_at, synced_at}
+
+`text` holds the Turkish-folded tokens of the room and hotel names,
+description, city and features and carries a MongoDB text index (language
+"none": the tokens are already folded, so no stemming or stop words).
+`price_eur` is the day price converted to EUR when the document is
+written, so rooms priced in different currencies can be filtered and
+sorted together.
+
+Documents are rewritten whenever a room or its hotel changes approval,
+content or rating; `rebuild` recreates the collection from scratch. Sync
+errors are logged and never fail the request that triggered them.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import DeleteOne, ReplaceOne
+
+from pagination import fetch_page, page_query
+from text_normalization import fold, prefix_match, search_text
+
+logger = logging.getLogger(__name__)
+
+CANONICAL_CURRENCY = "EUR"
+APPROVED = "approved"
+# Lower bounds of the capacity facet buckets (1-25, 26-50, ..., 501+)
+CAPACITY_BUCKETS = [1, 26, 51, 101, 251, 501]
+
+# sort_by -> sort keys; every sort ends with the unique room_id for keyset pages
+SORTS: Dict[str, List[Tuple[str, int]]] = {
+    "created_at": [("created_at", -1), ("room_id", -1)],
+    "rating": [("rating", -1), ("room_id", -1)],
+    "price_asc": [("price_eur", 1), ("room_id", 1)],
+    "price_desc": [("price_eur", -1), ("room_id", -1)],
+    "capacity": [("capacity", -1), ("room_id", -1)],
+}
+RELEVANCE = "relevance"
+
+
+def _value(field):
+    return getattr(field, "value", field)
+
+
+def is_searchable(room: dict, hotel: Optional[dict]) -> bool:
+    return bool(
+        hotel
+        and hotel.get("is_active", True)
+        and _value(hotel.get("approval_status")) == APPROVED
+        and room.get("is_available", True)
+        and _value(room.get("approval_status")) == APPROVED
+    )
+
+
+def build_document(room: dict, hotel: Optional[dict], to_eur: Callable[[str], float]) -> Optional[dict]:
+    """Search document for `room`, or None if it should not be searchable"""
+    if not is_searchable(room, hotel):
+        return None
+    currency = _value(room.get("currency")) or CANONICAL_CURRENCY
+    price = room.get("price_per_day") or 0
+    features = list(room.get("features") or [])
+    return {
+        "room_id": room["id"],
+        "hotel_id": hotel["id"],
+        "room_name": room.get("name"),
+        "hotel_name": hotel.get("name"),
+        "city": hotel.get("city"),
+        "city_key": fold(hotel.get("city")),
+        "text": search_text([
+            room.get("name"), hotel.get("name"), hotel.get("city"), room.get("description"),
+            room.get("room_type"), *features, *(room.get("layout_options") or []),
+        ]),
+        "features": features,
+        "room_type": room.get("room_type"),
+        "capacity": room.get("capacity"),
+        "price_per_day": price,
+        "price_per_hour": room.get("price_per_hour"),
+        "currency": currency,
+        "price_eur": round(price * to_eur(currency), 2),
+        "rating": room.get("average_rating", 0.0),
+        "hotel_rating": hotel.get("average_rating", 0.0),
+        "star_rating": hotel.get("star_rating"),
+        "created_at": room.get("created_at"),
+        "synced_at": datetime.utcnow(),
+    }
+
+
+def search_filter(
+    q: Optional[str] = None,
+    city: Optional[str] = None,
+    min_capacity: Optional[int] = None,
+    max_capacity: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    features: Optional[Sequence[str]] = None,
+    exclude_room_ids: Optional[Sequence[str]] = None,
+    price_field: str = "price_eur",
+) -> dict:
+    query: dict = {}
+    if q and fold(q):
+        query["$text"] = {"$search": fold(q)}
+    if prefix_match(city):
+        query["city_key"] = prefix_match(city)
+    if min_capacity or max_capacity:
+        query["capacity"] = {}
+        if min_capacity:
+            query["capacity"]["$gte"] = min_capacity
+        if max_capacity:
+            query["capacity"]["$lte"] = max_capacity
+    if min_price or max_price:
+        query[price_field] = {}
+        if min_price:
+            query[price_field]["$gte"] = min_price
+        if max_price:
+            query[price_field]["$lte"] = max_price
+    if features:
+        query["features"] = {"$all": list(features)}
+    if exclude_room_ids:
+        query["room_id"] = {"$nin": list(exclude_room_ids)}
+    return query
+
+
+def resolve_sort(sort_by: Optional[str], has_text: bool) -> Optional[List[Tuple[str, int]]]:
+    """Sort keys for `sort_by`; None means relevance (text score) order"""
+    if sort_by == RELEVANCE or (sort_by is None and has_text):
+        return None if has_text else SORTS["created_at"]
+    return SORTS.get(sort_by or "created_at", SORTS["created_at"])
+
+
+def relevance_sort() -> List[tuple]:
+    return [("score", {"$meta": "textScore"}), ("room_id", -1)]
+
+
+def result_projection(relevance: bool) -> dict:
+    projection = {"_id": 0, "text": 0, "synced_at": 0}
+    if relevance:
+        projection["score"] = {"$meta": "textScore"}
+    return projection
+
+
+def facets_pipeline(query: dict, facet_limit: int = 20) -> List[dict]:
+    """$match then one $facet for the total and the city, feature and capacity counts"""
+    return [
+        {"$match": query},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "cities": [
+                {"$group": {"_id": "$city_key", "city": {"$first": "$city"}, "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": facet_limit},
+            ],
+            "features": [
+                {"$unwind": "$features"},
+                {"$group": {"_id": "$features", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": facet_limit},
+            ],
+            "capacity": [
+                {"$bucket": {"groupBy": "$capacity", "boundaries": CAPACITY_BUCKETS + [10 ** 9],
+                             "default": "unknown", "output": {"count": {"$sum": 1}}}},
+            ],
+        }},
+    ]
+
+
+def _bucket_label(lower) -> str:
+    if lower == "unknown":
+        return lower
+    index = CAPACITY_BUCKETS.index(lower)
+    if index + 1 < len(CAPACITY_BUCKETS):
+        return f"{lower}-{CAPACITY_BUCKETS[index + 1] - 1}"
+    return f"{lower}+"
+
+
+def shape_search_result(results: List[dict], next_cursor: Optional[str], facets_result: List[dict]) -> dict:
+    facets = facets_result[0] if facets_result else {}
+    total = facets.get("total") or [{}]
+    return {
+        "results": results,
+        "total": total[0].get("count", 0),
+        "facets": {
+            "cities": [{"city": row["city"], "city_key": row["_id"], "count": row["count"]}
+                       for row in facets.get("cities", [])],
+            "features": [{"feature": row["_id"], "count": row["count"]} for row in facets.get("features", [])],
+            "capacity": [{"range": _bucket_label(row["_id"]), "count": row["count"]}
+                         for row in facets.get("capacity", [])],
+        },
+        "next_cursor": next_cursor,
+    }
+
+
+class RoomSearchIndex:
+    def __init__(self, db, rate_for: Callable[[str, str], float]):
+        self.db = db
+        self.collection = db.room_search
+        self._rate_for = rate_for
+        self.synced = 0
+        self.failures = 0
+        self.last_rebuild_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def to_eur(self, currency: str) -> float:
+        if currency == CANONICAL_CURRENCY:
+            return 1.0
+        return self._rate_for(currency, CANONICAL_CURRENCY)
+
+    async def _write(self, rooms: List[dict], hotel: Optional[dict]) -> None:
+        requests = []
+        for room in rooms:
+            doc = build_document(room, hotel, self.to_eur)
+            if doc is None:
+                requests.append(DeleteOne({"room_id": room["id"]}))
+            else:
+                requests.append(ReplaceOne({"room_id": room["id"]}, doc, upsert=True))
+        if requests:
+            await self.collection.bulk_write(requests, ordered=False)
+            self.synced += len(requests)
+
+    async def sync_room(self, room_id: str) -> None:
+        try:
+            room = await self.db.conference_rooms.find_one({"id": room_id}, {"_id": 0})
+            if room is None:
+                await self.collection.delete_one({"room_id": room_id})
+                return
+            hotel = await self.db.hotels.find_one({"id": room["hotel_id"]}, {"_id": 0})
+            await self._write([room], hotel)
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Room search sync failed for room {room_id}: {e}")
+
+    async def sync_hotel(self, hotel_id: str) -> None:
+        try:
+            hotel = await self.db.hotels.find_one({"id": hotel_id}, {"_id": 0})
+            rooms = await self.db.conference_rooms.find({"hotel_id": hotel_id}, {"_id": 0}).to_list(None)
+            await self._write(rooms, hotel)
+            # Rooms deleted together with (or moved away from) the hotel
+            await self.collection.delete_many({"hotel_id": hotel_id, "room_id": {"$nin": [r["id"] for r in rooms]}})
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Room search sync failed for hotel {hotel_id}: {e}")
+
+    async def refresh_ratings(self, hotel_id: Optional[str], room_id: Optional[str]) -> None:
+        """Copy changed hotel/room averages into the search documents"""
+        try:
+            if hotel_id:
+                hotel = await self.db.hotels.find_one({"id": hotel_id}, {"_id": 0, "average_rating": 1})
+                if hotel:
+                    await self.collection.update_many(
+                        {"hotel_id": hotel_id}, {"$set": {"hotel_rating": hotel.get("average_rating", 0.0)}}
+                    )
+            if room_id:
+                room = await self.db.conference_rooms.find_one({"id": room_id}, {"_id": 0, "average_rating": 1})
+                if room:
+                    await self.collection.update_one(
+                        {"room_id": room_id}, {"$set": {"rating": room.get("average_rating", 0.0)}}
+                    )
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Room search rating refresh failed: {e}")
+
+    async def rebuild(self, batch_size: int = 500) -> int:
+        """Rewrite every search document; returns the number of searchable rooms"""
+        started = datetime.utcnow()
+        hotels = {hotel["id"]: hotel async for hotel in self.db.hotels.find({}, {"_id": 0})}
+        requests, searchable = [], 0
+        async for room in self.db.conference_rooms.find({}, {"_id": 0}):
+            doc = build_document(room, hotels.get(room.get("hotel_id")), self.to_eur)
+            if doc is None:
+                continue
+            searchable += 1
+            requests.append(ReplaceOne({"room_id": room["id"]}, doc, upsert=True))
+            if len(requests) >= batch_size:
+                await self.collection.bulk_write(requests, ordered=False)
+                requests = []
+        if requests:
+            await self.collection.bulk_write(requests, ordered=False)
+        # Anything not rewritten above is no longer searchable
+        await self.collection.delete_many({"synced_at": {"$lt": started}})
+        self.last_rebuild_at = datetime.utcnow()
+        return searchable
+
+    async def _rebuild_logged(self) -> None:
+        try:
+            searchable = await self.rebuild()
+            logger.info(f"Room search index rebuilt: {searchable} searchable rooms")
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Room search rebuild failed: {e}")
+
+    def start_rebuild(self) -> None:
+        """Rebuild in a background task (no-op while one is running)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._rebuild_logged())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def search(
+        self,
+        query: dict,
+        sort_by: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> dict:
+        """A page of results, the total and facet counts (raises InvalidCursor)
+
+        The page is a find, so the filter and sort use the collection's
+        indexes; $facet cannot, and only computes the counts.
+        """
+        sort = resolve_sort(sort_by, "$text" in query)
+        limit = max(limit, 1)
+        if sort is None:
+            page = self._relevance_page(query, skip, limit)
+        else:
+            page = fetch_page(self.collection, page_query(query, sort, cursor), sort, limit, skip=skip,
+                              projection=result_projection(False))
+        facets = self.collection.aggregate(facets_pipeline(query)).to_list(1)
+        (results, next_cursor), facets_result = await asyncio.gather(page, facets)
+        return shape_search_result(results, next_cursor, facets_result)
+
+    async def _relevance_page(self, query: dict, skip: int, limit: int) -> Tuple[List[dict], None]:
+        # Relevance order has no stable keyset position; deeper pages use skip
+        find = self.collection.find(query, result_projection(True)).sort(relevance_sort())
+        if skip:
+            find = find.skip(skip)
+        return await find.limit(limit).to_list(limit), None
+
+    def stats(self) -> dict:
+        return {"synced": self.synced, "failures": self.failures, "last_rebuild_at": self.last_rebuild_at}
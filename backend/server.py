@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, Response, UploadFile, File
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -11,16 +11,37 @@ from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timedelta, timezone
 import jwt
-import bcrypt
 from enum import Enum
 from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
-import httpx
 import asyncio
-from decimal import Decimal, ROUND_HALF_UP
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email_service import email_service
+from email_outbox import EmailOutbox
+from reminders import BookingReminderScheduler
+from db_indexes import ensure_indexes
+from exchange_rates import ExchangeRateCache
+from pricing import price_listings
+from dashboard import booking_date_match, dashboard_stats_pipeline, shape_dashboard_stats
+from hotel_stats import HotelStatsRollup
+from booking_owners import booking_manager_id, find_room_with_manager, set_hotel_manager
+from ratings import RatingAggregates
+from review_listing import HotelReviewListing
+from room_search import SORTS as ROOM_SEARCH_SORTS, RoomSearchIndex, search_filter
+from hotel_keys import hotel_keys
+from text_normalization import prefix_match
+from pagination import NEXT_CURSOR_HEADER, InvalidCursor, fetch_page
+from blob_store import Blob, BlobStore, blob_hash, content_hash_of, file_extension, is_content_hash
+from video_transcoding import MEDIA_TYPES as VIDEO_STREAM_MEDIA_TYPES, VideoTranscoder, stream_urls
+from media_serving import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, MediaServer
+from image_variants import MEDIA_TYPES as IMAGE_MEDIA_TYPES, VARIANTS_DIRNAME, ImageManifests, ImageProcessor, choose_variant
+from uploads import UPLOAD_OFFSET_HEADER, UploadOffsetMismatch, UploadSessions, UploadSizeLimit, UploadTooLarge, UploadWriter, size_limit_detail
+from geoip import build_locator
+from auth_cache import PrincipalCache
+from passwords import PasswordHasher, PasswordHasherBusy
+from http_clients import http_clients
+from availability import AvailabilityIndex, InvalidDayRange, availability_summaries, day_range, expand_day_ranges, serialize_day_ranges, unavailable_room_ids
 
 # Configure logging first
 logging.basicConfig(
@@ -37,17 +58,65 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Per-hotel daily counters behind the dashboard (hotel_stats_daily)
+hotel_stats = HotelStatsRollup(db)
+# Running review sums/counts on hotels and rooms, periodically reconciled against reviews
+RATING_RECONCILE_INTERVAL_SECONDS = float(os.environ.get('RATING_RECONCILE_INTERVAL_SECONDS', 3600))
+rating_aggregates = RatingAggregates(db, interval_seconds=RATING_RECONCILE_INTERVAL_SECONDS)
+# Cached hotel review pages, dropped per hotel on every review write (TTL 0 disables)
+hotel_review_listing = HotelReviewListing(
+    db,
+    ttl_seconds=float(os.environ.get('REVIEW_CACHE_TTL_SECONDS', 60)),
+    max_entries=int(os.environ.get('REVIEW_CACHE_SIZE', 5000))
+)
+
+# Per-room booking interval cache used by availability checks
+availability_index = AvailabilityIndex(
+    db.bookings,
+    ttl_seconds=float(os.environ.get('AVAILABILITY_CACHE_TTL', 60))
+)
+
 # JWT Settings
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-super-secret-jwt-key-for-hotel-booking-platform-2025')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours (1440 minutes)
 
+# bcrypt runs on a bounded worker pool; changing BCRYPT_ROUNDS rehashes on next login
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', 12)),
+    max_workers=int(os.environ['PASSWORD_HASH_WORKERS']) if os.environ.get('PASSWORD_HASH_WORKERS') else None,
+    max_queue=int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', 256))
+)
+
+# Decoded tokens and user documents for authenticated requests (TTL 0 disables)
+principal_cache = PrincipalCache(
+    db.users,
+    SECRET_KEY,
+    [ALGORITHM],
+    ttl_seconds=float(os.environ.get('AUTH_CACHE_TTL_SECONDS', 30)),
+    max_entries=int(os.environ.get('AUTH_CACHE_SIZE', 10000))
+)
+
 # Stripe Settings
 STRIPE_API_KEY = os.environ.get('STRIPE_API_KEY')
 APP_URL = os.environ.get('APP_URL', 'http://localhost:3000')
 if not STRIPE_API_KEY:
     logger.warning("STRIPE_API_KEY not found in environment variables - Payment features will be limited")
 
+# Stripe clients are reused across requests, one per webhook URL
+_stripe_checkouts: Dict[str, StripeCheckout] = {}
+MAX_STRIPE_CLIENTS = 8
+
+def get_stripe_checkout(webhook_url: str) -> StripeCheckout:
+    stripe_checkout = _stripe_checkouts.get(webhook_url)
+    if stripe_checkout is None:
+        # webhook_url may follow the request host; keep the map small
+        if len(_stripe_checkouts) >= MAX_STRIPE_CLIENTS:
+            _stripe_checkouts.pop(next(iter(_stripe_checkouts)))
+        stripe_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url=webhook_url)
+        _stripe_checkouts[webhook_url] = stripe_checkout
+    return stripe_checkout
+
 # Email Settings
 SMTP_HOST = os.environ.get('SMTP_HOST')
 SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
@@ -69,6 +138,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, UPLOAD_OFFSET_HEADER],
 )
 
 # Create a router with the /api prefix
@@ -176,6 +246,8 @@ class HotelResponse(BaseModel):
     approval_status: ApprovalStatus = ApprovalStatus.PENDING
     average_rating: float = 0.0
     total_reviews: int = 0
+    image_variants: Dict[str, dict] = {}  # image stem -> resized/WebP variant manifest
+    video_streams: Dict[str, dict] = {}  # video sha256 -> HLS playlist/poster URLs and transcode status
 
 # Currency System Models
 class ExchangeRateResponse(BaseModel):
@@ -214,6 +286,8 @@ class ConferenceRoomResponse(ConferenceRoomCreate):
     average_rating: float = 0.0
     total_bookings: int = 0
     pricing_info: Optional[PricingInfo] = None  # Kullanıcı lokasyonuna göre hesaplanmış fiyat
+    image_variants: Dict[str, dict] = {}  # image stem -> resized/WebP variant manifest
+    video_streams: Dict[str, dict] = {}  # video sha256 -> HLS playlist/poster URLs and transcode status
 
 class ExchangeRateResponse(BaseModel):
     base_currency: str
@@ -291,6 +365,7 @@ class BookingResponse(BaseModel):
     total_price: float
     status: BookingStatus
     payment_status: PaymentStatus
+    hotel_id: Optional[str] = None
     special_requests: Optional[str] = None
     extra_services: List[BookingServiceItem] = []
     contact_person: str
@@ -318,6 +393,16 @@ class AvailabilityResponse(BaseModel):
     conflicting_bookings: List[str] = []
     suggested_dates: List[Dict[str, datetime]] = []
 
+class BatchAvailabilityCheck(BaseModel):
+    room_ids: List[str] = Field(..., min_length=1, max_length=200)
+    start_date: str  # YYYY-MM-DD format
+    end_date: str
+
+class RoomAvailabilitySummary(BaseModel):
+    is_available: bool
+    conflicting_bookings: int = 0
+    booked_ranges: List[Dict[str, str]] = []
+
 # Review & Rating Models
 class ReviewCreate(BaseModel):
     booking_id: str
@@ -423,11 +508,17 @@ class CreateCheckoutRequest(BaseModel):
     cancel_url: str
 
 # Utility Functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
 
-def verify_password(password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+async def verify_password(password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(password, hashed_password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -474,174 +565,37 @@ async def send_email(to_email: str, subject: str, html_content: str, text_conten
         logger.error(f"Failed to send email to {to_email}: {str(e)}")
         return False
 
-def generate_booking_confirmation_email(booking: dict, room: dict, hotel: dict, user: dict) -> tuple:
-    """Generate booking confirmation email HTML and text"""
-    
-    # Format dates
-    check_in = booking.get('check_in_date', 'N/A')
-    check_out = booking.get('check_out_date', 'N/A')
-    
-    # Calculate total
-    total_price = booking.get('total_price', 0)
-    currency = booking.get('currency', 'TRY')
-    currency_symbols = {'TRY': '₺', 'EUR': '€', 'USD': '$'}
-    symbol = currency_symbols.get(currency, currency)
-    
-    # HTML Email
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-            .content {{ background: #f9f9f9; padding: 30px; }}
-            .booking-details {{ background: white; padding: 20px; border-radius: 8px; margin: 20px 0; }}
-            .detail-row {{ display: flex; justify-content: space-between; padding: 10px 0; border-bottom: 1px solid #eee; }}
-            .detail-label {{ font-weight: bold; color: #667eea; }}
-            .total {{ background: #667eea; color: white; padding: 15px; border-radius: 8px; margin-top: 20px; text-align: center; font-size: 20px; font-weight: bold; }}
-            .footer {{ background: #333; color: white; padding: 20px; text-align: center; border-radius: 0 0 10px 10px; }}
-            .button {{ background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; display: inline-block; margin: 20px 0; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🎉 Rezervasyon Onayı</h1>
-                <p>Rezervasyonunuz başarıyla oluşturuldu!</p>
-            </div>
-            
-            <div class="content">
-                <p>Sayın <strong>{user.get('full_name', 'Müşteri')}</strong>,</p>
-                <p>MeetDelux üzerinden yaptığınız rezervasyon başarıyla oluşturulmuştur. Rezervasyon detaylarınız aşağıdadır:</p>
-                
-                <div class="booking-details">
-                    <h3 style="color: #667eea; margin-top: 0;">📋 Rezervasyon Bilgileri</h3>
-                    
-                    <div class="detail-row">
-                        <span class="detail-label">Rezervasyon No:</span>
-                        <span>{booking.get('id', 'N/A')[:8].upper()}</span>
-                    </div>
-                    
-                    <div class="detail-row">
-                        <span class="detail-label">🏨 Otel:</span>
-                        <span>{hotel.get('name', 'N/A')}</span>
-                    </div>
-                    
-                    <div class="detail-row">
-                        <span class="detail-label">🎓 Salon:</span>
-                        <span>{room.get('name', 'N/A')}</span>
-                    </div>
-                    
-                    <div class="detail-row">
-                        <span class="detail-label">📅 Giriş Tarihi:</span>
-                        <span>{check_in}</span>
-                    </div>
-                    
-                    <div class="detail-row">
-                        <span class="detail-label">📅 Çıkış Tarihi:</span>
-                        <span>{check_out}</span>
-                    </div>
-                    
-                    <div class="detail-row">
-                        <span class="detail-label">👥 Katılımcı:</span>
-                        <span>{booking.get('number_of_guests', 'N/A')} Kişi</span>
-                    </div>
-                    
-                    <div class="detail-row">
-                        <span class="detail-label">📍 Adres:</span>
-                        <span>{hotel.get('address', 'N/A')}, {hotel.get('city', 'N/A')}</span>
-                    </div>
-                    
-                    <div class="total">
-                        💰 Toplam Tutar: {symbol}{total_price:,.2f}
-                    </div>
-                </div>
-                
-                <p><strong>⚠️ Önemli Bilgiler:</strong></p>
-                <ul>
-                    <li>Lütfen rezervasyon numaranızı not alın</li>
-                    <li>Ödeme işleminizi tamamlamak için hesabınıza giriş yapın</li>
-                    <li>Sorularınız için: info@meetdelux.com</li>
-                    <li>Telefon: +90 535 243 96 96</li>
-                </ul>
-                
-                <center>
-                    <a href="{APP_URL}/bookings" class="button">Rezervasyonlarımı Görüntüle</a>
-                </center>
-            </div>
-            
-            <div class="footer">
-                <p><strong>MeetDelux</strong> - Türkiye'nin En Lüks Seminer Salonu Platformu</p>
-                <p style="font-size: 12px; margin-top: 10px;">
-                    Atakent Mah. Kutlutaş Sitesi A5 Blok Daire 1<br>
-                    Halkalı, Küçükçekmece, İstanbul<br>
-                    www.meetdelux.com
-                </p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    # Plain text version
-    text = f"""
-    REZERVASYON ONAYI - MeetDelux
-    
-    Sayın {user.get('full_name', 'Müşteri')},
-    
-    Rezervasyonunuz başarıyla oluşturulmuştur!
-    
-    REZERVASYON BİLGİLERİ:
-    - Rezervasyon No: {booking.get('id', 'N/A')[:8].upper()}
-    - Otel: {hotel.get('name', 'N/A')}
-    - Salon: {room.get('name', 'N/A')}
-    - Giriş: {check_in}
-    - Çıkış: {check_out}
-    - Katılımcı: {booking.get('number_of_guests', 'N/A')} Kişi
-    - Adres: {hotel.get('address', 'N/A')}, {hotel.get('city', 'N/A')}
-    
-    TOPLAM TUTAR: {symbol}{total_price:,.2f}
-    
-    Rezervasyonlarınızı görüntülemek için: {APP_URL}/bookings
-    
-    İletişim: info@meetdelux.com | +90 535 243 96 96
-    
-    MeetDelux - Türkiye'nin En Lüks Seminer Salonu Platformu
-    """
-    
-    return html, text
+# Outgoing mail is queued in MongoDB and sent by a background worker
+email_outbox = EmailOutbox(
+    db.email_outbox,
+    email_service.smtp_sender(),
+    email_service.build_outbox_message,
+    batch_size=int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 20)),
+    max_attempts=int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+)
+email_service.attach_outbox(email_outbox)
+
+# Reminders for confirmed bookings starting soon (safe to run in several workers)
+REMINDER_SCHEDULER_ENABLED = os.environ.get('REMINDER_SCHEDULER_ENABLED', 'True').lower() == 'true'
+booking_reminder_scheduler = BookingReminderScheduler(
+    db,
+    email_service,
+    lead_hours=float(os.environ.get('REMINDER_LEAD_HOURS', 24)),
+    interval_seconds=float(os.environ.get('REMINDER_INTERVAL_SECONDS', 900))
+)
 
 # Currency and Location Utility Functions
-# IP geolocation cache (in-memory)
-ip_country_cache = {}
+# IP geolocation: bounded per-network cache in front of local/remote resolvers
+geoip_locator = build_locator(
+    database_path=os.environ.get('GEOIP_DB_PATH'),
+    remote_lookup=os.environ.get('GEOIP_REMOTE_LOOKUP', 'True').lower() == 'true',
+    max_entries=int(os.environ.get('GEOIP_CACHE_SIZE', 50000)),
+    ttl_seconds=float(os.environ.get('GEOIP_CACHE_TTL_SECONDS', 24 * 3600))
+)
 
 async def get_client_country_from_ip(client_ip: str) -> str:
     """Get country code from client IP address (with caching)"""
-    try:
-        # Eğer localhost veya internal IP ise Türkiye varsay
-        if client_ip in ["127.0.0.1", "localhost", "::1"] or client_ip.startswith("10."):
-            return "TR"
-        
-        # Cache'de varsa direkt dön
-        if client_ip in ip_country_cache:
-            return ip_country_cache[client_ip]
-        
-        # IP geolocation servisini kullan (timeout ile)
-        async with httpx.AsyncClient(timeout=2.0) as client:
-            response = await client.get(f"http://ip-api.com/json/{client_ip}")
-            if response.status_code == 200:
-                data = response.json()
-                country_code = data.get("countryCode", "TR")
-                # Cache'e kaydet
-                ip_country_cache[client_ip] = country_code
-                return country_code
-    except Exception as e:
-        logger.error(f"IP geolocation error: {e}")
-    
-    return "TR"  # Default to Turkey
+    return await geoip_locator.country_for(client_ip)
 
 async def get_display_currency(country_code: str) -> CurrencyCode:
     """Get display currency based on country code"""
@@ -652,71 +606,62 @@ async def get_display_currency(country_code: str) -> CurrencyCode:
     else:
         return CurrencyCode.EUR
 
+# Exchange rates are served from memory and refreshed in the background
+exchange_rate_cache = ExchangeRateCache(
+    db.exchange_rates,
+    [currency.value for currency in CurrencyCode],
+    ttl_seconds=float(os.environ.get('EXCHANGE_RATE_TTL_SECONDS', 24 * 3600))
+)
+
+# Denormalized search documents for approved rooms (day prices converted to EUR with the cached rates)
+room_search = RoomSearchIndex(db, exchange_rate_cache.get_rate)
+rating_aggregates.on_change = room_search.refresh_ratings
+
 async def get_exchange_rate(base_currency: str, target_currency: str) -> float:
-    """Get exchange rate from exchangerate-api.com"""
-    try:
-        # Cache kontrolü - exchange rate'leri günlük cache'leyelim
-        cache_key = f"exchange_rate_{base_currency}_{target_currency}"
-        cached_rate = await db.exchange_rates.find_one({
-            "cache_key": cache_key,
-            "created_at": {"$gte": datetime.utcnow() - timedelta(hours=24)}
-        })
-        
-        if cached_rate:
-            return cached_rate["rate"]
-        
-        # API'den kur bilgisi al
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"https://api.exchangerate-api.com/v4/latest/{base_currency}")
-            if response.status_code == 200:
-                data = response.json()
-                rate = data["rates"].get(target_currency, 1.0)
-                
-                # Cache'e kaydet
-                await db.exchange_rates.insert_one({
-                    "cache_key": cache_key,
-                    "base_currency": base_currency,
-                    "target_currency": target_currency,
-                    "rate": rate,
-                    "created_at": datetime.utcnow()
-                })
-                
-                return rate
-    except Exception as e:
-        logger.error(f"Exchange rate fetch error: {e}")
+    """Get exchange rate from the in-memory rate table (never waits on the external API)"""
+    return exchange_rate_cache.get_rate(base_currency, target_currency)
+
+async def apply_display_pricing(items: List[dict], request: Request, price_field: str, hourly_field: Optional[str] = None) -> List[dict]:
+    """Convert listing prices to the visitor's currency in one pass (one rate per base currency)"""
+    client_ip = request.client.host
+    country_code = await get_client_country_from_ip(client_ip)
+    display_currency = (await get_display_currency(country_code)).value
     
-    return 1.0  # Fallback to 1:1 rate
+    base_currencies = {item.get("currency", "EUR") for item in items} - {display_currency}
+    rates = {base: await get_exchange_rate(base, display_currency) for base in base_currencies}
+    
+    return price_listings(items, price_field, display_currency, rates, hourly_field=hourly_field)
 
-def calculate_display_price(base_price: float, base_currency: str, target_currency: str, exchange_rate: float) -> PricingInfo:
-    """Calculate display price with currency conversion"""
-    if base_currency == target_currency:
-        display_price = base_price
-        rate = None
-    else:
-        display_price = base_price * exchange_rate
-        rate = exchange_rate
-    
-    # Round to 2 decimal places
-    display_price = float(Decimal(str(display_price)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-    
-    return PricingInfo(
-        base_price=base_price,
-        base_currency=CurrencyCode(base_currency),
-        display_price=display_price,
-        display_currency=CurrencyCode(target_currency),
-        exchange_rate=rate
-    )
+async def paginate(
+    response: Response,
+    collection,
+    query: dict,
+    sort: List[tuple],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    projection: Optional[dict] = None
+) -> List[dict]:
+    """Keyset page for list endpoints; `sort` must end with the unique id"""
+    try:
+        docs, next_cursor = await fetch_page(collection, query, sort, limit, cursor=cursor, skip=skip, projection=projection)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return docs
 
 async def get_optional_user(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer(auto_error=False))):
     """Get current user if authenticated, None if not"""
     if not credentials:
         return None
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = principal_cache.decode_token(credentials.credentials)
         email = payload.get("sub")
         if email:
-            user = await db.users.find_one({"email": email, "is_active": True})
-            return user
+            user = await principal_cache.get_user(email)
+            if user and user.get("is_active"):
+                return user
     except:
         pass
     return None
@@ -728,7 +673,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = principal_cache.decode_token(credentials.credentials)
         email: str = payload.get("sub")
         if email is None:
             logger.error("Email not found in JWT payload")
@@ -744,7 +689,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         logger.error(f"JWT decode error: {e}")
         raise credentials_exception
     
-    user = await db.users.find_one({"email": email})
+    user = await principal_cache.get_user(email)
     if user is None:
         logger.error(f"User not found: {email}")
         raise credentials_exception
@@ -766,7 +711,7 @@ async def register(user_data: UserCreate):
     
     # Create new user
     user_dict = user_data.dict()
-    user_dict["password"] = hash_password(user_data.password)
+    user_dict["password"] = await hash_password(user_data.password)
     user_dict["id"] = str(uuid.uuid4())
     user_dict["created_at"] = datetime.now(timezone.utc)
     user_dict["is_active"] = False  # Will be activated after email verification
@@ -838,19 +783,30 @@ async def verify_email(token: str):
             }
         }
     )
+    principal_cache.invalidate(user["email"])
     
     return {"message": "Email verified successfully"}
 
 @api_router.post("/auth/login", response_model=Token)
 async def login(user_credentials: UserLogin, request: Request):
     user = await db.users.find_one({"email": user_credentials.email})
-    if not user or not verify_password(user_credentials.password, user["password"]):
+    if not user or not await verify_password(user_credentials.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Upgrade the stored hash when BCRYPT_ROUNDS has changed
+    if password_hasher.needs_rehash(user["password"]):
+        try:
+            new_hash = await hash_password(user_credentials.password)
+            await db.users.update_one({"id": user["id"]}, {"$set": {"password": new_hash}})
+            principal_cache.invalidate(user["email"])
+            password_hasher.rehashed += 1
+        except Exception as e:
+            logger.error(f"Password rehash failed for {user['email']}: {e}")
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user["email"]}, expires_delta=access_token_expires
@@ -901,6 +857,9 @@ async def create_hotel(hotel_data: HotelCreate, current_user: dict = Depends(get
     hotel_dict["approval_status"] = "pending"  # Yönetici onayı bekliyor
     hotel_dict["average_rating"] = 0.0
     hotel_dict["total_reviews"] = 0
+    hotel_dict["rating_sum"] = 0
+    hotel_dict["rating_count"] = 0
+    hotel_dict.update(hotel_keys(hotel_dict))
     
     await db.hotels.insert_one(hotel_dict)
     
@@ -931,18 +890,24 @@ async def create_hotel(hotel_data: HotelCreate, current_user: dict = Depends(get
 @api_router.get("/hotels", response_model=List[HotelResponse])
 async def get_hotels(
     city: Optional[str] = None,
+    name: Optional[str] = None,
     star_rating: Optional[int] = None,
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    response: Response = None
 ):
     filter_query = {"is_active": True, "approval_status": ApprovalStatus.APPROVED}  # Sadece onaylanmış oteller
     
-    if city:
-        filter_query["city"] = {"$regex": city, "$options": "i"}
+    # Prefix match on the folded keys: "istanbul" finds "İstanbul" and uses the index
+    if prefix_match(city):
+        filter_query["city_key"] = prefix_match(city)
+    if prefix_match(name):
+        filter_query["name_key"] = prefix_match(name)
     if star_rating:
         filter_query["star_rating"] = star_rating
     
-    hotels = await db.hotels.find(filter_query).skip(skip).limit(limit).to_list(length=limit)
+    hotels = await paginate(response, db.hotels, filter_query, [("created_at", -1), ("id", -1)], limit, cursor=cursor, skip=skip)
     
     # Hide contact info from customers (prevent platform bypass)
     for hotel in hotels:
@@ -999,8 +964,14 @@ async def update_hotel(
     
     # Update hotel
     hotel_data["updated_at"] = datetime.now(timezone.utc)
+    hotel_data.update(hotel_keys(hotel_data))
     await db.hotels.update_one({"id": hotel_id}, {"$set": hotel_data})
     
+    # Bookings carry a copy of the manager for ownership checks
+    if hotel_data.get("manager_id") and hotel_data["manager_id"] != hotel.get("manager_id"):
+        await set_hotel_manager(db, hotel_id, hotel_data["manager_id"])
+    await room_search.sync_hotel(hotel_id)
+    
     # Send notification to admin
     try:
         update_details = {
@@ -1055,8 +1026,12 @@ async def delete_hotel(
     # Delete all reviews for this hotel
     await db.reviews.delete_many({"hotel_id": hotel_id})
     
+    # Delete the hotel's daily statistics rollups
+    await db.hotel_stats_daily.delete_many({"hotel_id": hotel_id})
+    
     # Delete the hotel
     result = await db.hotels.delete_one({"id": hotel_id})
+    await room_search.sync_hotel(hotel_id)
     
     if result.deleted_count == 0:
         raise HTTPException(
@@ -1099,6 +1074,8 @@ async def create_conference_room(
     room_dict["approval_status"] = ApprovalStatus.PENDING  # Yönetici onayı bekliyor
     room_dict["average_rating"] = 0.0
     room_dict["total_bookings"] = 0
+    room_dict["rating_sum"] = 0
+    room_dict["rating_count"] = 0
     
     await db.conference_rooms.insert_one(room_dict)
     
@@ -1118,31 +1095,15 @@ async def create_conference_room(
     return ConferenceRoomResponse(**room_dict)
 
 @api_router.get("/hotels/{hotel_id}/rooms", response_model=List[ConferenceRoomResponse])
-async def get_hotel_rooms(hotel_id: str, request: Request):
-    rooms = await db.conference_rooms.find({
+async def get_hotel_rooms(hotel_id: str, request: Request, response: Response, limit: int = 100, cursor: Optional[str] = None):
+    rooms = await paginate(response, db.conference_rooms, {
         "hotel_id": hotel_id,
         "is_available": True,
         "approval_status": ApprovalStatus.APPROVED  # Sadece onaylanmış odalar
-    }).to_list(length=100)
-    
-    # Kur bilgisi hesapla
-    client_ip = request.client.host
-    country_code = await get_client_country_from_ip(client_ip)
-    display_currency = await get_display_currency(country_code)
+    }, [("created_at", -1), ("id", -1)], limit, cursor=cursor)
     
-    # Her oda için fiyat hesapla
-    for room in rooms:
-        base_currency = room.get("currency", "EUR")
-        if base_currency != display_currency.value:
-            exchange_rate = await get_exchange_rate(base_currency, display_currency.value)
-            room["pricing_info"] = calculate_display_price(
-                room["price_per_day"], base_currency, display_currency.value, exchange_rate
-            ).dict()
-            
-            if room.get("price_per_hour"):
-                room["pricing_info"]["display_price_per_hour"] = float(
-                    Decimal(str(room["price_per_hour"] * exchange_rate)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                )
+    # Kur bilgisi hesapla - tüm odalar tek geçişte
+    await apply_display_pricing(rooms, request, "price_per_day", hourly_field="price_per_hour")
     
     return [ConferenceRoomResponse(**room) for room in rooms]
 
@@ -1156,72 +1117,91 @@ async def search_rooms(
     max_price: Optional[float] = None,
     features: Optional[str] = None,  # comma-separated features
     sort_by: Optional[str] = "created_at",  # price_asc, price_desc, capacity, rating
+    available_from: Optional[str] = None,  # YYYY-MM-DD, requires available_to
+    available_to: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    response: Response = None
 ):
-    # First get hotels matching city filter if provided
-    hotel_filter = {"is_active": True}
-    if city:
-        hotel_filter["city"] = {"$regex": city, "$options": "i"}
-    
-    hotels = await db.hotels.find(hotel_filter).to_list(length=1000)
-    hotel_ids = [hotel["id"] for hotel in hotels]
+    # Filters, sorting and paging run on the room search documents
+    try:
+        excluded_room_ids = await unavailable_room_ids(db.bookings, available_from, available_to)
+    except InvalidDayRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    search_query = search_filter(
+        city=city,
+        min_capacity=min_capacity,
+        max_capacity=max_capacity,
+        min_price=min_price,
+        max_price=max_price,
+        features=[f.strip() for f in features.split(",")] if features else None,
+        exclude_room_ids=excluded_room_ids,
+        price_field="price_per_day"
+    )
     
-    # Build room filter
-    room_filter = {
-        "is_available": True,
-        "hotel_id": {"$in": hotel_ids}
+    # Sorting
+    sort = ROOM_SEARCH_SORTS.get(sort_by, ROOM_SEARCH_SORTS["created_at"])
+    if sort_by in ("price_asc", "price_desc"):
+        sort = [("price_per_day", sort[0][1]), sort[1]]  # listed prices, as filtered
+    
+    entries = await paginate(response, room_search.collection, search_query, sort, limit, cursor=cursor, skip=skip,
+                             projection={"_id": 0, "room_id": 1, **{field: 1 for field, _ in sort}})
+    room_ids = [entry["room_id"] for entry in entries]
+    rooms_by_id = {
+        room["id"]: room
+        for room in await db.conference_rooms.find({"id": {"$in": room_ids}}).to_list(length=len(room_ids))
     }
+    rooms = [rooms_by_id[room_id] for room_id in room_ids if room_id in rooms_by_id]
     
-    if min_capacity:
-        room_filter["capacity"] = {"$gte": min_capacity}
-    if max_capacity:
-        room_filter["capacity"] = room_filter.get("capacity", {})
-        room_filter["capacity"]["$lte"] = max_capacity
-    if min_price:
-        room_filter["price_per_day"] = {"$gte": min_price}
-    if max_price:
-        room_filter["price_per_day"] = room_filter.get("price_per_day", {})
-        room_filter["price_per_day"]["$lte"] = max_price
-    if features:
-        feature_list = [f.strip() for f in features.split(",")]
-        room_filter["features"] = {"$all": feature_list}
-    
-    # Sorting
-    sort_field = "created_at"
-    sort_order = -1
-    if sort_by == "price_asc":
-        sort_field = "price_per_day"
-        sort_order = 1
-    elif sort_by == "price_desc":
-        sort_field = "price_per_day"
-        sort_order = -1
-    elif sort_by == "capacity":
-        sort_field = "capacity"
-        sort_order = -1
-    
-    rooms = await db.conference_rooms.find(room_filter).sort(sort_field, sort_order).skip(skip).limit(limit).to_list(length=limit)
+    # Kur bilgisi hesapla - tüm odalar tek geçişte
+    await apply_display_pricing(rooms, request, "price_per_day", hourly_field="price_per_hour")
     
-    # Kur bilgisi hesapla
-    client_ip = request.client.host
-    country_code = await get_client_country_from_ip(client_ip)
-    display_currency = await get_display_currency(country_code)
+    return [ConferenceRoomResponse(**room) for room in rooms]
+
+@api_router.get("/search/rooms")
+async def full_text_room_search(
+    q: Optional[str] = None,
+    city: Optional[str] = None,
+    min_capacity: Optional[int] = None,
+    max_capacity: Optional[int] = None,
+    min_price: Optional[float] = None,  # EUR
+    max_price: Optional[float] = None,  # EUR
+    features: Optional[str] = None,  # comma-separated features
+    sort_by: Optional[str] = None,  # relevance (default with q), created_at, rating, price_asc, price_desc, capacity
+    available_from: Optional[str] = None,  # YYYY-MM-DD, requires available_to
+    available_to: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    response: Response = None
+):
+    """Search rooms by text and filters; returns a page, the total and city/feature/capacity facet counts"""
+    try:
+        excluded_room_ids = await unavailable_room_ids(db.bookings, available_from, available_to)
+    except InvalidDayRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    search_query = search_filter(
+        q=q,
+        city=city,
+        min_capacity=min_capacity,
+        max_capacity=max_capacity,
+        min_price=min_price,
+        max_price=max_price,
+        features=[f.strip() for f in features.split(",")] if features else None,
+        exclude_room_ids=excluded_room_ids
+    )
     
-    # Her oda için fiyat hesapla
-    for room in rooms:
-        base_currency = room.get("currency", "EUR")
-        if base_currency != display_currency.value:
-            exchange_rate = await get_exchange_rate(base_currency, display_currency.value)
-            room["pricing_info"] = calculate_display_price(
-                room["price_per_day"], base_currency, display_currency.value, exchange_rate
-            ).dict()
-            
-            if room.get("price_per_hour"):
-                room["pricing_info"]["display_price_per_hour"] = float(
-                    Decimal(str(room["price_per_hour"] * exchange_rate)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                )
+    try:
+        result = await room_search.search(search_query, sort_by=sort_by, skip=skip, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return [ConferenceRoomResponse(**room) for room in rooms]
+    if result["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = result["next_cursor"]
+    return result
 
 @api_router.get("/rooms/{room_id}", response_model=ConferenceRoomResponse)
 async def get_room(room_id: str, request: Request):
@@ -1233,21 +1213,7 @@ async def get_room(room_id: str, request: Request):
         )
     
     # Kur bilgisi hesapla
-    client_ip = request.client.host
-    country_code = await get_client_country_from_ip(client_ip)
-    display_currency = await get_display_currency(country_code)
-    
-    base_currency = room.get("currency", "EUR")
-    if base_currency != display_currency.value:
-        exchange_rate = await get_exchange_rate(base_currency, display_currency.value)
-        room["pricing_info"] = calculate_display_price(
-            room["price_per_day"], base_currency, display_currency.value, exchange_rate
-        ).dict()
-        
-        if room.get("price_per_hour"):
-            room["pricing_info"]["display_price_per_hour"] = float(
-                Decimal(str(room["price_per_hour"] * exchange_rate)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            )
+    await apply_display_pricing([room], request, "price_per_day", hourly_field="price_per_hour")
     
     return ConferenceRoomResponse(**room)
 
@@ -1542,25 +1508,14 @@ async def create_default_services(
     }
 
 @api_router.get("/hotels/{hotel_id}/extra-services", response_model=List[ExtraServiceResponse])
-async def get_hotel_services(hotel_id: str, request: Request):
-    services = await db.extra_services.find({
+async def get_hotel_services(hotel_id: str, request: Request, response: Response, limit: int = 100, cursor: Optional[str] = None):
+    services = await paginate(response, db.extra_services, {
         "hotel_id": hotel_id,
         "is_available": True
-    }).to_list(length=100)
+    }, [("name", 1), ("id", 1)], limit, cursor=cursor)
     
-    # Kur bilgisi hesapla
-    client_ip = request.client.host
-    country_code = await get_client_country_from_ip(client_ip)
-    display_currency = await get_display_currency(country_code)
-    
-    # Her servis için fiyat hesapla
-    for service in services:
-        base_currency = service.get("currency", "EUR")
-        if base_currency != display_currency.value:
-            exchange_rate = await get_exchange_rate(base_currency, display_currency.value)
-            service["pricing_info"] = calculate_display_price(
-                service["price"], base_currency, display_currency.value, exchange_rate
-            ).dict()
+    # Kur bilgisi hesapla - tüm servisler tek geçişte
+    await apply_display_pricing(services, request, "price")
     
     return [ExtraServiceResponse(**service) for service in services]
 
@@ -1651,6 +1606,20 @@ async def delete_extra_service(
     return {"message": "Service deleted successfully"}
 
 # Booking Routes
+def parse_day_range(start_date: str, end_date: str) -> tuple:
+    """Parse YYYY-MM-DD bounds into a range covering the end date completely"""
+    try:
+        return day_range(start_date, end_date)
+    except InvalidDayRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.post("/rooms/availability:batch", response_model=Dict[str, RoomAvailabilitySummary])
+async def check_rooms_availability_batch(batch: BatchAvailabilityCheck):
+    """Availability for many rooms over one date range, answered by a single aggregation"""
+    start, end = parse_day_range(batch.start_date, batch.end_date)
+    summaries = await availability_summaries(db.bookings, batch.room_ids, start, end)
+    return {room_id: RoomAvailabilitySummary(**summary) for room_id, summary in summaries.items()}
+
 @api_router.get("/rooms/{room_id}/availability")
 async def get_room_availability(
     room_id: str,
@@ -1658,36 +1627,18 @@ async def get_room_availability(
     end_date: str
 ):
     """Get room availability and booked dates"""
-    try:
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-    
-    # Get all bookings for this room in the date range
-    bookings = await db.bookings.find({
-        "room_id": room_id,
-        "status": {"$in": [BookingStatus.PENDING, BookingStatus.CONFIRMED]},
-        "$or": [
-            {"start_date": {"$lte": end}, "end_date": {"$gte": start}}
-        ]
-    }).to_list(length=100)
-    
-    # Collect booked dates
-    booked_dates = []
-    for booking in bookings:
-        current = booking["start_date"]
-        while current <= booking["end_date"]:
-            booked_dates.append(current.strftime("%Y-%m-%d"))
-            current += timedelta(days=1)
+    start, end = parse_day_range(start_date, end_date)
     
-    # Check if requested dates are available
-    availability = await check_room_availability(room_id, start, end)
+    room_intervals = await availability_index.get(room_id)
+    conflicts = room_intervals.overlapping(start, end)
+    booked_ranges = room_intervals.booked_ranges(start, end)
     
     return {
-        "is_available": availability["is_available"],
-        "booked_dates": list(set(booked_dates)),
-        "conflicting_bookings": len(bookings)
+        "is_available": len(conflicts) == 0,
+        "booked_ranges": serialize_day_ranges(booked_ranges),
+        "free_ranges": serialize_day_ranges(room_intervals.free_ranges(start, end)),
+        "booked_dates": expand_day_ranges(booked_ranges),
+        "conflicting_bookings": len(conflicts)
     }
 
 @api_router.post("/bookings", response_model=BookingResponse)
@@ -1699,8 +1650,10 @@ async def create_booking(booking_data: BookingCreate, current_user: dict = Depen
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conference room not found or not available"
         )
+    hotel = await db.hotels.find_one({"id": room["hotel_id"]})
     
-    # Check availability
+    # Check availability against freshly loaded bookings
+    availability_index.invalidate(booking_data.room_id)
     availability = await check_room_availability(booking_data.room_id, booking_data.start_date, booking_data.end_date)
     if not availability["is_available"]:
         raise HTTPException(
@@ -1734,6 +1687,9 @@ async def create_booking(booking_data: BookingCreate, current_user: dict = Depen
     booking_dict.update({
         "id": str(uuid.uuid4()),
         "customer_id": current_user["id"],
+        # Denormalized for single-query manager listings and ownership checks
+        "hotel_id": room["hotel_id"],
+        "manager_id": hotel.get("manager_id") if hotel else None,
         "total_days": total_days,
         "total_hours": total_hours,
         "room_price": room_price,
@@ -1748,12 +1704,11 @@ async def create_booking(booking_data: BookingCreate, current_user: dict = Depen
     })
     
     await db.bookings.insert_one(booking_dict)
+    availability_index.invalidate(booking_data.room_id)
+    await hotel_stats.apply(None, booking_dict, hotel_id=room["hotel_id"])
     
     # Send confirmation emails
     try:
-        # Get hotel details
-        hotel = await db.hotels.find_one({"id": room["hotel_id"]})
-        
         if hotel:
             # Prepare booking details for email
             booking_email_details = {
@@ -1810,23 +1765,23 @@ async def create_booking(booking_data: BookingCreate, current_user: dict = Depen
     return BookingResponse(**booking_dict)
 
 @api_router.get("/bookings", response_model=List[BookingResponse])
-async def get_user_bookings(current_user: dict = Depends(get_current_user)):
+async def get_user_bookings(
+    response: Response,
+    limit: int = 1000,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    # Newest first; pass X-Next-Cursor back as cursor for older bookings
+    sort = [("created_at", -1), ("id", -1)]
     if current_user["role"] == UserRole.CUSTOMER:
         # Customer sees only their bookings
-        bookings = await db.bookings.find({"customer_id": current_user["id"]}).to_list(1000)
+        bookings = await paginate(response, db.bookings, {"customer_id": current_user["id"]}, sort, limit, cursor=cursor)
     elif current_user["role"] == UserRole.HOTEL_MANAGER:
         # Hotel manager sees bookings for their hotels
-        user_hotels = await db.hotels.find({"manager_id": current_user["id"]}).to_list(1000)
-        hotel_ids = [hotel["id"] for hotel in user_hotels]
-        
-        # Get rooms for user's hotels
-        rooms = await db.conference_rooms.find({"hotel_id": {"$in": hotel_ids}}).to_list(1000)
-        room_ids = [room["id"] for room in rooms]
-        
-        bookings = await db.bookings.find({"room_id": {"$in": room_ids}}).to_list(1000)
+        bookings = await paginate(response, db.bookings, {"manager_id": current_user["id"]}, sort, limit, cursor=cursor)
     else:  # Admin
         # Admin sees all bookings
-        bookings = await db.bookings.find().to_list(1000)
+        bookings = await paginate(response, db.bookings, {}, sort, limit, cursor=cursor)
     
     return [BookingResponse(**booking) for booking in bookings]
 
@@ -1847,14 +1802,11 @@ async def get_booking(booking_id: str, current_user: dict = Depends(get_current_
         )
     elif current_user["role"] == UserRole.HOTEL_MANAGER:
         # Check if this booking is for manager's hotel
-        room = await db.conference_rooms.find_one({"id": booking["room_id"]})
-        if room:
-            hotel = await db.hotels.find_one({"id": room["hotel_id"], "manager_id": current_user["id"]})
-            if not hotel:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="You can only view bookings for your hotels"
-                )
+        if await booking_manager_id(db, booking) != current_user["id"]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only view bookings for your hotels"
+            )
     
     return BookingResponse(**booking)
 
@@ -1881,14 +1833,11 @@ async def update_booking_status(
             )
     elif current_user["role"] == UserRole.HOTEL_MANAGER:
         # Check if this booking is for manager's hotel
-        room = await db.conference_rooms.find_one({"id": booking["room_id"]})
-        if room:
-            hotel = await db.hotels.find_one({"id": room["hotel_id"], "manager_id": current_user["id"]})
-            if not hotel:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="You can only manage bookings for your hotels"
-                )
+        if await booking_manager_id(db, booking) != current_user["id"]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only manage bookings for your hotels"
+            )
     
     # Update booking
     update_data = {
@@ -1898,7 +1847,8 @@ async def update_booking_status(
     if status_update.notes:
         update_data["notes"] = status_update.notes
     
-    await db.bookings.update_one({"id": booking_id}, {"$set": update_data})
+    await hotel_stats.update_booking({"id": booking_id}, update_data)
+    availability_index.invalidate(booking["room_id"])
     
     # Get updated booking
     updated_booking = await db.bookings.find_one({"id": booking_id})
@@ -1914,10 +1864,13 @@ async def get_room_bookings(
     room_id: str, 
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    limit: int = 1000,
+    cursor: Optional[str] = None,
+    response: Response = None,
     current_user: dict = Depends(get_current_user)
 ):
     # Check if user has permission to view this room's bookings
-    room = await db.conference_rooms.find_one({"id": room_id})
+    room = await find_room_with_manager(db, room_id)
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1925,8 +1878,7 @@ async def get_room_bookings(
         )
     
     if current_user["role"] == UserRole.HOTEL_MANAGER:
-        hotel = await db.hotels.find_one({"id": room["hotel_id"], "manager_id": current_user["id"]})
-        if not hotel:
+        if room.get("manager_id") != current_user["id"]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You can only view bookings for your hotels"
@@ -1947,27 +1899,13 @@ async def get_room_bookings(
             {"start_date": {"$lte": end_dt}, "end_date": {"$gte": start_dt}}
         ]
     
-    bookings = await db.bookings.find(query).to_list(1000)
+    bookings = await paginate(response, db.bookings, query, [("start_date", 1), ("id", 1)], limit, cursor=cursor)
     return [BookingResponse(**booking) for booking in bookings]
 
 # Utility function for availability checking
 async def check_room_availability(room_id: str, start_date: datetime, end_date: datetime) -> dict:
-    # Find conflicting bookings
-    conflicting_bookings = await db.bookings.find({
-        "room_id": room_id,
-        "status": {"$in": [BookingStatus.PENDING, BookingStatus.CONFIRMED]},
-        "$or": [
-            {"start_date": {"$lte": end_date}, "end_date": {"$gte": start_date}}
-        ]
-    }).to_list(1000)
-    
-    is_available = len(conflicting_bookings) == 0
-    
-    return {
-        "is_available": is_available,
-        "conflicting_bookings": [booking["id"] for booking in conflicting_bookings],
-        "suggested_dates": []  # Could be implemented later
-    }
+    # Conflicting bookings come from the in-process interval index
+    return await availability_index.check(room_id, start_date, end_date)
 
 # Payment Routes
 @api_router.post("/bookings/{booking_id}/payment", response_model=PaymentTransactionResponse)
@@ -2012,7 +1950,7 @@ async def create_payment_checkout(
         # Initialize Stripe checkout
         host_url = str(request.base_url).rstrip('/')
         webhook_url = f"{host_url}/api/webhook/stripe"
-        stripe_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url=webhook_url)
+        stripe_checkout = get_stripe_checkout(webhook_url)
         
         # Create checkout session request
         amount = float(booking["total_price"])  # Ensure float format
@@ -2079,7 +2017,7 @@ async def get_payment_status(session_id: str, current_user: dict = Depends(get_c
     try:
         # Initialize Stripe checkout with APP_URL from environment
         webhook_url = f"{APP_URL}/api/webhook/stripe"
-        stripe_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url=webhook_url)
+        stripe_checkout = get_stripe_checkout(webhook_url)
         
         # Get checkout status from Stripe
         checkout_status: CheckoutStatusResponse = await stripe_checkout.get_checkout_status(session_id)
@@ -2105,13 +2043,11 @@ async def get_payment_status(session_id: str, current_user: dict = Depends(get_c
             
             # If payment is successful, update booking payment status
             if new_payment_status == PaymentStatus.PAID:
-                await db.bookings.update_one(
+                await hotel_stats.update_booking(
                     {"id": payment["booking_id"]},
                     {
-                        "$set": {
-                            "payment_status": PaymentStatus.PAID,
-                            "updated_at": datetime.utcnow()
-                        }
+                        "payment_status": PaymentStatus.PAID,
+                        "updated_at": datetime.utcnow()
                     }
                 )
             
@@ -2138,7 +2074,7 @@ async def stripe_webhook(request: Request):
         
         # Initialize Stripe checkout with APP_URL from environment
         webhook_url = f"{APP_URL}/api/webhook/stripe"
-        stripe_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url=webhook_url)
+        stripe_checkout = get_stripe_checkout(webhook_url)
         
         # Handle webhook
         webhook_response = await stripe_checkout.handle_webhook(body, stripe_signature)
@@ -2162,13 +2098,11 @@ async def stripe_webhook(request: Request):
                 )
                 
                 # Update booking payment status
-                await db.bookings.update_one(
+                await hotel_stats.update_booking(
                     {"id": payment["booking_id"]},
                     {
-                        "$set": {
-                            "payment_status": PaymentStatus.PAID,
-                            "updated_at": datetime.utcnow()
-                        }
+                        "payment_status": PaymentStatus.PAID,
+                        "updated_at": datetime.utcnow()
                     }
                 )
         
@@ -2180,7 +2114,6 @@ async def stripe_webhook(request: Request):
 
 # File Upload Routes
 import os
-import shutil
 from pathlib import Path
 
 # Create upload directories
@@ -2189,6 +2122,8 @@ HOTEL_IMAGES_DIR = UPLOAD_DIR / "hotels"
 ROOM_IMAGES_DIR = UPLOAD_DIR / "rooms"
 HOTEL_VIDEOS_DIR = UPLOAD_DIR / "hotel_videos"
 ROOM_VIDEOS_DIR = UPLOAD_DIR / "room_videos"
+UPLOAD_INCOMING_DIR = UPLOAD_DIR / "incoming"  # part files of resumable uploads
+BLOB_DIR = UPLOAD_DIR / "blobs"  # content-addressed media, see blob_store.py
 
 # Create directories if they don't exist
 UPLOAD_DIR.mkdir(exist_ok=True)
@@ -2196,6 +2131,126 @@ HOTEL_IMAGES_DIR.mkdir(exist_ok=True)
 ROOM_IMAGES_DIR.mkdir(exist_ok=True)
 HOTEL_VIDEOS_DIR.mkdir(exist_ok=True)
 ROOM_VIDEOS_DIR.mkdir(exist_ok=True)
+UPLOAD_INCOMING_DIR.mkdir(exist_ok=True)
+BLOB_DIR.mkdir(exist_ok=True)
+
+MAX_IMAGE_BYTES = int(float(os.environ.get('MAX_IMAGE_UPLOAD_MB', 20)) * 1024 * 1024)
+MAX_VIDEO_BYTES = int(float(os.environ.get('MAX_VIDEO_UPLOAD_MB', 100)) * 1024 * 1024)
+MAX_360_VIDEO_BYTES = int(float(os.environ.get('MAX_360_VIDEO_UPLOAD_MB', 500)) * 1024 * 1024)
+
+# Disk writes run on their own thread pool; sizes are enforced while the body is read
+upload_writer = UploadWriter(
+    max_workers=int(os.environ.get('UPLOAD_WRITE_WORKERS', 4)),
+    chunk_size=int(os.environ.get('UPLOAD_CHUNK_BYTES', 1024 * 1024))
+)
+upload_sessions = UploadSessions(
+    db.upload_sessions,
+    upload_writer,
+    UPLOAD_INCOMING_DIR,
+    ttl_seconds=float(os.environ.get('UPLOAD_SESSION_TTL_SECONDS', 24 * 3600)),
+    purge_interval_seconds=float(os.environ.get('UPLOAD_PURGE_INTERVAL_SECONDS', 3600))
+)
+# Identical uploads are stored once and reference counted
+blob_store = BlobStore(db.media_blobs, BLOB_DIR, upload_writer)
+# Resized/WebP variants are rendered on a process pool after each image upload
+image_processor = ImageProcessor(
+    max_workers=int(os.environ['IMAGE_PROCESS_WORKERS']) if os.environ.get('IMAGE_PROCESS_WORKERS') else None,
+    widths=[int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')]
+)
+image_manifests = ImageManifests(
+    blobs=db.media_blobs,
+    ttl_seconds=float(os.environ.get('IMAGE_MANIFEST_CACHE_TTL_SECONDS', 300))
+)
+# HLS renditions of uploaded videos, one ffmpeg process per core at most
+video_transcoder = VideoTranscoder(
+    max_jobs=int(os.environ['VIDEO_TRANSCODE_WORKERS']) if os.environ.get('VIDEO_TRANSCODE_WORKERS') else None,
+    timeout_seconds=float(os.environ.get('VIDEO_TRANSCODE_TIMEOUT_SECONDS', 3600))
+)
+# ETags, 304s and byte ranges for media; set MEDIA_ACCEL_REDIRECT_PREFIX to let nginx send the bodies
+media_server = MediaServer(
+    root=UPLOAD_DIR,
+    accel_redirect_prefix=os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX'),
+    max_workers=int(os.environ.get('MEDIA_SERVING_WORKERS', 2))
+)
+
+async def store_upload(file: UploadFile, max_bytes: int) -> Blob:
+    """Stream an upload into the blob store; the caller owns one reference to the returned blob"""
+    stored = await upload_writer.save(file, UPLOAD_INCOMING_DIR / f"{uuid.uuid4()}.upload", max_bytes)
+    return await blob_store.ingest(stored, file_extension(file.filename, file.content_type), file.content_type)
+
+async def add_media_url(collection, owner_id: str, field: str, url: str, blob: Blob) -> bool:
+    """Push `url` onto the document unless it is already there (then the reference is handed back)"""
+    result = await collection.update_one({"id": owner_id, field: {"$ne": url}}, {"$push": {field: url}})
+    if result.modified_count == 0:
+        await blob_store.release(blob.sha256)
+        return False
+    return True
+
+def store_image_variants(collection, owner_id: str):
+    """Callback saving a rendered variant manifest on the blob and the hotel/room document"""
+    async def on_done(stem: str, manifest: dict):
+        if is_content_hash(stem):
+            await blob_store.set_variants(stem, manifest)
+            image_manifests.invalidate(db.media_blobs, stem)
+        await collection.update_one({"id": owner_id}, {"$set": {f"image_variants.{stem}": manifest}})
+        image_manifests.invalidate(collection, stem)
+    return on_done
+
+async def add_image_variants(collection, owner_id: str, blob: Blob):
+    """Reuse the variants of an image stored before, or render them in the background"""
+    manifest = None if blob.created else await blob_store.variants(blob.sha256)
+    if manifest:
+        await collection.update_one({"id": owner_id}, {"$set": {f"image_variants.{blob.sha256}": manifest}})
+        return
+    image_processor.schedule(
+        blob_store.path_for(blob.filename),
+        store_image_variants(collection, owner_id),
+        output_dir=blob_store.directory_for(blob.sha256)
+    )
+
+# URL path segment of the video routes for each collection
+VIDEO_URL_PATHS = {"hotels": "hotels", "conference_rooms": "rooms"}
+
+def video_stream_urls(collection_name: str, stream: dict) -> dict:
+    return stream_urls(f"{APP_URL}/api/videos/{VIDEO_URL_PATHS[collection_name]}", stream)
+
+async def publish_video_stream(sha256: str, stream: dict):
+    """Transcoder callback: store the status on the blob and on every hotel/room showing the video"""
+    for owner in await blob_store.set_stream(sha256, stream):
+        await db[owner["collection"]].update_one(
+            {"id": owner["id"]},
+            {"$set": {f"video_streams.{sha256}": video_stream_urls(owner["collection"], stream)}}
+        )
+
+def schedule_transcode(sha256: str, filename: str) -> bool:
+    return video_transcoder.schedule(
+        sha256, blob_store.path_for(filename), blob_store.directory_for(sha256), publish_video_stream
+    )
+
+async def add_video_stream(collection, owner_id: str, blob: Blob):
+    """Attach the HLS renditions of a video stored before, or queue its transcode"""
+    stream = await blob_store.add_stream_owner(blob.sha256, {"collection": collection.name, "id": owner_id})
+    if not stream or stream["status"] == "failed":
+        if not schedule_transcode(blob.sha256, blob.filename):
+            return  # no ffmpeg: the video is offered as uploaded
+        stream = {"status": "queued"}
+        await blob_store.set_stream(blob.sha256, stream)
+    await collection.update_one(
+        {"id": owner_id},
+        {"$set": {f"video_streams.{blob.sha256}": video_stream_urls(collection.name, stream)}}
+    )
+
+def media_path(directory: Path, filename: str) -> Path:
+    """Content-addressed names and their derived files live in the blob store; older uploads in their own directory"""
+    if content_hash_of(filename):
+        return blob_store.path_for(filename)
+    return directory / filename
+
+app.add_middleware(UploadSizeLimit, limits={
+    "/upload-image": MAX_IMAGE_BYTES,
+    "/upload-video": MAX_VIDEO_BYTES,
+    "/upload-360-video": MAX_360_VIDEO_BYTES,
+})
 
 @api_router.post("/hotels/{hotel_id}/upload-image")
 async def upload_hotel_image(
@@ -2217,27 +2272,21 @@ async def upload_hotel_image(
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"{hotel_id}_{uuid.uuid4()}.{file_extension}"
-    file_path = HOTEL_IMAGES_DIR / unique_filename
-    
-    # Save file
+    # Save file (identical bytes are stored once, under their content hash)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        blob = await store_upload(file, MAX_IMAGE_BYTES)
         
         # Create public URL using environment variable
-        image_url = f"{APP_URL}/api/images/hotels/{unique_filename}"
+        image_url = f"{APP_URL}/api/images/hotels/{blob.filename}"
         
         # Update hotel images array
-        await db.hotels.update_one(
-            {"id": hotel_id},
-            {"$push": {"images": image_url}}
-        )
+        if await add_media_url(db.hotels, hotel_id, "images", image_url, blob):
+            await add_image_variants(db.hotels, hotel_id, blob)
         
-        return {"success": True, "image_url": image_url}
+        return {"success": True, "image_url": image_url, "size": blob.size, "sha256": blob.sha256}
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=size_limit_detail(e.max_bytes, "Image file"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
@@ -2262,47 +2311,62 @@ async def upload_room_image(
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"{room_id}_{uuid.uuid4()}.{file_extension}"
-    file_path = ROOM_IMAGES_DIR / unique_filename
-    
-    # Save file
+    # Save file (identical bytes are stored once, under their content hash)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        blob = await store_upload(file, MAX_IMAGE_BYTES)
         
         # Create public URL using environment variable
-        image_url = f"{APP_URL}/api/images/rooms/{unique_filename}"
+        image_url = f"{APP_URL}/api/images/rooms/{blob.filename}"
         
         # Update room images array
-        await db.conference_rooms.update_one(
-            {"id": room_id},
-            {"$push": {"images": image_url}}
-        )
+        if await add_media_url(db.conference_rooms, room_id, "images", image_url, blob):
+            await add_image_variants(db.conference_rooms, room_id, blob)
         
-        return {"success": True, "image_url": image_url}
+        return {"success": True, "image_url": image_url, "size": blob.size, "sha256": blob.sha256}
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=size_limit_detail(e.max_bytes, "Image file"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
 # Serve uploaded images
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+
+async def serve_image(directory: Path, filename: str, collection, request: Request, w: Optional[int]):
+    """The uploaded image, or its variant closest to `w` in the best format the client accepts"""
+    sha256 = blob_hash(filename)
+    manifest = await image_manifests.get(collection, filename)
+    # The same URL answers with a variant once they are rendered, so only then is it final
+    cache_control = IMMUTABLE_CACHE_CONTROL if sha256 and manifest else REVALIDATE_CACHE_CONTROL
+    headers = {"Vary": "Accept"}
+    variant = choose_variant(manifest, w, request.headers.get("accept", ""))
+    if variant:
+        # Blob variants sit next to the blob; older uploads keep theirs under variants/
+        variant_dir = blob_store.directory_for(sha256) if sha256 else directory / VARIANTS_DIRNAME
+        response = await media_server.respond(
+            request,
+            variant_dir / variant["filename"],
+            etag=f"{sha256}-w{variant['width']}-{variant['format']}" if sha256 else None,
+            cache_control=cache_control,
+            media_type=IMAGE_MEDIA_TYPES[variant["format"]],
+            headers=headers
+        )
+        if response is not None:
+            return response
+    response = await media_server.respond(
+        request, media_path(directory, filename), etag=sha256, cache_control=cache_control, headers=headers
+    )
+    if response is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return response
 
 @api_router.get("/images/hotels/{filename}")
-async def get_hotel_image(filename: str):
-    file_path = HOTEL_IMAGES_DIR / filename
-    if file_path.exists():
-        return FileResponse(file_path)
-    raise HTTPException(status_code=404, detail="Image not found")
+async def get_hotel_image(filename: str, request: Request, w: Optional[int] = None):
+    return await serve_image(HOTEL_IMAGES_DIR, filename, db.hotels, request, w)
 
 @api_router.get("/images/rooms/{filename}")
-async def get_room_image(filename: str):
-    file_path = ROOM_IMAGES_DIR / filename
-    if file_path.exists():
-        return FileResponse(file_path)
-    raise HTTPException(status_code=404, detail="Image not found")
+async def get_room_image(filename: str, request: Request, w: Optional[int] = None):
+    return await serve_image(ROOM_IMAGES_DIR, filename, db.conference_rooms, request, w)
 
 # Video Upload Routes
 @api_router.post("/hotels/{hotel_id}/upload-video")
@@ -2325,35 +2389,21 @@ async def upload_hotel_video(
     if not file.content_type.startswith("video/"):
         raise HTTPException(status_code=400, detail="File must be a video")
     
-    # Check file size (100MB limit)
-    file.file.seek(0, 2)  # Move to end of file
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to beginning
-    
-    if file_size > 100 * 1024 * 1024:  # 100MB
-        raise HTTPException(status_code=400, detail="Video file size must be less than 100MB")
-    
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"{hotel_id}_{uuid.uuid4()}.{file_extension}"
-    file_path = HOTEL_VIDEOS_DIR / unique_filename
-    
-    # Save file
+    # Save file (identical bytes are stored once, under their content hash)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        blob = await store_upload(file, MAX_VIDEO_BYTES)
         
         # Create public URL
-        video_url = f"{APP_URL}/api/videos/hotels/{unique_filename}"
+        video_url = f"{APP_URL}/api/videos/hotels/{blob.filename}"
         
         # Update hotel videos array
-        await db.hotels.update_one(
-            {"id": hotel_id},
-            {"$push": {"videos": video_url}}
-        )
+        if await add_media_url(db.hotels, hotel_id, "videos", video_url, blob):
+            await add_video_stream(db.hotels, hotel_id, blob)
         
-        return {"success": True, "video_url": video_url}
+        return {"success": True, "video_url": video_url, "size": blob.size, "sha256": blob.sha256}
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=size_limit_detail(e.max_bytes, "Video file"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload video: {str(e)}")
 
@@ -2377,35 +2427,21 @@ async def upload_hotel_360_video(
     if not file.content_type.startswith("video/"):
         raise HTTPException(status_code=400, detail="File must be a video")
     
-    # Check file size (100MB limit)
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    
-    if file_size > 100 * 1024 * 1024:  # 100MB
-        raise HTTPException(status_code=400, detail="Video file size must be less than 100MB")
-    
-    # Generate unique filename with 360 marker
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"{hotel_id}_360_{uuid.uuid4()}.{file_extension}"
-    file_path = HOTEL_VIDEOS_DIR / unique_filename
-    
-    # Save file
+    # Save file (identical bytes are stored once, under their content hash)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        blob = await store_upload(file, MAX_360_VIDEO_BYTES)
         
         # Create public URL
-        video_url = f"{APP_URL}/api/videos/hotels/{unique_filename}"
+        video_url = f"{APP_URL}/api/videos/hotels/{blob.filename}"
         
         # Update hotel 360_videos array
-        await db.hotels.update_one(
-            {"id": hotel_id},
-            {"$push": {"videos_360": video_url}}
-        )
+        if await add_media_url(db.hotels, hotel_id, "videos_360", video_url, blob):
+            await add_video_stream(db.hotels, hotel_id, blob)
         
-        return {"success": True, "video_url": video_url}
+        return {"success": True, "video_url": video_url, "size": blob.size, "sha256": blob.sha256}
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=size_limit_detail(e.max_bytes, "Video file"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload 360 video: {str(e)}")
 
@@ -2430,54 +2466,199 @@ async def upload_room_video(
     if not file.content_type.startswith("video/"):
         raise HTTPException(status_code=400, detail="File must be a video")
     
-    # Check file size (100MB limit)
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    
-    if file_size > 100 * 1024 * 1024:  # 100MB
-        raise HTTPException(status_code=400, detail="Video file size must be less than 100MB")
-    
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"{room_id}_{uuid.uuid4()}.{file_extension}"
-    file_path = ROOM_VIDEOS_DIR / unique_filename
-    
-    # Save file
+    # Save file (identical bytes are stored once, under their content hash)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        blob = await store_upload(file, MAX_VIDEO_BYTES)
         
         # Create public URL
-        video_url = f"{APP_URL}/api/videos/rooms/{unique_filename}"
+        video_url = f"{APP_URL}/api/videos/rooms/{blob.filename}"
         
         # Update room videos array
-        await db.conference_rooms.update_one(
-            {"id": room_id},
-            {"$push": {"videos": video_url}}
-        )
+        if await add_media_url(db.conference_rooms, room_id, "videos", video_url, blob):
+            await add_video_stream(db.conference_rooms, room_id, blob)
         
-        return {"success": True, "video_url": video_url}
+        return {"success": True, "video_url": video_url, "size": blob.size, "sha256": blob.sha256}
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=size_limit_detail(e.max_bytes, "Video file"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload video: {str(e)}")
 
+# Resumable video uploads (large 360° videos): create a session, then PUT the bytes in chunks
+VIDEO_UPLOAD_KINDS = ("hotel_video", "hotel_360_video", "room_video")
+
+class UploadSessionCreate(BaseModel):
+    kind: str  # hotel_video, hotel_360_video, room_video
+    target_id: str  # hotel id, or room id for room_video
+    filename: str
+    content_type: str
+    size: int = Field(..., ge=1)
+
+async def resolve_video_target(kind: str, target_id: str, current_user: dict) -> dict:
+    """Where a video of `kind` for `target_id` is stored, after the same checks as the upload endpoints"""
+    if kind not in VIDEO_UPLOAD_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(VIDEO_UPLOAD_KINDS)}")
+    if current_user["role"] == UserRole.CUSTOMER:
+        raise HTTPException(status_code=403, detail="Customers cannot upload videos")
+    
+    if kind == "room_video":
+        room = await db.conference_rooms.find_one({"id": target_id}, {"_id": 0, "hotel_id": 1})
+        if not room:
+            raise HTTPException(status_code=404, detail="Room not found")
+        hotel = await db.hotels.find_one({"id": room["hotel_id"]}, {"_id": 0, "manager_id": 1})
+        target = {"collection": db.conference_rooms, "field": "videos", "url_path": "rooms",
+                  "max_bytes": MAX_VIDEO_BYTES}
+    else:
+        hotel = await db.hotels.find_one({"id": target_id}, {"_id": 0, "manager_id": 1})
+        if not hotel:
+            raise HTTPException(status_code=404, detail="Hotel not found")
+        is_360 = kind == "hotel_360_video"
+        target = {"collection": db.hotels, "field": "videos_360" if is_360 else "videos", "url_path": "hotels",
+                  "max_bytes": MAX_360_VIDEO_BYTES if is_360 else MAX_VIDEO_BYTES}
+    
+    if current_user["role"] == UserRole.HOTEL_MANAGER and (not hotel or hotel.get("manager_id") != current_user["id"]):
+        raise HTTPException(status_code=403, detail="You can only manage your own hotel's videos")
+    return target
+
+async def get_own_upload_session(upload_id: str, current_user: dict) -> dict:
+    session = await upload_sessions.get(upload_id)
+    if not session or (session["owner_id"] != current_user["id"] and current_user["role"] != UserRole.ADMIN):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+def upload_session_status(session: dict) -> dict:
+    return {
+        "upload_id": session["id"],
+        "kind": session["kind"],
+        "target_id": session["target_id"],
+        "size": session["size"],
+        "received": session["received"],
+        "status": session["status"],
+        "chunk_size": upload_writer.chunk_size,
+        "expires_at": session["expires_at"],
+        "video_url": session.get("video_url"),
+        "sha256": session.get("sha256"),
+    }
+
+@api_router.post("/uploads")
+async def create_upload_session(upload: UploadSessionCreate, current_user: dict = Depends(get_current_user)):
+    """Start a resumable video upload; send the bytes with PUT /uploads/{upload_id}"""
+    target = await resolve_video_target(upload.kind, upload.target_id, current_user)
+    if not upload.content_type.startswith("video/"):
+        raise HTTPException(status_code=400, detail="File must be a video")
+    if upload.size > target["max_bytes"]:
+        raise HTTPException(status_code=413, detail=size_limit_detail(target["max_bytes"], "Video file"))
+    
+    session = await upload_sessions.create(
+        owner_id=current_user["id"],
+        kind=upload.kind,
+        target_id=upload.target_id,
+        extension=file_extension(upload.filename, upload.content_type),
+        content_type=upload.content_type,
+        size=upload.size
+    )
+    return upload_session_status(session)
+
+@api_router.get("/uploads/{upload_id}")
+async def get_upload_session(upload_id: str, current_user: dict = Depends(get_current_user)):
+    """Upload progress; a client resuming after a dropped connection continues from `received`"""
+    return upload_session_status(await get_own_upload_session(upload_id, current_user))
+
+@api_router.put("/uploads/{upload_id}")
+async def upload_session_chunk(upload_id: str, request: Request, current_user: dict = Depends(get_current_user)):
+    """Append the raw request body at the Upload-Offset header; the last chunk publishes the video"""
+    session = await get_own_upload_session(upload_id, current_user)
+    if session["status"] == "complete":
+        # A retried last chunk whose response was lost
+        return {"success": True, "video_url": session.get("video_url"), "size": session["size"],
+                "sha256": session.get("sha256")}
+    if session["status"] != "uploading":
+        raise HTTPException(status_code=409, detail=f"Upload is {session['status']}")
+    offset = request.headers.get(UPLOAD_OFFSET_HEADER, "")
+    if not offset.isdigit():
+        raise HTTPException(status_code=400, detail=f"{UPLOAD_OFFSET_HEADER} header is required")
+    
+    try:
+        session = await upload_sessions.append(session, int(offset), request.stream())
+    except UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload offset must be {e.expected}",
+            headers={UPLOAD_OFFSET_HEADER: str(e.expected)}
+        )
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Chunk runs past the declared upload size")
+    
+    if session["received"] < session["size"]:
+        return upload_session_status(session)
+    
+    # Complete: re-check the target (it may have been deleted meanwhile) and publish
+    target = await resolve_video_target(session["kind"], session["target_id"], current_user)
+    try:
+        stored = await upload_sessions.finish(session, UPLOAD_INCOMING_DIR / f"{session['id']}.upload")
+    except UploadOffsetMismatch:
+        # Another request finished the session first
+        raise HTTPException(status_code=409, detail="Upload is already being processed")
+    try:
+        blob = await blob_store.ingest(stored, session["extension"], session["content_type"])
+        video_url = f"{APP_URL}/api/videos/{target['url_path']}/{blob.filename}"
+        if await add_media_url(target["collection"], session["target_id"], target["field"], video_url, blob):
+            await add_video_stream(target["collection"], session["target_id"], blob)
+        await upload_sessions.complete(session, video_url=video_url)
+    except Exception as e:
+        await upload_sessions.fail(session, stored, str(e))
+        raise HTTPException(status_code=500, detail=f"Failed to upload video: {str(e)}")
+    
+    return {"success": True, "video_url": video_url, "size": blob.size, "sha256": blob.sha256}
+
+@api_router.delete("/uploads/{upload_id}")
+async def abort_upload_session(upload_id: str, current_user: dict = Depends(get_current_user)):
+    session = await get_own_upload_session(upload_id, current_user)
+    if session["status"] in ("processing", "complete"):
+        raise HTTPException(status_code=400, detail=f"Upload is already {session['status']}")
+    await upload_sessions.abort(session)
+    return {"success": True, "message": "Upload cancelled"}
+
 # Serve uploaded videos
+async def serve_video(directory: Path, filename: str, request: Request):
+    """The uploaded video or one of its HLS files; players seek with byte ranges and revalidate with the ETag"""
+    response = await media_server.respond(
+        request,
+        media_path(directory, filename),
+        etag=blob_hash(filename),
+        cache_control=IMMUTABLE_CACHE_CONTROL if content_hash_of(filename) else REVALIDATE_CACHE_CONTROL,
+        media_type=VIDEO_STREAM_MEDIA_TYPES.get(filename.rsplit(".", 1)[-1]) if content_hash_of(filename) else None
+    )
+    if response is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return response
+
 @api_router.get("/videos/hotels/{filename}")
-async def get_hotel_video(filename: str):
-    file_path = HOTEL_VIDEOS_DIR / filename
-    if file_path.exists():
-        return FileResponse(file_path)
-    raise HTTPException(status_code=404, detail="Video not found")
+async def get_hotel_video(filename: str, request: Request):
+    return await serve_video(HOTEL_VIDEOS_DIR, filename, request)
 
 @api_router.get("/videos/rooms/{filename}")
-async def get_room_video(filename: str):
-    file_path = ROOM_VIDEOS_DIR / filename
-    if file_path.exists():
-        return FileResponse(file_path)
-    raise HTTPException(status_code=404, detail="Video not found")
+async def get_room_video(filename: str, request: Request):
+    return await serve_video(ROOM_VIDEOS_DIR, filename, request)
 
 # Delete video endpoints
+async def release_media(directory: Path, filename: str, fields: List[Optional[List[str]]], url: str):
+    """Drop the references the removed URL held; per-upload legacy files are deleted outright"""
+    sha256 = blob_hash(filename)
+    if sha256:
+        await blob_store.release(sha256, sum((urls or []).count(url) for urls in fields))
+        return
+    file_path = directory / filename
+    if file_path.exists():
+        file_path.unlink()
+
+async def detach_video_stream(collection, owner_id: str, filename: str):
+    """Forget the HLS renditions of a removed video on the document (their files go with the blob)"""
+    sha256 = blob_hash(filename)
+    if sha256:
+        await blob_store.remove_stream_owner(sha256, {"collection": collection.name, "id": owner_id})
+        await collection.update_one({"id": owner_id}, {"$unset": {f"video_streams.{sha256}": ""}})
+
 @api_router.delete("/hotels/{hotel_id}/videos/{filename}")
 async def delete_hotel_video(
     hotel_id: str,
@@ -2503,10 +2684,9 @@ async def delete_hotel_video(
         {"$pull": {"videos": video_url, "videos_360": video_url}}
     )
     
-    # Delete physical file
-    file_path = HOTEL_VIDEOS_DIR / filename
-    if file_path.exists():
-        file_path.unlink()
+    # Delete physical file (shared content is only deleted with its last reference)
+    await detach_video_stream(db.hotels, hotel_id, filename)
+    await release_media(HOTEL_VIDEOS_DIR, filename, [hotel.get("videos"), hotel.get("videos_360")], video_url)
     
     return {"success": True, "message": "Video deleted successfully"}
 
@@ -2536,10 +2716,9 @@ async def delete_room_video(
         {"$pull": {"videos": video_url}}
     )
     
-    # Delete physical file
-    file_path = ROOM_VIDEOS_DIR / filename
-    if file_path.exists():
-        file_path.unlink()
+    # Delete physical file (shared content is only deleted with its last reference)
+    await detach_video_stream(db.conference_rooms, room_id, filename)
+    await release_media(ROOM_VIDEOS_DIR, filename, [room.get("videos")], video_url)
     
     return {"success": True, "message": "Video deleted successfully"}
 
@@ -2583,18 +2762,21 @@ async def create_review(review_data: ReviewCreate, current_user: dict = Depends(
     await db.reviews.insert_one(review_dict)
     
     # Update hotel and room ratings
-    await update_ratings(room["hotel_id"], booking["room_id"])
+    await rating_aggregates.review_added(review_dict)
+    hotel_review_listing.invalidate(review_dict["hotel_id"])
     
     return ReviewResponse(**review_dict)
 
 @api_router.get("/hotels/{hotel_id}/reviews", response_model=List[ReviewResponse])
-async def get_hotel_reviews(hotel_id: str, skip: int = 0, limit: int = 20):
-    reviews = await db.reviews.find({"hotel_id": hotel_id}).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+async def get_hotel_reviews(hotel_id: str, response: Response, skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
+    reviews = await paginate(response, db.reviews, {"hotel_id": hotel_id}, [("created_at", -1), ("id", -1)],
+                             limit, cursor=cursor, skip=skip)
     return [ReviewResponse(**review) for review in reviews]
 
 @api_router.get("/rooms/{room_id}/reviews", response_model=List[ReviewResponse])
-async def get_room_reviews(room_id: str, skip: int = 0, limit: int = 20):
-    reviews = await db.reviews.find({"room_id": room_id}).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+async def get_room_reviews(room_id: str, response: Response, skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
+    reviews = await paginate(response, db.reviews, {"room_id": room_id}, [("created_at", -1), ("id", -1)],
+                             limit, cursor=cursor, skip=skip)
     return [ReviewResponse(**review) for review in reviews]
 
 @api_router.post("/reviews/{review_id}/response")
@@ -2619,29 +2801,10 @@ async def respond_to_review(review_id: str, response_data: HotelReviewResponse,
             }
         }
     )
+    hotel_review_listing.invalidate(review["hotel_id"])
     
     return {"success": True, "message": "Response added successfully"}
 
-async def update_ratings(hotel_id: str, room_id: str):
-    """Update average ratings for hotel and room"""
-    # Hotel ratings
-    hotel_reviews = await db.reviews.find({"hotel_id": hotel_id}).to_list(length=1000)
-    if hotel_reviews:
-        avg_rating = sum(review["overall_rating"] for review in hotel_reviews) / len(hotel_reviews)
-        await db.hotels.update_one(
-            {"id": hotel_id},
-            {"$set": {"average_rating": round(avg_rating, 1), "total_reviews": len(hotel_reviews)}}
-        )
-    
-    # Room ratings
-    room_reviews = await db.reviews.find({"room_id": room_id}).to_list(length=1000)
-    if room_reviews:
-        avg_rating = sum(review["room_rating"] for review in room_reviews) / len(room_reviews)
-        await db.conference_rooms.update_one(
-            {"id": room_id},
-            {"$set": {"average_rating": round(avg_rating, 1)}}
-        )
-
 # Currency System APIs
 @api_router.get("/currency/rates")
 async def get_exchange_rates(request: Request):
@@ -2733,6 +2896,8 @@ async def get_advertisements(
     ad_type: Optional[AdvertisementType] = None,
     status: Optional[AdvertisementStatus] = None,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    response: Response = None,
     current_user: dict = Depends(get_current_user)
 ):
     # Only admins and hotel managers can list ads
@@ -2748,13 +2913,15 @@ async def get_advertisements(
     if status:
         filter_query["status"] = status
     
-    ads = await db.advertisements.find(filter_query).limit(limit).to_list(length=limit)
+    ads = await paginate(response, db.advertisements, filter_query, [("created_at", -1), ("id", -1)], limit, cursor=cursor)
     return [AdvertisementResponse(**ad) for ad in ads]
 
 @api_router.get("/advertisements/public", response_model=List[AdvertisementResponse])
 async def get_public_advertisements(
     ad_type: Optional[AdvertisementType] = None,
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    response: Response = None
 ):
     """Public endpoint to get active advertisements for homepage"""
     now = datetime.now(timezone.utc).replace(tzinfo=None)
@@ -2769,10 +2936,11 @@ async def get_public_advertisements(
         filter_query["ad_type"] = ad_type
     
     # Sort by priority (higher first), then by created date
-    ads = await db.advertisements.find(filter_query).sort([
+    ads = await paginate(response, db.advertisements, filter_query, [
         ("priority", -1),
-        ("created_at", -1)
-    ]).limit(limit).to_list(length=limit)
+        ("created_at", -1),
+        ("id", -1)
+    ], limit, cursor=cursor)
     
     return [AdvertisementResponse(**ad) for ad in ads]
 
@@ -2870,16 +3038,52 @@ async def delete_advertisement(ad_id: str, current_user: dict = Depends(get_curr
 async def health_check():
     return {"status": "healthy", "message": "MeetDelux API is running!"}
 
+@api_router.get("/admin/metrics")
+async def get_runtime_metrics(current_user: dict = Depends(get_current_user)):
+    """In-process cache and background worker metrics for tuning"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can access this endpoint"
+        )
+    
+    return {
+        "geoip": geoip_locator.stats(),
+        "exchange_rates": exchange_rate_cache.stats(),
+        "availability": availability_index.stats(),
+        "http_clients": http_clients.stats(),
+        "email_outbox": await email_outbox.stats(),
+        "booking_reminders": booking_reminder_scheduler.stats(),
+        "auth": principal_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "hotel_stats": hotel_stats.stats(),
+        "ratings": rating_aggregates.stats(),
+        "review_listing": hotel_review_listing.stats(),
+        "room_search": room_search.stats(),
+        "uploads": {**upload_writer.stats(), "sessions": upload_sessions.stats()},
+        "images": {**image_processor.stats(), "manifests": image_manifests.stats()},
+        "media_blobs": blob_store.stats(),
+        "media_serving": media_server.stats(),
+        "video_transcoding": video_transcoder.stats()
+    }
+
 # Admin Routes - Approval System
 @api_router.get("/admin/hotels/pending", response_model=List[HotelResponse])
-async def get_pending_hotels(current_user: dict = Depends(get_current_user)):
+async def get_pending_hotels(
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can access this endpoint"
         )
     
-    hotels = await db.hotels.find({"approval_status": "pending"}, {"_id": 0}).to_list(length=100)
+    # Oldest requests first
+    hotels = await paginate(response, db.hotels, {"approval_status": "pending"}, [("created_at", 1), ("id", 1)],
+                            limit, cursor=cursor, projection={"_id": 0})
     return [HotelResponse(**hotel) for hotel in hotels]
 
 @api_router.put("/admin/hotels/{hotel_id}/approve")
@@ -2902,6 +3106,7 @@ async def approve_hotel(hotel_id: str, current_user: dict = Depends(get_current_
         {"id": hotel_id},
         {"$set": {"approval_status": "approved"}}
     )
+    await room_search.sync_hotel(hotel_id)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -2948,6 +3153,7 @@ async def reject_hotel(hotel_id: str, reason: Optional[str] = None, current_user
         {"id": hotel_id},
         {"$set": update_data}
     )
+    await room_search.sync_hotel(hotel_id)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -2972,14 +3178,20 @@ async def reject_hotel(hotel_id: str, reason: Optional[str] = None, current_user
     return {"message": "Hotel rejected", "hotel_id": hotel_id}
 
 @api_router.get("/admin/rooms/pending", response_model=List[ConferenceRoomResponse])
-async def get_pending_rooms(current_user: dict = Depends(get_current_user)):
+async def get_pending_rooms(
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can access this endpoint"
         )
     
-    rooms = await db.conference_rooms.find({"approval_status": ApprovalStatus.PENDING}).to_list(length=100)
+    rooms = await paginate(response, db.conference_rooms, {"approval_status": ApprovalStatus.PENDING},
+                           [("created_at", 1), ("id", 1)], limit, cursor=cursor)
     return [ConferenceRoomResponse(**room) for room in rooms]
 
 @api_router.put("/admin/rooms/{room_id}/approve")
@@ -2994,6 +3206,7 @@ async def approve_room(room_id: str, current_user: dict = Depends(get_current_us
         {"id": room_id},
         {"$set": {"approval_status": ApprovalStatus.APPROVED}}
     )
+    await room_search.sync_room(room_id)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -3019,6 +3232,7 @@ async def reject_room(room_id: str, reason: Optional[str] = None, current_user:
         {"id": room_id},
         {"$set": update_data}
     )
+    await room_search.sync_room(room_id)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -3113,7 +3327,8 @@ async def create_review(
     await db.reviews.insert_one(review)
     
     # Update hotel average rating
-    await update_hotel_rating(review_data.hotel_id)
+    await rating_aggregates.review_added(review)
+    hotel_review_listing.invalidate(review["hotel_id"])
     
     # Send notification to admin
     try:
@@ -3135,45 +3350,23 @@ async def get_hotel_reviews(
     hotel_id: str,
     skip: int = 0,
     limit: int = 20,
-    sort_by: str = "created_at"  # created_at, rating, helpful_count
+    sort_by: str = "created_at",  # created_at, rating, helpful_count
+    cursor: Optional[str] = None,
+    response: Response = None
 ):
-    """Get all reviews for a hotel"""
+    """Get all reviews for a hotel (pass next_cursor back as cursor for the next page)"""
     
-    # Check if hotel exists
-    hotel = await db.hotels.find_one({"id": hotel_id})
-    if not hotel:
-        raise HTTPException(status_code=404, detail="Hotel not found")
-    
-    # Determine sort order
-    sort_field = sort_by if sort_by in ["created_at", "rating", "helpful_count"] else "created_at"
-    sort_order = -1  # Descending
-    
-    # Get reviews
-    reviews_cursor = db.reviews.find(
-        {"hotel_id": hotel_id}
-    ).sort(sort_field, sort_order).skip(skip).limit(limit)
-    
-    reviews = await reviews_cursor.to_list(length=limit)
-    
-    # Get total count
-    total_count = await db.reviews.count_documents({"hotel_id": hotel_id})
+    try:
+        listing = await hotel_review_listing.get(hotel_id, sort_by=sort_by, skip=skip, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Calculate rating distribution
-    rating_distribution = {}
-    for rating in range(1, 6):
-        count = await db.reviews.count_documents({
-            "hotel_id": hotel_id,
-            "rating": rating
-        })
-        rating_distribution[str(rating)] = count
+    if listing is None:
+        raise HTTPException(status_code=404, detail="Hotel not found")
+    if listing["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = listing["next_cursor"]
     
-    return {
-        "reviews": reviews,
-        "total_count": total_count,
-        "rating_distribution": rating_distribution,
-        "average_rating": hotel.get("average_rating", 0),
-        "total_reviews": hotel.get("total_reviews", 0)
-    }
+    return listing
 
 @api_router.put("/reviews/{review_id}/response")
 async def add_hotel_response(
@@ -3215,6 +3408,7 @@ async def add_hotel_response(
             }
         }
     )
+    hotel_review_listing.invalidate(review["hotel_id"])
     
     return {"message": "Response added successfully", "review_id": review_id}
 
@@ -3234,6 +3428,7 @@ async def mark_review_helpful(
         {"id": review_id},
         {"$inc": {"helpful_count": 1}}
     )
+    hotel_review_listing.invalidate(review["hotel_id"])
     
     return {"message": "Review marked as helpful", "review_id": review_id}
 
@@ -3255,52 +3450,25 @@ async def delete_review(
             detail="You can only delete your own reviews"
         )
     
-    # Delete review
-    await db.reviews.delete_one({"id": review_id})
-    
-    # Update hotel rating
-    await update_hotel_rating(review["hotel_id"])
+    # Delete review (only the request that actually removed it adjusts the rating)
+    result = await db.reviews.delete_one({"id": review_id})
+    if result.deleted_count:
+        await rating_aggregates.review_removed(review)
+    hotel_review_listing.invalidate(review["hotel_id"])
     
     return {"message": "Review deleted successfully", "review_id": review_id}
 
-async def update_hotel_rating(hotel_id: str):
-    """Update hotel's average rating and total reviews count"""
-    
-    # Calculate average rating
-    pipeline = [
-        {"$match": {"hotel_id": hotel_id}},
-        {"$group": {
-            "_id": None,
-            "average_rating": {"$avg": "$rating"},
-            "total_reviews": {"$sum": 1}
-        }}
-    ]
-    
-    result = await db.reviews.aggregate(pipeline).to_list(length=1)
-    
-    if result:
-        avg_rating = round(result[0]["average_rating"], 1)
-        total_reviews = result[0]["total_reviews"]
-    else:
-        avg_rating = 0
-        total_reviews = 0
-    
-    # Update hotel
-    await db.hotels.update_one(
-        {"id": hotel_id},
-        {
-            "$set": {
-                "average_rating": avg_rating,
-                "total_reviews": total_reviews,
-                "updated_at": datetime.now(timezone.utc)
-            }
-        }
-    )
-
 # Dashboard Analytics Routes
 @api_router.get("/dashboard/stats")
-async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
-    """Get dashboard statistics for hotel managers"""
+async def get_dashboard_stats(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    hotel_id: Optional[str] = None,
+    per_hotel: bool = False,
+    live: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get dashboard statistics for hotel managers from the daily rollups (live=true recomputes from bookings)"""
     
     if current_user["role"] not in [UserRole.HOTEL_MANAGER, UserRole.ADMIN]:
         raise HTTPException(status_code=403, detail="Access denied")
@@ -3309,36 +3477,53 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     hotel_filter = {}
     if current_user["role"] == UserRole.HOTEL_MANAGER:
         hotel_filter = {"manager_id": current_user["id"]}
-    
-    hotels = await db.hotels.find(hotel_filter, {"_id": 0}).to_list(1000)
-    hotel_ids = [h["id"] for h in hotels]
-    
-    # Get bookings for these hotels
-    room_ids = []
-    for hotel_id in hotel_ids:
-        rooms = await db.conference_rooms.find({"hotel_id": hotel_id}, {"_id": 0, "id": 1}).to_list(1000)
-        room_ids.extend([r["id"] for r in rooms])
-    
-    bookings = await db.bookings.find(
-        {"room_id": {"$in": room_ids}},
+    if hotel_id:
+        hotel_filter["id"] = hotel_id
+    
+    # Optional event date range (YYYY-MM-DD, end date inclusive)
+    range_start = range_end = None
+    if start_date:
+        range_start, _ = parse_day_range(start_date, start_date)
+    if end_date:
+        _, range_end = parse_day_range(end_date, end_date)
+    if range_start and range_end and range_end < range_start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    booking_match = booking_date_match(range_start, range_end)
+    
+    if not live:
+        hotels = await db.hotels.find(hotel_filter, {"_id": 0, "id": 1, "name": 1}).to_list(1000)
+        hotel_ids = [h["id"] for h in hotels]
+        # No rollup rows yet (first start after deploying, rebuild still running): read the bookings
+        live = not await hotel_stats.has_rows(hotel_ids)
+    
+    if live:
+        pipeline = dashboard_stats_pipeline(hotel_filter, booking_match=booking_match, per_hotel=per_hotel)
+        result = await db.hotels.aggregate(pipeline).to_list(1)
+        return shape_dashboard_stats(result, per_hotel=per_hotel)
+    
+    stats = await hotel_stats.read(hotel_ids, range_start, range_end, per_hotel=per_hotel)
+    
+    rooms = await db.conference_rooms.find({"hotel_id": {"$in": hotel_ids}}, {"_id": 0, "id": 1}).to_list(None)
+    recent_bookings = await db.bookings.find(
+        {"room_id": {"$in": [r["id"] for r in rooms]}, **booking_match},
         {"_id": 0}
-    ).to_list(10000)
+    ).sort("created_at", -1).limit(10).to_list(10)
     
-    # Calculate stats
-    total_bookings = len(bookings)
-    total_revenue = sum(b.get("total_amount", 0) for b in bookings if b.get("payment_status") == "paid")
-    confirmed_bookings = len([b for b in bookings if b.get("status") == "confirmed"])
-    pending_bookings = len([b for b in bookings if b.get("status") == "pending"])
+    # Occupancy is only meaningful over a closed date range
+    occupancy_rate = None
+    if range_start and range_end and rooms:
+        days = (range_end.date() - range_start.date()).days + 1
+        occupancy_rate = round(stats["booked_room_days"] / (len(rooms) * days), 4)
     
-    # Recent bookings (last 10)
-    recent_bookings = sorted(bookings, key=lambda x: x.get("created_at", datetime.min), reverse=True)[:10]
+    if per_hotel:
+        names = {h["id"]: h.get("name") for h in hotels}
+        for row in stats["hotels"]:
+            row["hotel_name"] = names.get(row["hotel_id"])
     
     return {
         "total_hotels": len(hotels),
-        "total_bookings": total_bookings,
-        "total_revenue": total_revenue,
-        "confirmed_bookings": confirmed_bookings,
-        "pending_bookings": pending_bookings,
+        **stats,
+        "occupancy_rate": occupancy_rate,
         "recent_bookings": recent_bookings
     }
 
@@ -3351,10 +3536,80 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, UPLOAD_OFFSET_HEADER],
 )
 
+@app.on_event("startup")
+async def create_db_indexes():
+    report = await ensure_indexes(db)
+    created = sum(len(r["created"]) for r in report.values())
+    failed = sum(len(r["failed"]) for r in report.values())
+    logger.info(f"MongoDB index bootstrap finished: {created} created, {failed} failed")
+
+@app.on_event("startup")
+async def start_http_clients():
+    await http_clients.start()
+
+@app.on_event("startup")
+async def start_exchange_rate_cache():
+    await exchange_rate_cache.start()
+
+@app.on_event("startup")
+async def start_email_outbox():
+    email_outbox.start()
+
+@app.on_event("startup")
+async def start_booking_reminders():
+    if REMINDER_SCHEDULER_ENABLED:
+        booking_reminder_scheduler.start()
+
+@app.on_event("startup")
+async def start_rating_reconciliation():
+    if RATING_RECONCILE_INTERVAL_SECONDS > 0:
+        rating_aggregates.start()
+
+@app.on_event("startup")
+async def build_room_search():
+    # First start after deploying: fill the search collection once in the background
+    if await db.room_search.estimated_document_count() == 0:
+        room_search.start_rebuild()
+
+@app.on_event("startup")
+async def build_hotel_stats():
+    # First start after deploying: fill the daily rollups once in the background
+    if await db.hotel_stats_daily.estimated_document_count() == 0:
+        hotel_stats.start_rebuild()
+
+@app.on_event("startup")
+async def start_video_transcoder():
+    video_transcoder.start()
+    # Transcodes queued or running when the server stopped start over
+    pending = db.media_blobs.find(
+        {"stream.status": {"$in": ["queued", "processing"]}}, {"_id": 0, "sha256": 1, "filename": 1}
+    )
+    async for blob in pending:
+        schedule_transcode(blob["sha256"], blob["filename"])
+
+@app.on_event("startup")
+async def purge_stale_uploads():
+    # Abandoned part files are removed now and then every purge interval
+    upload_sessions.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await room_search.stop()
+    await hotel_stats.stop()
+    await image_processor.stop()
+    await video_transcoder.stop()
+    await rating_aggregates.stop()
+    await booking_reminder_scheduler.stop()
+    await upload_sessions.stop()
+    password_hasher.shutdown()
+    upload_writer.shutdown()
+    media_server.shutdown()
+    await email_outbox.stop()
+    await exchange_rate_cache.stop()
+    await http_clients.close()
     client.close()
 
 if __name__ == "__main__":
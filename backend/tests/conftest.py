@@ -0,0 +1,286 @@
+"""
+Shared test doubles.
+
+`FakeCollection` is an in-memory stand-in for a motor collection with just
+enough of MongoDB's query language (`matches`), sort order (`mongo_sort`)
+and update operators for the modules under test. Every read awaits once,
+like a driver round trip, so concurrent callers interleave as they would
+against a real server. Tests import these directly:
+
+    from conftest import FakeCollection
+"""
+
+import asyncio
+import re
+from types import SimpleNamespace
+
+_MISSING = object()
+
+
+def _get(doc, field):
+    value = doc
+    for part in field.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set(doc, field, value):
+    *parents, last = field.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def _unset(doc, field):
+    *parents, last = field.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+
+def _equals(value, operand):
+    if operand is None:
+        return value is _MISSING or value is None
+    return value == operand or (isinstance(value, list) and operand in value)
+
+
+def _compare(value, op, operand):
+    if op == "$eq":
+        return _equals(value, operand)
+    if op == "$ne":
+        return not _equals(value, operand)
+    if op == "$in":
+        return any(_equals(value, candidate) for candidate in operand)
+    if op == "$nin":
+        return not any(_equals(value, candidate) for candidate in operand)
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op == "$all":
+        return isinstance(value, list) and all(item in value for item in operand)
+    if op == "$regex":
+        return isinstance(value, str) and re.search(operand, value) is not None
+    if op in ("$lt", "$lte", "$gt", "$gte"):
+        # Null and missing values never satisfy a range, as in MongoDB
+        if value is _MISSING or value is None or operand is None:
+            return False
+        return {"$lt": value < operand, "$lte": value <= operand,
+                "$gt": value > operand, "$gte": value >= operand}[op]
+    raise NotImplementedError(f"FakeCollection does not support {op}")
+
+
+def matches(doc: dict, query: dict) -> bool:
+    """Whether `doc` matches a MongoDB filter (the operators these tests use)"""
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+            value = _get(doc, key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items() if op != "$options"):
+                return False
+        elif not _equals(_get(doc, key), condition):
+            return False
+    return True
+
+
+def mongo_sort(docs, sort):
+    """`docs` in MongoDB order for `sort`: missing and null values sort before every other value"""
+    docs = list(docs)
+    for field, direction in reversed(list(sort)):
+        if isinstance(direction, dict):
+            continue  # {"$meta": "textScore"}: there are no text scores here
+        def key(doc, field=field):
+            value = _get(doc, field)
+            return (0, 0) if value is _MISSING or value is None else (1, value)
+        docs.sort(key=key, reverse=direction < 0)
+    return docs
+
+
+def apply_update(doc: dict, update: dict, inserting: bool = False) -> None:
+    for field, value in update.get("$set", {}).items():
+        _set(doc, field, value)
+    for field, amount in update.get("$inc", {}).items():
+        current = _get(doc, field)
+        _set(doc, field, (0 if current is _MISSING else current) + amount)
+    for field in update.get("$unset", {}):
+        _unset(doc, field)
+    for field, value in update.get("$push", {}).items():
+        current = _get(doc, field)
+        _set(doc, field, ([] if current is _MISSING else current) + [value])
+    for field, value in update.get("$addToSet", {}).items():
+        current = _get(doc, field)
+        current = [] if current is _MISSING else current
+        _set(doc, field, current if value in current else current + [value])
+    for field, value in update.get("$pull", {}).items():
+        current = _get(doc, field)
+        if isinstance(current, list):
+            _set(doc, field, [item for item in current if item != value])
+    if inserting:
+        for field, value in update.get("$setOnInsert", {}).items():
+            _set(doc, field, value)
+
+
+def _upserted(query: dict) -> dict:
+    """The document an upsert starts from: the filter's equality fields"""
+    doc = {}
+    for field, value in query.items():
+        if not field.startswith("$") and not (isinstance(value, dict) and any(k.startswith("$") for k in value)):
+            _set(doc, field, value)
+    return doc
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    def sort(self, key, direction=None):
+        self.docs = mongo_sort(self.docs, [(key, direction)] if isinstance(key, str) else key)
+        return self
+
+    def skip(self, count):
+        self.docs = self.docs[count:]
+        return self
+
+    def limit(self, count):
+        if count:
+            self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(0)
+        return [dict(doc) for doc in self.docs[:length]]
+
+    def __aiter__(self):
+        async def rows():
+            for doc in self.docs:
+                await asyncio.sleep(0)
+                yield dict(doc)
+        return rows()
+
+
+class FakeCollection:
+    """In-memory collection; `queries` counts reads"""
+
+    def __init__(self, docs=(), name=None):
+        self.docs = [dict(doc) for doc in docs]
+        self.name = name
+        self.queries = 0
+
+    def _matching(self, query, sort=None):
+        docs = [doc for doc in self.docs if matches(doc, query)]
+        return mongo_sort(docs, sort) if sort else docs
+
+    def find(self, query=None, projection=None):
+        self.queries += 1
+        return FakeCursor(self._matching(query))
+
+    async def find_one(self, query=None, projection=None, sort=None):
+        self.queries += 1
+        await asyncio.sleep(0)
+        docs = self._matching(query, sort)
+        return dict(docs[0]) if docs else None
+
+    async def count_documents(self, query):
+        self.queries += 1
+        return len(self._matching(query))
+
+    async def distinct(self, field, query=None):
+        self.queries += 1
+        values = []
+        for doc in self._matching(query):
+            value = _get(doc, field)
+            for item in value if isinstance(value, list) else [value]:
+                if item is not _MISSING and item not in values:
+                    values.append(item)
+        return values
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+        return SimpleNamespace(inserted_id=doc.get("id"))
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs.extend(dict(doc) for doc in docs)
+
+    async def find_one_and_update(self, query, update, projection=None, sort=None, upsert=False,
+                                  return_document=False):
+        """`return_document` is pymongo's ReturnDocument (AFTER is True)"""
+        docs = self._matching(query, sort)
+        if not docs:
+            if not upsert:
+                return None
+            doc = _upserted(query)
+            apply_update(doc, update, inserting=True)
+            self.docs.append(doc)
+            return dict(doc) if return_document else None
+        before = dict(docs[0])
+        apply_update(docs[0], update)
+        return dict(docs[0]) if return_document else before
+
+    async def update_one(self, query, update, upsert=False):
+        docs = self._matching(query)
+        if docs:
+            apply_update(docs[0], update)
+        elif upsert:
+            doc = _upserted(query)
+            apply_update(doc, update, inserting=True)
+            self.docs.append(doc)
+        return SimpleNamespace(matched_count=min(len(docs), 1), modified_count=min(len(docs), 1),
+                               upserted_id=None if docs or not upsert else True)
+
+    async def update_many(self, query, update):
+        docs = self._matching(query)
+        for doc in docs:
+            apply_update(doc, update)
+        return SimpleNamespace(matched_count=len(docs), modified_count=len(docs))
+
+    async def replace_one(self, query, replacement, upsert=False):
+        docs = self._matching(query)
+        if docs:
+            self.docs[self.docs.index(docs[0])] = dict(replacement)
+        elif upsert:
+            self.docs.append(dict(replacement))
+        return SimpleNamespace(matched_count=min(len(docs), 1), modified_count=min(len(docs), 1))
+
+    async def find_one_and_delete(self, query):
+        docs = self._matching(query)
+        if not docs:
+            return None
+        self.docs.remove(docs[0])
+        return dict(docs[0])
+
+    async def delete_one(self, query):
+        docs = self._matching(query)[:1]
+        for doc in docs:
+            self.docs.remove(doc)
+        return SimpleNamespace(deleted_count=len(docs))
+
+    async def delete_many(self, query):
+        docs = self._matching(query)
+        self.docs = [doc for doc in self.docs if not any(doc is deleted for deleted in docs)]
+        return SimpleNamespace(deleted_count=len(docs))
+
+    async def bulk_write(self, requests, ordered=True):
+        """UpdateOne, UpdateMany, ReplaceOne, DeleteOne and InsertOne requests"""
+        modified = upserted = 0
+        for request in requests:
+            kind = type(request).__name__
+            if kind == "InsertOne":
+                await self.insert_one(request._doc)
+            elif kind == "DeleteOne":
+                await self.delete_one(request._filter)
+            elif kind == "ReplaceOne":
+                modified += (await self.replace_one(request._filter, request._doc, request._upsert)).modified_count
+            elif kind == "UpdateMany":
+                modified += (await self.update_many(request._filter, request._doc)).modified_count
+            else:
+                result = await self.update_one(request._filter, request._doc, upsert=bool(request._upsert))
+                modified += result.modified_count
+                upserted += result.upserted_id is not None
+        return SimpleNamespace(modified_count=modified, upserted_count=upserted)
@@ -0,0 +1,95 @@
+"""
+Local debugging SMTP server for tests.
+
+Accepts plain (no TLS, no auth) SMTP on 127.0.0.1 and keeps every message
+in memory. Can also be run by hand to watch outgoing mail:
+
+    python backend/tests/smtp_sink.py 1025
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_USE_SSL=False SMTP_STARTTLS=False
+"""
+
+import socketserver
+import sys
+import threading
+from email import message_from_bytes
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        sink = self.server.sink
+        sink.connections += 1
+        self.reply("220 smtp-sink ready")
+        envelope = {"from": None, "to": []}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 smtp-sink")
+            elif verb == "MAIL":
+                envelope = {"from": command.split(":", 1)[1].strip(), "to": []}
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                envelope["to"].append(command.split(":", 1)[1].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                raw = b"".join(data)
+                if sink.reject_next:
+                    sink.reject_next -= 1
+                    self.reply("451 Temporary failure")
+                    continue
+                sink.messages.append({**envelope, "message": message_from_bytes(raw)})
+                self.reply("250 Queued")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    def __init__(self, port: int = 0):
+        self.messages = []
+        self.connections = 0
+        self.reject_next = 0
+        self._server = _Server(("127.0.0.1", port), _SMTPHandler)
+        self._server.sink = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 1025
+    sink = SMTPSink(port)
+    print(f"📭 SMTP sink listening on 127.0.0.1:{port}")
+    try:
+        sink._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
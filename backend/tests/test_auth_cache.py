@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+import jwt
+import pytest
+from auth_cache import PrincipalCache
+
+SECRET = "test-secret-key-for-principal-cache-tests"
+
+def _token(email, exp_offset=3600):
+    return jwt.encode({"sub": email, "exp": int(time.time() + exp_offset)}, SECRET, algorithm="HS256")
+
+def _cache(users, ttl=30):
+    return PrincipalCache(users, SECRET, ["HS256"], ttl_seconds=ttl)
+
+def test_user_is_loaded_once_and_returned_as_copy():
+    """Test that parallel lookups share one query and callers cannot mutate the cache"""
+    users = FakeCollection([{"email": "a@example.com", "password": "hash", "role": "customer"}])
+    cache = _cache(users)
+
+    async def scenario():
+        results = await asyncio.gather(*[cache.get_user("a@example.com") for _ in range(20)])
+        results[0].pop("password")
+        return results, await cache.get_user("a@example.com")
+
+    results, again = asyncio.run(scenario())
+    assert users.queries == 1
+    assert "password" in again and "password" in results[1]
+
+def test_invalidate_reloads_updated_user():
+    """Test that an explicit invalidation is visible on the next request"""
+    users = FakeCollection([{"email": "a@example.com", "is_active": False}])
+    cache = _cache(users)
+
+    async def scenario():
+        assert (await cache.get_user("a@example.com"))["is_active"] is False
+        users.docs[0]["is_active"] = True
+        assert (await cache.get_user("a@example.com"))["is_active"] is False  # still cached
+        cache.invalidate("a@example.com")
+        return await cache.get_user("a@example.com")
+
+    assert asyncio.run(scenario())["is_active"] is True
+    assert users.queries == 2
+
+def test_token_decode_is_memoized_but_expiry_enforced():
+    """Test payload memoization, bad signatures and expiry on a cached token"""
+    cache = _cache(FakeCollection([]))
+    token = _token("a@example.com")
+    assert cache.decode_token(token)["sub"] == "a@example.com"
+    assert cache.decode_token(token)["sub"] == "a@example.com"
+    assert cache.tokens.stats()["hits"] == 1
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        cache.decode_token(jwt.encode({"sub": "x"}, "another-secret-key-for-principal-cache-tests", algorithm="HS256"))
+    with pytest.raises(jwt.ExpiredSignatureError):
+        cache.decode_token(_token("a@example.com", exp_offset=-10))
+
+    # A memoized payload whose exp has passed is rejected, not served from the cache
+    cached = _token("b@example.com")
+    cache.decode_token(cached)
+    cache.tokens.get(cached)["exp"] = int(time.time()) - 1
+    with pytest.raises(jwt.ExpiredSignatureError):
+        cache.decode_token(cached)
+
+def test_zero_ttl_disables_caching():
+    """Test that AUTH_CACHE_TTL_SECONDS=0 goes to the database every time"""
+    users = FakeCollection([{"email": "a@example.com"}])
+    cache = _cache(users, ttl=0)
+
+    async def scenario():
+        for _ in range(3):
+            await cache.get_user("a@example.com")
+
+    asyncio.run(scenario())
+    assert users.queries == 3 and not cache.enabled
+
+def test_cancelled_lookup_does_not_strand_waiters():
+    """Test a concurrent lookup reloads the user when the request that started the query is cancelled"""
+    users = FakeCollection([{"email": "a@example.com", "role": "customer"}])
+    cache = _cache(users)
+    gate = asyncio.Event()
+    find_one = users.find_one
+
+    async def slow_first_find(query):
+        if users.queries == 0:
+            users.queries += 1
+            await gate.wait()
+        return await find_one(query)
+
+    users.find_one = slow_first_find
+
+    async def scenario():
+        first = asyncio.create_task(cache.get_user("a@example.com"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_user("a@example.com"))
+        await asyncio.sleep(0)
+        first.cancel()
+        user = await asyncio.wait_for(waiter, timeout=1)
+        assert first.cancelled() and user["role"] == "customer"
+
+    asyncio.run(scenario())
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pytest
+from conftest import FakeCollection, FakeCursor, matches
+from availability import (
+    AvailabilityIndex, InvalidDayRange, RoomIntervals, availability_summaries, day_range, expand_day_ranges,
+    unavailable_room_ids
+)
+from room_search import search_filter
+
+def _dt(day, hour=0):
+    return datetime(2025, 6, day, hour)
+
+def _brute_force(intervals, start, end):
+    return sorted(i[2] for i in intervals if i[0] <= end and i[1] >= start)
+
+def test_overlapping_matches_linear_scan():
+    """Test interval lookups against the old scan semantics"""
+    intervals = [
+        (_dt(1), _dt(3), "a"),
+        (_dt(2), _dt(10), "b"),  # long booking that hides behind later starts
+        (_dt(5), _dt(6), "c"),
+        (_dt(12), _dt(14), "d"),
+    ]
+    index = RoomIntervals(intervals)
+    for start_day in range(1, 16):
+        for end_day in range(start_day, 16):
+            start, end = _dt(start_day), _dt(end_day, 23)
+            found = sorted(i[2] for i in index.overlapping(start, end))
+            assert found == _brute_force(intervals, start, end)
+
+def test_booked_and_free_ranges_are_compressed():
+    """Test that touching bookings merge and gaps become free ranges"""
+    index = RoomIntervals([
+        (_dt(3, 9), _dt(4, 18), "a"),
+        (_dt(5, 9), _dt(5, 18), "b"),
+        (_dt(9, 9), _dt(20, 18), "c"),
+    ])
+    start, end = _dt(1), _dt(10, 23)
+    assert index.booked_ranges(start, end) == [(date(2025, 6, 3), date(2025, 6, 5)), (date(2025, 6, 9), date(2025, 6, 10))]
+    assert index.free_ranges(start, end) == [(date(2025, 6, 1), date(2025, 6, 2)), (date(2025, 6, 6), date(2025, 6, 8))]
+    assert expand_day_ranges(index.booked_ranges(start, end)) == [
+        "2025-06-03", "2025-06-04", "2025-06-05", "2025-06-09", "2025-06-10"
+    ]
+
+def test_aware_query_dates_compare_with_naive_bookings():
+    """Test that request datetimes with an offset are normalised to UTC"""
+    index = RoomIntervals([(_dt(3, 10), _dt(3, 12), "a")])
+    aware_start = datetime(2025, 6, 3, 14, tzinfo=timezone(timedelta(hours=3)))
+    assert [i[2] for i in index.overlapping(aware_start, aware_start + timedelta(hours=1))] == ["a"]
+
+def test_index_is_single_flight_and_invalidated():
+    """Test concurrent loads share one query and invalidation forces a reload"""
+    bookings = FakeCollection([{"id": "a", "room_id": "r1", "status": "confirmed", "start_date": _dt(1), "end_date": _dt(2)}])
+    index = AvailabilityIndex(bookings, ttl_seconds=60)
+
+    async def scenario():
+        results = await asyncio.gather(*[index.check("r1", _dt(1), _dt(1, 12)) for _ in range(5)])
+        assert all(not r["is_available"] for r in results)
+        assert bookings.queries == 1
+
+        bookings.docs.append({"id": "b", "room_id": "r1", "status": "pending", "start_date": _dt(5), "end_date": _dt(6)})
+        assert (await index.check("r1", _dt(5), _dt(5)))["is_available"]
+        index.invalidate("r1")
+        assert (await index.check("r1", _dt(5), _dt(5)))["conflicting_bookings"] == ["b"]
+        assert bookings.queries == 2
+
+    asyncio.run(scenario())
+
+def test_cancelled_loader_does_not_strand_waiters():
+    """Test a waiter reloads when the request loading the room is cancelled mid-query"""
+    bookings = FakeCollection([{"id": "a", "room_id": "r1", "status": "confirmed", "start_date": _dt(1), "end_date": _dt(2)}])
+    index = AvailabilityIndex(bookings, ttl_seconds=60)
+    gate = asyncio.Event()
+    original_load = index._load
+
+    async def slow_first_load(room_id):
+        if bookings.queries == 0:
+            bookings.queries += 1
+            await gate.wait()
+        return await original_load(room_id)
+
+    index._load = slow_first_load
+
+    async def scenario():
+        first = asyncio.create_task(index.get("r1"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(index.check("r1", _dt(1), _dt(1, 12)))
+        await asyncio.sleep(0)
+        first.cancel()
+        result = await asyncio.wait_for(waiter, timeout=1)
+        assert first.cancelled() and result["conflicting_bookings"] == ["a"]
+
+    asyncio.run(scenario())
+
+def test_invalidation_during_a_load_is_not_cached_or_remembered():
+    """Test a load raced by an invalidation is not cached and invalidated rooms leave no state behind"""
+    bookings = FakeCollection([{"id": "a", "room_id": "r1", "status": "confirmed", "start_date": _dt(1), "end_date": _dt(2)}])
+    index = AvailabilityIndex(bookings, ttl_seconds=60)
+
+    async def scenario():
+        stale = asyncio.create_task(index.get("r1"))
+        await asyncio.sleep(0)
+        index.invalidate("r1")
+        await stale
+        assert index.stats()["rooms_cached"] == 0
+        await index.get("r1")
+        await index.get("r1")
+        assert bookings.queries == 2 and index.stats()["rooms_cached"] == 1
+        for room in range(100):
+            index.invalidate(f"room-{room}")
+        index.clear()
+        assert index.stats()["rooms_cached"] == 0 and index._loading == {}
+
+    asyncio.run(scenario())
+
+def test_day_range_covers_the_end_date_and_rejects_bad_input():
+    """Test YYYY-MM-DD bounds become an inclusive range, and malformed or reversed ranges are refused"""
+    assert day_range("2025-06-03", "2025-06-05") == (_dt(3), _dt(6) - timedelta(microseconds=1))
+    assert day_range("2025-06-03", "2025-06-03")[1] == datetime(2025, 6, 3, 23, 59, 59, 999999)
+    for start, end in [("2025-06-3x", "2025-06-05"), ("03.06.2025", "2025-06-05"), ("2025-06-03", None),
+                       ("2025-06-05", "2025-06-04")]:
+        with pytest.raises(InvalidDayRange):
+            day_range(start, end)
+
+class _FakeBookings(FakeCollection):
+    """The shared fake plus the $match/$group-by-room aggregation"""
+
+    def aggregate(self, pipeline):
+        grouped = {}
+        for booking in self.docs:
+            if matches(booking, pipeline[0]["$match"]):
+                grouped.setdefault(booking["room_id"], []).append(
+                    {"id": booking["id"], "start_date": booking["start_date"], "end_date": booking["end_date"]}
+                )
+        return FakeCursor([{"_id": room_id, "bookings": rows} for room_id, rows in grouped.items()])
+
+BOOKINGS = [
+    {"id": "a", "room_id": "r1", "status": "confirmed", "start_date": _dt(4, 9), "end_date": _dt(4, 17)},
+    {"id": "b", "room_id": "r1", "status": "pending", "start_date": _dt(5), "end_date": _dt(8)},
+    {"id": "c", "room_id": "r2", "status": "cancelled", "start_date": _dt(4), "end_date": _dt(4, 12)},
+    {"id": "d", "room_id": "r3", "status": "confirmed", "start_date": _dt(1), "end_date": _dt(2, 23)},
+    {"id": "e", "room_id": "r4", "status": "pending", "start_date": _dt(5, 22), "end_date": _dt(9)},
+]
+
+def test_booked_rooms_are_excluded_from_the_room_filter():
+    """Test available_from/available_to excludes rooms with an overlapping active booking from the search"""
+    bookings = _FakeBookings(BOOKINGS)
+    booked = asyncio.run(unavailable_room_ids(bookings, "2025-06-03", "2025-06-05"))
+    assert sorted(booked) == ["r1", "r4"]
+
+    rooms = FakeCollection([{"room_id": f"r{i}", "capacity": 50} for i in range(1, 6)])
+    query = search_filter(min_capacity=10, exclude_room_ids=booked, price_field="price_per_day")
+    available = asyncio.run(rooms.find(query).to_list(None))
+    assert [room["room_id"] for room in available] == ["r2", "r3", "r5"]
+
+    assert asyncio.run(unavailable_room_ids(bookings, None, None)) is None
+    for start, end in [("2025-06-03", None), (None, "2025-06-05"), ("2025-06-05", "2025-06-03")]:
+        with pytest.raises(InvalidDayRange):
+            asyncio.run(unavailable_room_ids(bookings, start, end))
+
+def test_batch_summaries_per_room():
+    """Test the batch answer has one summary per distinct room, with conflicts and clipped booked ranges"""
+    start, end = day_range("2025-06-03", "2025-06-06")
+    summaries = asyncio.run(availability_summaries(_FakeBookings(BOOKINGS), ["r1", "r2", "r9", "r1"], start, end))
+    assert list(summaries) == ["r1", "r2", "r9"]
+    assert summaries["r1"] == {
+        "is_available": False,
+        "conflicting_bookings": 2,
+        "booked_ranges": [{"start": "2025-06-04", "end": "2025-06-06"}],
+    }
+    assert summaries["r2"] == summaries["r9"] == {"is_available": True, "conflicting_bookings": 0, "booked_ranges": []}
@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+from blob_store import BlobStore, blob_hash, content_hash_of, file_extension, legacy_orphans, safe_extension
+from uploads import StoredUpload, UploadWriter
+
+def _upload(tmp_path, name, data):
+    path = tmp_path / "incoming" / name
+    path.parent.mkdir(exist_ok=True)
+    path.write_bytes(data)
+    return StoredUpload(path, len(data), hashlib.sha256(data).hexdigest())
+
+def test_identical_uploads_share_one_blob_until_the_last_release(tmp_path):
+    """Test the same bytes uploaded twice are stored once, and deleted with their variants at refcount zero"""
+    blobs = FakeCollection()
+    writer = UploadWriter(max_workers=1)
+    store = BlobStore(blobs, tmp_path / "blobs", writer)
+    data = os.urandom(500)
+
+    async def scenario():
+        first = await store.ingest(_upload(tmp_path, "a.upload", data), "JPG", "image/jpeg")
+        second = await store.ingest(_upload(tmp_path, "b.upload", data), "jpg", "image/jpeg")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    sha = hashlib.sha256(data).hexdigest()
+    assert first.created and not second.created
+    assert first.filename == second.filename == f"{sha}.jpg" and blob_hash(first.filename) == sha
+    assert blobs.docs[0]["refcount"] == 2 and store.path_for(first.filename).read_bytes() == data
+    assert list((tmp_path / "incoming").iterdir()) == []
+
+    variant = store.directory_for(sha) / f"{sha}_w320.webp"
+    variant.write_bytes(b"variant")
+    assert content_hash_of(variant.name) == sha
+    assert asyncio.run(store.release(sha)) is False and store.path_for(first.filename).exists()
+    assert asyncio.run(store.release(sha)) is True
+    assert list(store.directory_for(sha).iterdir()) == [] and blobs.docs == []
+    assert store.stats() == {"ingested": 1, "deduplicated": 1, "released": 2, "deleted": 1}
+    writer.shutdown()
+
+def test_extensions_are_whitelisted():
+    """Test client extensions with path or URL characters, or none at all, fall back to the content type"""
+    assert file_extension("Tour.MP4", "video/mp4") == "mp4"
+    assert file_extension("a.mp4/../../x", "video/mp4") == "mp4"
+    assert file_extension("clip.mp4?x=1#frag", "video/quicktime") == "mov"
+    assert file_extension("video", "video/mp4") == "mp4"
+    assert file_extension("a.verylongextension", None) == "bin"
+    assert safe_extension("../jpg", "image/jpeg") == "jpg" and safe_extension("webp") == "webp"
+
+def test_collect_garbage_recounts_from_documents_and_removes_strays(tmp_path):
+    """Test GC fixes drifted counts, deletes unreferenced blobs and stray files, and honours the grace period"""
+    kept, dropped, recent, stray = (hashlib.sha256(name).hexdigest() for name in (b"kept", b"dropped", b"recent", b"stray"))
+    old = datetime.now(timezone.utc) - timedelta(days=1)
+    blobs = FakeCollection([
+        {"sha256": kept, "filename": f"{kept}.jpg", "refcount": 5, "referenced_at": old},
+        {"sha256": dropped, "filename": f"{dropped}.mp4", "refcount": 1, "referenced_at": old},
+        {"sha256": recent, "filename": f"{recent}.jpg", "refcount": 1, "referenced_at": datetime.now(timezone.utc)},
+    ])
+    db = {
+        "hotels": FakeCollection([{"id": "h1", "images": [f"/api/images/hotels/{kept}.jpg", "/api/images/hotels/h1_old.jpg"]}]),
+        "conference_rooms": FakeCollection([{"id": "r1", "images": [f"/api/images/rooms/{kept}.jpg"], "videos": []}]),
+    }
+    writer = UploadWriter(max_workers=1)
+    store = BlobStore(blobs, tmp_path / "blobs", writer)
+    for sha, ext in ((kept, "jpg"), (dropped, "mp4"), (recent, "jpg"), (stray, "png")):
+        path = store.path_for(f"{sha}.{ext}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+    dry = asyncio.run(store.collect_garbage(db, dry_run=True))
+    assert dry == {"blobs": 3, "recounted": 2, "deleted": 1, "stray_files": 1}
+    assert len(blobs.docs) == 3 and store.path_for(f"{stray}.png").exists()
+
+    report = asyncio.run(store.collect_garbage(db))
+    assert report == dry
+    assert {doc["sha256"]: doc["refcount"] for doc in blobs.docs} == {kept: 2, recent: 1}
+    assert not store.path_for(f"{dropped}.mp4").exists() and not store.path_for(f"{stray}.png").exists()
+    assert store.path_for(f"{recent}.jpg").exists()
+    writer.shutdown()
+
+def test_legacy_orphans_skip_referenced_and_recent_files(tmp_path):
+    """Test per-upload named files are orphaned only when unreferenced and older than the grace period"""
+    hotels = tmp_path / "hotels"
+    (hotels / "variants").mkdir(parents=True)
+    old = time.time() - 7200
+    for name in ("h1_a.jpg", "h1_b.jpg", "variants/h1_a_w320.webp", "variants/h1_b_w320.webp"):
+        (hotels / name).write_bytes(b"x")
+        os.utime(hotels / name, (old, old))
+    (hotels / "h2_new.jpg").write_bytes(b"x")
+
+    orphans = legacy_orphans([hotels, tmp_path / "missing"], {"h1_a.jpg"}, grace_seconds=3600)
+    assert sorted(p.relative_to(hotels).as_posix() for p in orphans) == ["h1_b.jpg", "variants/h1_b_w320.webp"]
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+from booking_owners import backfill, booking_manager_id, set_hotel_manager
+
+def _db():
+    return SimpleNamespace(
+        hotels=FakeCollection([{"id": "h1", "manager_id": "m1"}, {"id": "h2", "manager_id": "m2"}]),
+        conference_rooms=FakeCollection([{"id": "r1", "hotel_id": "h1"}, {"id": "r2", "hotel_id": "h2"},
+                                          {"id": "r3", "hotel_id": "gone"}]),
+        bookings=FakeCollection([{"id": "b1", "room_id": "r1"},
+                                  {"id": "b2", "room_id": "r2", "hotel_id": "h2", "manager_id": "old"},
+                                  {"id": "b3", "room_id": "r2", "hotel_id": "h2", "manager_id": "m2"},
+                                  {"id": "b4", "room_id": "r3"}]),
+    )
+
+def test_backfill_sets_missing_and_stale_owners():
+    """Test that the backfill fills legacy bookings, repairs stale copies and is idempotent"""
+    db = _db()
+    assert asyncio.run(backfill(db, batch_size=1)) == 2
+    owners = {b["id"]: (b.get("hotel_id"), b.get("manager_id")) for b in db.bookings.docs}
+    assert owners == {"b1": ("h1", "m1"), "b2": ("h2", "m2"), "b3": ("h2", "m2"), "b4": (None, None)}
+    assert asyncio.run(backfill(db)) == 0
+
+def test_manager_change_and_legacy_lookup():
+    """Test manager propagation and the room/hotel fallback for bookings without a copy"""
+    db = _db()
+    assert asyncio.run(set_hotel_manager(db, "h2", "m9")) == 2
+    assert asyncio.run(booking_manager_id(db, db.bookings.docs[1])) == "m9"
+    assert db.hotels.queries == 0
+
+    assert asyncio.run(booking_manager_id(db, db.bookings.docs[0])) == "m1"
+    assert asyncio.run(booking_manager_id(db, db.bookings.docs[3])) is None
@@ -0,0 +1,46 @@
+import os
+import sys
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard import booking_date_match, dashboard_stats_pipeline, shape_dashboard_stats
+
+def test_pipeline_is_one_round_trip_with_date_filter():
+    """Test the join order, the booking date filter and the facets"""
+    start, end = datetime(2026, 1, 1), datetime(2026, 1, 31, 23, 59)
+    pipeline = dashboard_stats_pipeline({"manager_id": "m1"}, booking_date_match(start, end), per_hotel=True)
+
+    assert pipeline[0] == {"$match": {"manager_id": "m1"}}
+    lookups = [stage["$lookup"] for stage in pipeline if "$lookup" in stage]
+    assert [(l["from"], l["localField"], l["foreignField"]) for l in lookups] == [
+        ("conference_rooms", "id", "hotel_id"),
+        ("bookings", "room.id", "room_id"),
+    ]
+    assert lookups[1]["pipeline"][0] == {"$match": {"start_date": {"$gte": start, "$lte": end}}}
+    assert set(pipeline[-1]["$facet"]) == {"totals", "recent_bookings", "hotels"}
+    assert {"$limit": 10} in pipeline[-1]["$facet"]["recent_bookings"]
+
+    revenue = pipeline[-1]["$facet"]["totals"][0]["$group"]["total_revenue"]
+    assert "$booking.total_price" in str(revenue) and "total_amount" not in str(revenue)
+
+def test_optional_parts_are_left_out():
+    """Test open-ended date ranges and the per-hotel breakdown switch"""
+    assert booking_date_match(None, None) == {}
+    assert booking_date_match(datetime(2026, 1, 1), None) == {"start_date": {"$gte": datetime(2026, 1, 1)}}
+    pipeline = dashboard_stats_pipeline({})
+    assert "hotels" not in pipeline[-1]["$facet"]
+    assert pipeline[4]["$lookup"]["pipeline"] == [{"$project": {"_id": 0}}]
+
+def test_shape_handles_empty_and_full_results():
+    """Test the response for a manager without hotels and with data"""
+    empty = shape_dashboard_stats([{"totals": [], "recent_bookings": []}])
+    assert empty["total_hotels"] == 0 and empty["total_revenue"] == 0 and empty["recent_bookings"] == []
+
+    stats = shape_dashboard_stats([{
+        "totals": [{"total_hotels": 2, "total_bookings": 3, "confirmed_bookings": 2, "pending_bookings": 1,
+                    "cancelled_bookings": 0, "completed_bookings": 0, "total_revenue": 1500.0}],
+        "recent_bookings": [{"id": "b1"}],
+        "hotels": [{"hotel_id": "h1", "total_bookings": 3}],
+    }], per_hotel=True)
+    assert stats["total_revenue"] == 1500.0 and stats["confirmed_bookings"] == 2
+    assert stats["recent_bookings"] == [{"id": "b1"}]
+    assert stats["hotels"][0]["hotel_id"] == "h1"
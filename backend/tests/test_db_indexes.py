@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pymongo.errors import OperationFailure
+from db_indexes import INDEX_SPECS, IndexSpec, check_indexes, diff_indexes, ensure_indexes
+
+def test_index_names_are_unique_per_collection():
+    """Test that generated index names never collide inside a collection"""
+    seen = set()
+    for spec in INDEX_SPECS:
+        key = (spec.collection, spec.index_name)
+        assert key not in seen
+        seen.add(key)
+
+def test_diff_reports_missing_and_extra():
+    """Test missing/extra detection against index_information() output"""
+    specs = [
+        IndexSpec("users", (("id", 1),), unique=True),
+        IndexSpec("users", (("email", 1),), unique=True),
+    ]
+    existing = {
+        "_id_": {"key": [("_id", 1)]},
+        "id_1": {"key": [("id", 1)], "unique": True},
+        "legacy_name_1": {"key": [("name", 1)]},
+    }
+    missing, extra = diff_indexes(specs, existing)
+    assert [spec.index_name for spec in missing] == ["email_1"]
+    assert extra == ["legacy_name_1"]
+
+def test_diff_treats_option_mismatch_as_missing():
+    """Test that a non-unique index does not satisfy a unique declaration"""
+    specs = [IndexSpec("users", (("email", 1),), unique=True)]
+    existing = {"email_1": {"key": [("email", 1)]}}
+    missing, extra = diff_indexes(specs, existing)
+    assert len(missing) == 1
+    assert extra == ["email_1"]
+
+def test_text_index_matches_its_weights():
+    """Test that a text index reported as _fts/_ftsx satisfies its declaration"""
+    specs = [IndexSpec("room_search", (("text", "text"),), default_language="none")]
+    existing = {"text_text": {"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {"text": 1},
+                              "default_language": "none"}}
+    assert diff_indexes(specs, existing) == ([], [])
+
+def test_diff_detects_ttl_and_text_option_changes():
+    """Test that a changed TTL, text language or text weight makes the index missing"""
+    ttl = [IndexSpec("upload_sessions", (("expires_at", 1),), expire_after_seconds=0)]
+    assert diff_indexes(ttl, {"expires_at_1": {"key": [("expires_at", 1)], "expireAfterSeconds": 0}}) == ([], [])
+    missing, extra = diff_indexes(ttl, {"expires_at_1": {"key": [("expires_at", 1)], "expireAfterSeconds": 3600}})
+    assert len(missing) == 1 and extra == ["expires_at_1"]
+    assert len(diff_indexes(ttl, {"expires_at_1": {"key": [("expires_at", 1)]}})[0]) == 1
+
+    text = [IndexSpec("room_search", (("text", "text"),), default_language="none")]
+    english = {"text_text": {"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {"text": 1}}}
+    weighted = {"text_text": {"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {"text": 5},
+                              "default_language": "none"}}
+    assert len(diff_indexes(text, english)[0]) == 1 and len(diff_indexes(text, weighted)[0]) == 1
+
+class _FakeIndexedCollection:
+    """Enforces MongoDB's same-key/same-name index conflicts"""
+
+    def __init__(self, indexes):
+        self.indexes = dict(indexes)
+        self.calls = []
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def create_index(self, keys, name, unique=False, sparse=False, background=True, **options):
+        for existing_name, info in self.indexes.items():
+            if existing_name == name or info["key"] == keys:
+                raise OperationFailure("Index already exists with different options", code=85)
+        self.indexes[name] = {"key": keys, "unique": unique, "sparse": sparse,
+                              **({"expireAfterSeconds": options["expireAfterSeconds"]}
+                                 if "expireAfterSeconds" in options else {})}
+        self.calls.append(("create", name))
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+        self.calls.append(("drop", name))
+
+def test_ensure_replaces_same_key_index_with_other_options():
+    """Test the conflicting index is dropped before its replacement is created, even without drop_extra"""
+    sessions = _FakeIndexedCollection({
+        "_id_": {"key": [("_id", 1)]},
+        "expires_at_1": {"key": [("expires_at", 1)]},
+        "legacy_1": {"key": [("legacy", 1)]},
+    })
+    specs = [IndexSpec("upload_sessions", (("expires_at", 1),), expire_after_seconds=0)]
+
+    report = asyncio.run(ensure_indexes({"upload_sessions": sessions}, specs))["upload_sessions"]
+    assert sessions.calls == [("drop", "expires_at_1"), ("create", "expires_at_1")]
+    assert sessions.indexes["expires_at_1"]["expireAfterSeconds"] == 0
+    assert report == {"created": ["expires_at_1"], "failed": [], "extra": ["legacy_1"], "dropped": ["expires_at_1"]}
+    assert asyncio.run(check_indexes({"upload_sessions": sessions}, specs))["upload_sessions"]["missing"] == []
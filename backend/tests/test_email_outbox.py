@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+from datetime import datetime, timedelta
+from email_outbox import EmailOutbox, SMTPSender
+from email_service import EmailService
+from smtp_sink import SMTPSink
+
+def _service(port):
+    service = EmailService()
+    service.smtp_host, service.smtp_port = "127.0.0.1", port
+    service.smtp_use_ssl = service.smtp_starttls = False
+    service.smtp_password = None
+    return service
+
+def test_outbox_batches_over_one_connection():
+    """Test that the request path only enqueues and the worker reuses one SMTP connection"""
+    with SMTPSink() as sink:
+        service = _service(sink.port)
+        collection = FakeCollection()
+        outbox = EmailOutbox(collection, service.smtp_sender(), service.build_outbox_message, batch_size=10)
+        service.attach_outbox(outbox)
+
+        async def scenario():
+            for i in range(3):
+                assert service.send_email(f"user{i}@example.com", f"Rezervasyon {i}", "<p>ok</p>", "ok")
+            await asyncio.sleep(0)
+            assert sink.messages == []  # nothing sent inline
+            assert await outbox.process_batch() == 3
+            service.send_booking_reminder("late@example.com", "Ayşe", {
+                "hotel_name": "Otel", "room_name": "Salon A", "date": "01.01.2026",
+                "time": "10:00", "address": "İstanbul",
+            })
+            await asyncio.sleep(0)
+            assert await outbox.process_batch() == 1
+            stats = await outbox.stats()
+            await outbox.stop()
+            return stats
+
+        stats = asyncio.run(scenario())
+
+    assert [m["message"]["To"] for m in sink.messages[:3]] == [f"user{i}@example.com" for i in range(3)]
+    assert sink.connections == 1
+    assert stats["sent"] == 4 and stats["queued"] == 0
+    assert all(doc["status"] == "sent" for doc in collection.docs)
+
+def test_failed_sends_back_off_then_dead_letter():
+    """Test retry scheduling with backoff and the failed state after max attempts"""
+    with SMTPSink() as sink:
+        sink.reject_next = 10
+        service = _service(sink.port)
+        collection = FakeCollection()
+        outbox = EmailOutbox(collection, service.smtp_sender(), service.build_outbox_message,
+                             max_attempts=2, base_backoff_seconds=60)
+
+        async def scenario():
+            await outbox.enqueue("guest@example.com", "Konu", "<p>x</p>")
+            assert await outbox.process_batch() == 1
+            doc = collection.docs[0]
+            assert doc["status"] == "pending" and doc["attempts"] == 1
+            assert doc["next_attempt_at"] > datetime.utcnow() + timedelta(seconds=40)
+            assert await outbox.process_batch() == 0  # not due yet
+
+            doc["next_attempt_at"] = datetime.utcnow()
+            assert await outbox.process_batch() == 1
+            await outbox.stop()
+
+        asyncio.run(scenario())
+
+    doc = collection.docs[0]
+    assert doc["status"] == "failed" and doc["attempts"] == 2
+    assert "451" in doc["last_error"]
+    assert outbox.retried == 1 and outbox.failed == 1
+
+def test_sender_reconnects_after_idle_timeout():
+    """Test that an idle SMTP connection is replaced before the next batch"""
+    with SMTPSink() as sink:
+        sender = SMTPSender("127.0.0.1", sink.port, use_ssl=False, starttls=False, idle_timeout=0)
+        service = _service(sink.port)
+        message = service.build_message("a@example.com", "Konu", "<p>x</p>")
+        assert sender.send_batch([message]) == [None]
+        assert sender.send_batch([message]) == [None]
+        sender.close()
+    assert sender.connections_opened == 2
+    assert len(sink.messages) == 2
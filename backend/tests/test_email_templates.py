@@ -0,0 +1,39 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datetime import datetime
+from email_templates import EmailTemplates
+
+templates = EmailTemplates(app_url="https://example.test")
+
+def test_all_templates_compile_and_render():
+    """Test that every template renders with the shared layout and N/A defaults"""
+    context = {
+        "user_name": "Ayşe", "hotel_name": "Otel", "reason": "", "verification_token": None,
+        "login_time": datetime(2026, 1, 2, 9, 30), "ip_address": "1.2.3.4", "now": datetime(2026, 1, 2, 9, 30),
+        "booking": {}, "hotel": {}, "room": {}, "review": {"rating": 3},
+    }
+    assert "welcome" in templates.names and "_layout" not in templates.names
+    for name in templates.names:
+        html = templates.render(name, **context)
+        assert html.strip(), name
+    assert "N/A" in templates.render("booking_approved", **context)
+    assert "02.01.2026 09:30" in templates.render("login_notification", **context)
+    assert "⭐⭐⭐ (3/5)" in templates.render("admin_new_review", **context)
+
+def test_render_escapes_and_uses_globals():
+    """Test that user input is HTML-escaped and app_url comes from globals"""
+    html = templates.render("booking_rejected", user_name="<b>x</b>", booking={"hotel_name": "A & B"}, reason="Dolu")
+    assert "&lt;b&gt;x&lt;/b&gt;" in html and "A &amp; B" in html
+    assert "Red Nedeni" in html
+    assert 'href="https://example.test/rooms"' in html
+    assert "Red Nedeni" not in templates.render("booking_rejected", user_name="x", booking={}, reason="")
+
+def test_render_many_personalizes_each_message():
+    """Test bulk rendering with shared and per-recipient values"""
+    reminders = [{"user_name": f"Kişi {i}", "booking": {"room_name": f"Salon {i}"}} for i in range(5)]
+    bodies = templates.render_many("booking_reminder", reminders)
+    assert len(bodies) == 5
+    for i, body in enumerate(bodies):
+        assert f"Kişi {i}" in body and f"Salon {i}" in body
+    assert bodies[0] == templates.render("booking_reminder", **reminders[0])
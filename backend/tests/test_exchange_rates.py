@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+from exchange_rates import ExchangeRateCache
+
+CURRENCIES = ["USD", "EUR", "TRY"]
+RATES = {
+    "USD": {"EUR": 0.9, "TRY": 34.0},
+    "EUR": {"USD": 1.1, "TRY": 37.0},
+    "TRY": {"USD": 0.03, "EUR": 0.027},
+}
+
+def _counting_fetcher(calls, delay=0.01):
+    async def fetch(base):
+        calls.append(base)
+        await asyncio.sleep(delay)
+        return RATES[base]
+    return fetch
+
+def test_concurrent_refreshes_are_single_flight():
+    """Test that a burst of refreshes hits the external API once per base"""
+    calls = []
+    cache = ExchangeRateCache(FakeCollection(), CURRENCIES, fetcher=_counting_fetcher(calls))
+
+    async def scenario():
+        await asyncio.gather(*[cache.refresh() for _ in range(10)])
+
+    asyncio.run(scenario())
+    assert sorted(calls) == sorted(CURRENCIES)
+    assert cache.get_rate("EUR", "TRY") == 37.0
+    assert cache.get_rate("TRY", "TRY") == 1.0
+
+def test_stale_rates_are_served_while_revalidating():
+    """Test stale-while-revalidate: lookups return the old rate immediately"""
+    stored = [{
+        "cache_key": ExchangeRateCache.cache_key("EUR", "TRY"),
+        "rate": 30.0,
+        "created_at": datetime.utcnow() - timedelta(days=3),
+    }]
+    calls = []
+    collection = FakeCollection(stored)
+    cache = ExchangeRateCache(collection, CURRENCIES, fetcher=_counting_fetcher(calls))
+
+    async def scenario():
+        assert await cache.load() == 1
+        assert cache.get_rate("EUR", "TRY") == 30.0  # stale but served
+        await cache.refresh()
+        assert cache.get_rate("EUR", "TRY") == 37.0
+
+    asyncio.run(scenario())
+    assert any(d["rate"] == 37.0 for d in collection.docs)
+
+def test_missing_pair_falls_back_without_waiting():
+    """Test that an unknown pair never blocks and uses the inverse when known"""
+    async def partial(base):
+        if base != "EUR":
+            raise RuntimeError("offline")
+        return {"USD": 1.25, "TRY": 37.0}
+
+    cache = ExchangeRateCache(FakeCollection(), CURRENCIES, fetcher=partial)
+
+    async def scenario():
+        assert cache.get_rate("USD", "EUR") == 1.0
+        await cache.refresh()
+        assert cache.get_rate("USD", "EUR") == 0.8
+
+    asyncio.run(scenario())
+    assert cache.refresh_failures == 2
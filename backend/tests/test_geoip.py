@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from caching import TTLCache
+from geoip import GeoIPLocator, RangeFileResolver
+
+RANGES_CSV = """start_ip,end_ip,country
+1.0.0.0,1.0.0.255,AU
+78.160.0.0,78.191.255.255,TR
+3232235520,3232301055,ZZ
+2a02:ff0::,2a02:ff0:ffff:ffff:ffff:ffff:ffff:ffff,TR
+"""
+
+class _CountingResolver:
+    name = "counting"
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    async def resolve(self, ip):
+        self.calls += 1
+        return self.answer
+
+def test_range_file_binary_search(tmp_path):
+    """Test offline range lookups for IPv4, integer rows and IPv6"""
+    path = tmp_path / "ranges.csv"
+    path.write_text(RANGES_CSV)
+    resolver = RangeFileResolver(str(path))
+    assert resolver.lookup(int.from_bytes(bytes([78, 170, 1, 2]), "big")) == "TR"
+    assert resolver.lookup(int.from_bytes(bytes([1, 0, 0, 7]), "big")) == "AU"
+    assert resolver.lookup(int.from_bytes(bytes([1, 0, 1, 0]), "big")) is None
+    assert resolver.lookup(3232235777) == "ZZ"
+
+    locator = GeoIPLocator([resolver], TTLCache())
+    assert asyncio.run(locator.country_for("2a02:ff0::1234")) == "TR"
+
+def test_locator_caches_per_network():
+    """Test that addresses in one /24 share a single resolver call"""
+    resolver = _CountingResolver("DE")
+    locator = GeoIPLocator([resolver], TTLCache())
+
+    async def scenario():
+        for last_octet in range(1, 50):
+            assert await locator.country_for(f"93.184.216.{last_octet}") == "DE"
+        assert await locator.country_for("93.184.217.1") == "DE"
+        assert await locator.country_for("127.0.0.1") == "TR"
+        assert await locator.country_for("testclient") == "TR"
+
+    asyncio.run(scenario())
+    assert resolver.calls == 2
+    assert locator.stats()["cache"]["hits"] == 48
+
+def test_cache_is_bounded_by_entries_and_bytes():
+    """Test LRU eviction by entry count and by the byte budget"""
+    cache = TTLCache(max_entries=3)
+    for key in "abcd":
+        cache.set(key, key.upper())
+    assert "a" not in cache and len(cache) == 3
+    cache.get("b")
+    cache.set("e", "E")
+    assert "c" not in cache and "b" in cache
+
+    sized = TTLCache(max_entries=1000, max_bytes=100, sizeof=lambda key, value: 40)
+    for key in range(5):
+        sized.set(key, "x")
+    assert len(sized) == 2 and sized.current_bytes == 80
+    assert sized.stats()["evictions"] == 3
+
+def test_cache_entries_expire():
+    """Test TTL expiry counts as a miss"""
+    cache = TTLCache(ttl_seconds=60)
+    cache.set("fresh", 1)
+    cache.set("old", 2, ttl_seconds=-1)
+    assert cache.get("fresh") == 1
+    assert cache.get("old") is None
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,26 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+from hotel_keys import backfill, hotel_keys
+
+def test_hotel_keys_only_for_fields_present():
+    """Test keys are derived only from the fields being written"""
+    assert hotel_keys({"name": "Çırağan Palace", "city": "İstanbul"}) == {"name_key": "ciragan palace", "city_key": "istanbul"}
+    assert hotel_keys({"city": "IZMIR", "star_rating": 5}) == {"city_key": "izmir"}
+    assert hotel_keys({"updated_at": 1}) == {}
+
+def test_backfill_sets_missing_and_stale_keys_once():
+    """Test backfill writes only hotels whose keys are missing or stale, and is idempotent"""
+    hotels = FakeCollection([
+        {"id": "h1", "name": "Grand", "city": "İstanbul"},
+        {"id": "h2", "name": "Deniz", "city": "Muğla", "city_key": "mugla", "name_key": "deniz"},
+        {"id": "h3", "name": "Kale", "city": "Şanlıurfa", "city_key": "sanliurfa", "name_key": "old"},
+    ])
+    db = SimpleNamespace(hotels=hotels)
+    assert asyncio.run(backfill(db, batch_size=1)) == 2
+    assert hotels.docs[0]["city_key"] == "istanbul" and hotels.docs[2]["name_key"] == "kale"
+    assert asyncio.run(backfill(db)) == 0
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+from hotel_stats import HotelStatsRollup, booking_delta
+
+DAY = datetime(2026, 5, 4)
+NEXT_DAY = DAY + timedelta(days=1)
+
+class _Status(str, Enum):
+    CONFIRMED = "confirmed"
+    PAID = "paid"
+
+def _booking(**changes):
+    booking = {"id": "b1", "room_id": "r1", "start_date": datetime(2026, 5, 4, 9), "status": "pending",
+               "payment_status": "pending", "total_price": 1200.0, "total_days": 2}
+    booking.update(changes)
+    return booking
+
+def test_delta_for_create_status_and_payment_changes():
+    """Test counter deltas for the booking lifecycle"""
+    created = booking_delta(None, _booking(), "h1")
+    assert created == {("h1", DAY): {"bookings": 1, "status_counts.pending": 1, "room_days": 1},
+                       ("h1", NEXT_DAY): {"room_days": 1}}
+
+    confirmed = booking_delta(_booking(), _booking(status=_Status.CONFIRMED), "h1")
+    assert confirmed == {("h1", DAY): {"status_counts.pending": -1, "status_counts.confirmed": 1}}
+
+    paid = booking_delta(_booking(status="confirmed"), _booking(status="confirmed", payment_status=_Status.PAID), "h1")
+    assert paid == {("h1", DAY): {"paid_bookings": 1, "paid_revenue": 1200.0}}
+
+    cancelled = booking_delta(_booking(status="confirmed"), _booking(status="cancelled"), "h1")
+    assert cancelled[("h1", DAY)] == {"status_counts.confirmed": -1, "status_counts.cancelled": 1, "room_days": -1}
+    assert cancelled[("h1", NEXT_DAY)] == {"room_days": -1}
+
+    assert booking_delta(_booking(payment_status="paid"), _booking(payment_status="paid"), "h1") == {}
+
+def test_aware_start_dates_use_the_utc_day():
+    """Test that a booking at 01:00 +03:00 lands on the previous UTC day"""
+    istanbul = timezone(timedelta(hours=3))
+    early = _booking(start_date=datetime(2026, 5, 5, 1, tzinfo=istanbul))
+    assert list(booking_delta(None, early, "h1")) == [("h1", DAY), ("h1", NEXT_DAY)]
+
+class _FakeDB:
+    def __init__(self, bookings):
+        self.bookings = FakeCollection(bookings)
+        self.hotel_stats_daily = FakeCollection()
+        self.conference_rooms = FakeCollection([{"id": "r1", "hotel_id": "h1"}])
+
+    def row(self, day):
+        return next(doc for doc in self.hotel_stats_daily.docs if doc["hotel_id"] == "h1" and doc["day"] == day)
+
+def test_repeated_payment_updates_are_counted_once():
+    """Test that a webhook and a status poll marking the same booking paid add revenue once"""
+    db = _FakeDB([_booking(status="confirmed")])
+    rollup = HotelStatsRollup(db)
+
+    async def scenario():
+        await rollup.apply(None, _booking(status="confirmed"))
+        for _ in range(2):
+            await rollup.update_booking({"id": "b1"}, {"payment_status": "paid"})
+
+    asyncio.run(scenario())
+    row = db.row(DAY)
+    assert row["paid_revenue"] == 1200.0 and row["paid_bookings"] == 1
+    assert row["bookings"] == 1 and row["status_counts"] == {"confirmed": 1}
+    assert rollup.stats() == {"applied": 2, "failures": 0}
+
+def test_room_days_are_spread_over_the_booked_days():
+    """Test back-to-back multi-day bookings of one room never put more than one room-day on a day"""
+    bookings = [
+        _booking(id="b1", status="confirmed", total_days=3),
+        _booking(id="b2", status="confirmed", start_date=datetime(2026, 5, 7, 9), total_days=2),
+    ]
+    db = _FakeDB(bookings)
+    rollup = HotelStatsRollup(db)
+
+    async def scenario():
+        for booking in bookings:
+            await rollup.apply(None, booking)
+        applied = sorted((doc["day"], doc["room_days"]) for doc in db.hotel_stats_daily.docs)
+        assert await rollup.rebuild(["h1"]) == 5
+        rebuilt = sorted((doc["day"], doc["room_days"]) for doc in db.hotel_stats_daily.docs)
+        return applied, rebuilt
+
+    applied, rebuilt = asyncio.run(scenario())
+    assert applied == rebuilt == [(DAY + timedelta(days=offset), 1) for offset in range(5)]
+    # A window over the first two days holds two room-days for one room: occupancy 1, not 3
+    window = [doc for doc in db.hotel_stats_daily.docs if DAY <= doc["day"] <= NEXT_DAY]
+    assert sum(doc["room_days"] for doc in window) == 2
+
+def test_background_rebuild_fills_an_empty_rollup():
+    """Test the startup rebuild fills rows for existing bookings and has_rows reports them"""
+    db = _FakeDB([_booking(status="confirmed", payment_status="paid")])
+    rollup = HotelStatsRollup(db)
+
+    async def scenario():
+        assert not await rollup.has_rows(["h1"])
+        rollup.start_rebuild()
+        await rollup._task
+        await rollup.stop()
+        return await rollup.has_rows(["h1"]), await rollup.has_rows(["h2"])
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert db.row(DAY)["paid_revenue"] == 1200.0 and db.row(NEXT_DAY)["room_days"] == 1
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import httpx
+from http_clients import HTTPClientRegistry
+
+def test_per_host_concurrency_limit():
+    """Test that in-flight requests per host never exceed the host limit"""
+    peak = {"current": 0, "max": 0}
+
+    async def handler(request):
+        peak["current"] += 1
+        peak["max"] = max(peak["max"], peak["current"])
+        await asyncio.sleep(0.01)
+        peak["current"] -= 1
+        return httpx.Response(200, json={"host": request.url.host})
+
+    registry = HTTPClientRegistry(host_limits={"slow.example": 2})
+
+    async def scenario():
+        registry._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        responses = await asyncio.gather(*[registry.get("http://slow.example/x") for _ in range(6)])
+        assert all(r.json()["host"] == "slow.example" for r in responses)
+        client = registry.client
+        await registry.get("http://other.example/")
+        assert registry.client is client  # one pooled client for every host
+        await registry.close()
+
+    asyncio.run(scenario())
+    assert peak["max"] == 2
+    stats = registry.stats()
+    assert stats["hosts"]["slow.example"] == {"requests": 6, "errors": 0, "in_flight": 0}
+    assert stats["open"] is False
+
+def test_errors_are_counted():
+    """Test that transport errors are re-raised and counted per host"""
+    async def handler(request):
+        raise httpx.ConnectError("down", request=request)
+
+    registry = HTTPClientRegistry()
+
+    async def scenario():
+        registry._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            await registry.get("http://down.example/")
+        except httpx.ConnectError:
+            pass
+        else:
+            raise AssertionError("expected ConnectError")
+        await registry.close()
+
+    asyncio.run(scenario())
+    assert registry.stats()["hosts"]["down.example"]["errors"] == 1
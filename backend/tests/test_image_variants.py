@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+from PIL import Image
+from image_variants import ImageManifests, choose_variant, render_variants
+
+MANIFEST = {"width": 2000, "height": 1000, "variants": [
+    {"width": w, "height": w // 2, "format": fmt, "filename": f"h1_x_w{w}.{ext}", "bytes": 1}
+    for w in (320, 640, 2000) for fmt, ext in (("jpeg", "jpg"), ("webp", "webp"))
+]}
+
+def test_render_variants_writes_each_width_and_format(tmp_path):
+    """Test variants are narrower than the original, keep the aspect ratio and include the full width"""
+    source = tmp_path / "h1_abc.png"
+    Image.new("RGB", (1000, 500), (200, 30, 30)).save(source)
+    manifest = render_variants(str(source), str(tmp_path / "variants"), "h1_abc", (320, 640, 1280), ("webp",))
+    assert (manifest["width"], manifest["height"]) == (1000, 500)
+    assert sorted((v["width"], v["format"]) for v in manifest["variants"]) == [
+        (320, "jpeg"), (320, "webp"), (640, "jpeg"), (640, "webp"), (1000, "jpeg"), (1000, "webp")]
+    small = next(v for v in manifest["variants"] if v["width"] == 320 and v["format"] == "webp")
+    assert small["height"] == 160 and small["filename"] == "h1_abc_w320.webp"
+    with Image.open(tmp_path / "variants" / small["filename"]) as image:
+        assert image.size == (320, 160) and image.format == "WEBP"
+
+def test_choose_variant_by_width_and_accept():
+    """Test ?w= picks the narrowest wide-enough variant and Accept picks the format"""
+    webp = "image/avif,image/webp,image/*,*/*;q=0.8"
+    assert choose_variant(MANIFEST, 300, webp)["filename"] == "h1_x_w320.webp"
+    assert choose_variant(MANIFEST, 500, "image/*")["filename"] == "h1_x_w640.jpg"
+    assert choose_variant(MANIFEST, 5000, webp)["filename"] == "h1_x_w2000.webp"
+    assert choose_variant(MANIFEST, None, webp)["filename"] == "h1_x_w2000.webp"
+    # No width and no modern format: the uploaded original is served
+    assert choose_variant(MANIFEST, None, "image/*") is None
+    assert choose_variant(None, 300, webp) is None
+
+def test_manifests_are_looked_up_by_owner_id_and_cached():
+    """Test the manifest lookup uses the id prefix of the filename and caches hits and misses"""
+    manifests = ImageManifests()
+    hotels = FakeCollection([{"id": "h1", "image_variants": {"h1_x": MANIFEST}}], name="hotels")
+
+    async def scenario():
+        assert await manifests.get(hotels, "h1_x.jpg") == MANIFEST
+        assert await manifests.get(hotels, "h1_x.jpg") == MANIFEST
+        assert await manifests.get(hotels, "h2_y.jpg") is None
+        assert await manifests.get(hotels, "h2_y.jpg") is None
+        manifests.invalidate(hotels, "h1_x")
+        await manifests.get(hotels, "h1_x.jpg")
+
+    asyncio.run(scenario())
+    assert hotels.queries == 3
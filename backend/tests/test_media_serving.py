@@ -0,0 +1,79 @@
+import hashlib
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from media_serving import IMMUTABLE_CACHE_CONTROL, ByteRange, MediaServer, RangeNotSatisfiable, etag_matches, parse_range
+
+def _client(tmp_path, **options):
+    server = MediaServer(root=tmp_path, **options)
+    app = FastAPI()
+
+    @app.get("/media/{filename:path}")
+    async def media(filename: str, request: Request, hashed: bool = False):
+        etag = filename.rsplit(".", 1)[0] if hashed else None
+        response = await server.respond(request, tmp_path / filename, etag=etag, cache_control=IMMUTABLE_CACHE_CONTROL)
+        if response is None:
+            raise HTTPException(status_code=404)
+        return response
+
+    return TestClient(app), server
+
+def test_parse_range_forms():
+    """Test single ranges are clamped to the file, odd ones ignored, and ranges past the end rejected"""
+    assert parse_range("bytes=0-99", 1000) == ByteRange(0, 99)
+    assert parse_range("bytes=900-", 1000) == ByteRange(900, 999)
+    assert parse_range("bytes=-100", 1000) == ByteRange(900, 999)
+    assert parse_range("bytes=990-5000", 1000) == ByteRange(990, 999)
+    assert parse_range("bytes=-5000", 1000) == ByteRange(0, 999)
+    for ignored in (None, "", "items=0-1", "bytes=0-1,5-6", "bytes=5-1", "bytes=a-1", "bytes=-"):
+        assert parse_range(ignored, 1000) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=1000-", 1000)
+    assert etag_matches('W/"abc", "def"', '"abc"') and etag_matches("*", '"x"') and not etag_matches('"ab"', '"abc"')
+
+def test_etag_304_and_ranges_over_http(tmp_path):
+    """Test content-hash ETag, If-None-Match 304, 206 slices, stale If-Range and 416"""
+    data = os.urandom(200 * 1024)
+    (tmp_path / "tour.mp4").write_bytes(data)
+    client, server = _client(tmp_path)
+
+    full = client.get("/media/tour.mp4")
+    etag = f'"{hashlib.sha256(data).hexdigest()}"'
+    assert full.status_code == 200 and full.content == data
+    assert full.headers["etag"] == etag and full.headers["accept-ranges"] == "bytes"
+    assert full.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    assert client.get("/media/tour.mp4", headers={"If-None-Match": etag}).status_code == 304
+
+    part = client.get("/media/tour.mp4", headers={"Range": "bytes=70000-140000"})
+    assert part.status_code == 206 and part.content == data[70000:140001]
+    assert part.headers["content-range"] == f"bytes 70000-140000/{len(data)}"
+    assert part.headers["content-type"] == "video/mp4"
+
+    stale = client.get("/media/tour.mp4", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert stale.status_code == 200 and len(stale.content) == len(data)
+    missing = client.get("/media/tour.mp4", headers={"Range": f"bytes={len(data)}-"})
+    assert missing.status_code == 416 and missing.headers["content-range"] == f"bytes */{len(data)}"
+    assert client.get("/media/none.mp4").status_code == 404
+
+    # The file was hashed once; the name carries the hash for content-addressed media
+    assert server.stats()["files_hashed"] == 1
+    sha = hashlib.sha256(b"img").hexdigest()
+    (tmp_path / f"{sha}.jpg").write_bytes(b"img")
+    assert client.get(f"/media/{sha}.jpg?hashed=true").headers["etag"] == f'"{sha}"'
+    assert server.stats()["files_hashed"] == 1
+    server.shutdown()
+
+def test_accel_redirect_hands_the_body_to_the_proxy(tmp_path):
+    """Test with an X-Accel-Redirect prefix only headers are sent, pointing at the file under the root"""
+    (tmp_path / "blobs").mkdir()
+    (tmp_path / "blobs" / "a.mp4").write_bytes(b"video")
+    client, server = _client(tmp_path, accel_redirect_prefix="/internal-media")
+
+    response = client.get("/media/blobs/a.mp4")
+    assert response.headers["x-accel-redirect"] == "/internal-media/blobs/a.mp4" and response.content == b""
+    assert server.stats()["offloaded"] == 1
+    server.shutdown()
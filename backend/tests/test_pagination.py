@@ -0,0 +1,69 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pytest
+from conftest import FakeCollection, matches, mongo_sort
+from pagination import InvalidCursor, cursor_for, decode_cursor, fetch_page, page_query, split_page
+
+def _walk(docs, sort, limit):
+    pages, cursor = [], None
+    while True:
+        query = page_query({}, sort, cursor)
+        found = mongo_sort([d for d in docs if matches(d, query)], sort)[:limit + 1]
+        page, cursor = split_page(found, limit, sort)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+@pytest.mark.parametrize("direction", [-1, 1])
+def test_pages_cover_every_document_once_with_ties_and_nulls(direction):
+    """Test that walking the cursor visits the same order as one sorted query"""
+    docs = [{"id": f"{i:03d}", "helpful_count": None if i % 5 == 0 else i % 3} for i in range(37)]
+    sort = [("helpful_count", direction), ("id", -1)]
+    pages = _walk(docs, sort, limit=4)
+    assert [d["id"] for page in pages for d in page] == [d["id"] for d in mongo_sort(docs, sort)]
+    assert all(len(page) == 4 for page in pages[:-1])
+
+def test_insert_before_the_cursor_does_not_shift_the_next_page():
+    """Test stability under concurrent inserts ahead of the cursor"""
+    docs = [{"id": f"{i:02d}", "created_at": datetime(2026, 1, 1, i)} for i in range(10)]
+    sort = [("created_at", -1), ("id", -1)]
+    first, cursor = split_page(mongo_sort(docs, sort)[:4], 3, sort)
+    docs.append({"id": "new", "created_at": datetime(2026, 2, 1)})
+    second = mongo_sort([d for d in docs if matches(d, page_query({}, sort, cursor))], sort)[:3]
+    assert [d["id"] for d in first + second] == ["09", "08", "07", "06", "05", "04"]
+
+def test_cursor_round_trip_and_rejection():
+    """Test datetime cursors and malformed or mismatched cursors"""
+    sort = [("created_at", -1), ("id", -1)]
+    cursor = cursor_for({"id": "r1", "created_at": datetime(2026, 3, 4, 5, 6, 7)}, sort)
+    created_at, review_id = decode_cursor(cursor, sort)
+    assert review_id == "r1" and created_at.replace(tzinfo=None) == datetime(2026, 3, 4, 5, 6, 7)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor!", sort)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, [("id", -1)])
+
+def test_fetch_page_walks_past_the_old_1000_cap():
+    """Test that list endpoints can page through more than 1000 bookings"""
+    bookings = FakeCollection([{"id": f"{i:05d}", "customer_id": "c1" if i % 2 else "c2",
+                                 "created_at": datetime(2026, 1, 1) + timedelta(minutes=i)} for i in range(2500)])
+    sort = [("created_at", -1), ("id", -1)]
+
+    async def walk():
+        seen, cursor = [], None
+        while True:
+            page, cursor = await fetch_page(bookings, {"customer_id": "c1"}, sort, 400, cursor=cursor)
+            seen += page
+            if cursor is None:
+                return seen
+
+    seen = asyncio.run(walk())
+    assert len(seen) == 1250 and len({d["id"] for d in seen}) == 1250
+    assert seen[0]["id"] == "02499" and seen[-1]["id"] == "00001"
+
+    page, cursor = asyncio.run(fetch_page(bookings, {"customer_id": "c2"}, sort, 3, skip=1))
+    assert [d["id"] for d in page] == ["02496", "02494", "02492"] and cursor is not None
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from passwords import PasswordHasher, PasswordHasherBusy
+
+def test_hash_verify_and_rehash_detection():
+    """Test round trip, wrong passwords, malformed hashes and cost changes"""
+    hasher = PasswordHasher(rounds=4, max_workers=2)
+
+    async def scenario():
+        hashed = await hasher.hash("gizli-şifre")
+        assert await hasher.verify("gizli-şifre", hashed)
+        assert not await hasher.verify("yanlış", hashed)
+        assert not await hasher.verify("x", "not-a-bcrypt-hash")
+        return hashed
+
+    hashed = asyncio.run(scenario())
+    assert hashed.startswith("$2b$04$")
+    assert not hasher.needs_rehash(hashed)
+    assert PasswordHasher(rounds=5).needs_rehash(hashed)
+    assert hasher.stats()["completed"] == 4
+
+def test_event_loop_keeps_running_during_hashing():
+    """Test that other coroutines are scheduled while bcrypt runs in the pool"""
+    hasher = PasswordHasher(rounds=10, max_workers=1)
+    ticks = []
+
+    async def ticker(stop):
+        while not stop.is_set():
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.005)
+
+    async def scenario():
+        stop = asyncio.Event()
+        task = asyncio.create_task(ticker(stop))
+        await asyncio.gather(*[hasher.hash("pw") for _ in range(3)])
+        stop.set()
+        await task
+
+    asyncio.run(scenario())
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    assert len(ticks) > 5 and max(gaps) < 0.05
+
+def test_queue_depth_is_bounded():
+    """Test the concurrency limit, queue metrics and rejection when full"""
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_queue=2)
+    peak = {"running": 0}
+
+    def slow(value):
+        peak["running"] = max(peak["running"], hasher.running)
+        time.sleep(0.02)
+        return value
+
+    async def scenario():
+        jobs = [asyncio.create_task(hasher._submit(slow, i)) for i in range(3)]
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher._submit(slow, 99)
+        return await asyncio.gather(*jobs)
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+    stats = hasher.stats()
+    assert peak["running"] == 1
+    assert stats["max_queued"] == 2 and stats["rejected"] == 1 and stats["queued"] == 0
@@ -0,0 +1,40 @@
+import os
+import random
+import sys
+from decimal import Decimal, ROUND_HALF_UP
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pricing import price_listings, to_cents
+
+def _decimal_round(value):
+    return float(Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+def test_to_cents_matches_decimal_rounding():
+    """Test integer-cent rounding against the previous Decimal path"""
+    random.seed(7)
+    samples = [2.675, 1.005, 0.125, 1234.565, 0.0]
+    samples += [random.uniform(0, 50000) * random.choice([0.9, 1.08, 34.51, 0.029]) for _ in range(5000)]
+    for value in samples:
+        assert to_cents(value) / 100 == _decimal_round(value)
+
+def test_price_listings_groups_by_currency():
+    """Test that only foreign-priced items get pricing_info, one rate per currency"""
+    rooms = [
+        {"id": "1", "currency": "EUR", "price_per_day": 100.0, "price_per_hour": 12.5},
+        {"id": "2", "currency": "USD", "price_per_day": 80.0},
+        {"id": "3", "currency": "TRY", "price_per_day": 5000.0},
+        {"id": "4", "price_per_day": 10.0},  # legacy rooms default to EUR
+    ]
+    price_listings(rooms, "price_per_day", "TRY", {"EUR": 37.0, "USD": 34.0}, hourly_field="price_per_hour")
+
+    assert rooms[0]["pricing_info"] == {
+        "base_price": 100.0,
+        "base_currency": "EUR",
+        "display_price": 3700.0,
+        "display_currency": "TRY",
+        "exchange_rate": 37.0,
+        "display_price_per_hour": 462.5,
+    }
+    assert rooms[1]["pricing_info"]["display_price"] == 2720.0
+    assert "display_price_per_hour" not in rooms[1]["pricing_info"]
+    assert "pricing_info" not in rooms[2]
+    assert rooms[3]["pricing_info"]["display_price"] == 370.0
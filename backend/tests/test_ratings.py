@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection, FakeCursor
+from ratings import RatingAggregates, hotel_score
+
+def _evaluate(doc, expression):
+    """The aggregation expressions the rating pipeline uses"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return doc.get(expression[1:])
+    if not isinstance(expression, dict):
+        return expression
+    (op, args), = expression.items()
+    values = [_evaluate(doc, arg) for arg in args]
+    if op == "$ifNull":
+        return values[0] if values[0] is not None else values[1]
+    if op == "$cond":
+        return values[1] if values[0] else values[2]
+    return {"$add": lambda: values[0] + values[1], "$multiply": lambda: values[0] * values[1],
+            "$divide": lambda: values[0] / values[1], "$gt": lambda: values[0] > values[1],
+            "$round": lambda: round(values[0], values[1])}[op]()
+
+class _FakeTargets(FakeCollection):
+    """Hotels / rooms: the shared fake plus pipeline updates"""
+
+    async def update_one(self, query, update, upsert=False):
+        if not isinstance(update, list):
+            return await super().update_one(query, update, upsert)
+        docs = self._matching(query)[:1]
+        for doc in docs:
+            for stage in update:
+                doc.update({field: _evaluate(doc, value) for field, value in stage["$set"].items()})
+        return SimpleNamespace(modified_count=len(docs))
+
+class _FakeReviews(FakeCollection):
+    def aggregate(self, pipeline):
+        key = next(iter(pipeline[0]["$match"]))
+        score = hotel_score if key == "hotel_id" else (lambda r: r.get("room_rating"))
+        groups = {}
+        for review in self.docs:
+            if review.get(key) is None or score(review) is None:
+                continue
+            total, count = groups.get(review[key], (0, 0))
+            groups[review[key]] = (total + score(review), count + 1)
+        return FakeCursor([{"_id": k, "rating_sum": s, "rating_count": c} for k, (s, c) in groups.items()])
+
+def _by_id(collection, doc_id):
+    return next(doc for doc in collection.docs if doc["id"] == doc_id)
+
+def _db(reviews=(), hotels=({"id": "h1"},), rooms=({"id": "r1"},)):
+    return SimpleNamespace(hotels=_FakeTargets(hotels), conference_rooms=_FakeTargets(rooms),
+                           reviews=_FakeReviews(reviews))
+
+def test_counters_follow_creates_and_deletes_past_1000_reviews():
+    """Test running sums for both review shapes without any rescans"""
+    db = _db(hotels=[{"id": "h1", "rating_sum": 0, "rating_count": 0}],
+             rooms=[{"id": "r1", "rating_sum": 0, "rating_count": 0}])
+    aggregates = RatingAggregates(db)
+    booking_reviews = [{"hotel_id": "h1", "room_id": "r1", "overall_rating": 5, "room_rating": 4}] * 1200
+    hotel_review = {"hotel_id": "h1", "rating": 1}
+
+    async def scenario():
+        for review in booking_reviews:
+            await aggregates.review_added(review)
+        await aggregates.review_added(hotel_review)
+        await aggregates.review_removed(booking_reviews[0])
+
+    asyncio.run(scenario())
+    hotel, room = _by_id(db.hotels, "h1"), _by_id(db.conference_rooms, "r1")
+    assert (hotel["rating_sum"], hotel["rating_count"]) == (1199 * 5 + 1, 1200)
+    assert hotel["total_reviews"] == 1200 and hotel["average_rating"] == 5.0
+    assert (room["rating_count"], room["average_rating"]) == (1199, 4.0)
+
+def test_first_review_on_a_legacy_hotel_keeps_its_average():
+    """Test a hotel without counters starts from its displayed average and review count"""
+    db = _db(hotels=[{"id": "h1", "average_rating": 4.2, "total_reviews": 7}], rooms=[{"id": "r1"}])
+    aggregates = RatingAggregates(db)
+    asyncio.run(aggregates.review_added({"hotel_id": "h1", "room_id": "r1", "overall_rating": 5, "room_rating": 3}))
+
+    hotel, room = _by_id(db.hotels, "h1"), _by_id(db.conference_rooms, "r1")
+    assert (hotel["rating_count"], hotel["total_reviews"], hotel["average_rating"]) == (8, 8, 4.3)
+    assert (room["rating_sum"], room["rating_count"], room["average_rating"]) == (3, 1, 3.0)
+    assert aggregates.stats()["failures"] == 0
+
+def test_reconcile_repairs_drift_and_backfills():
+    """Test that reconciliation fixes wrong and missing counters and leaves correct ones alone"""
+    reviews = [{"hotel_id": "h1", "room_id": "r1", "overall_rating": 4, "room_rating": 3},
+               {"hotel_id": "h1", "rating": 5},
+               {"hotel_id": "h2", "rating": 2}]
+    db = _db(reviews,
+             hotels=[{"id": "h1", "rating_sum": 2, "rating_count": 1, "average_rating": 2.0},
+                     {"id": "h2", "rating_sum": 2, "rating_count": 1, "average_rating": 2.0},
+                     {"id": "h3", "average_rating": 4.2, "total_reviews": 7}],
+             rooms=[{"id": "r1", "average_rating": 0.0}])
+    aggregates = RatingAggregates(db)
+
+    changed = []
+
+    async def on_change(hotel_id, room_id):
+        changed.append((hotel_id, room_id))
+
+    aggregates.on_change = on_change
+    report = asyncio.run(aggregates.reconcile())
+    assert report == {"hotels_repaired": 2, "rooms_repaired": 1}
+    assert sorted(changed, key=str) == sorted([("h1", None), ("h3", None), (None, "r1")], key=str)
+    assert _by_id(db.hotels, "h1")["average_rating"] == 4.5 and _by_id(db.hotels, "h1")["total_reviews"] == 2
+    assert _by_id(db.hotels, "h3")["average_rating"] == 0.0 and _by_id(db.hotels, "h3")["rating_count"] == 0
+    assert _by_id(db.conference_rooms, "r1")["rating_sum"] == 3
+
+    assert asyncio.run(aggregates.reconcile()) == {"hotels_repaired": 0, "rooms_repaired": 0}
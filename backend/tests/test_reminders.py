@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+import pytest
+from reminders import BookingReminderScheduler
+
+NOW = datetime(2026, 3, 10, 8, 0)
+
+class _FakeDB:
+    def __init__(self, bookings):
+        self.bookings = FakeCollection(bookings)
+        self.conference_rooms = FakeCollection([{"id": "r1", "name": "Salon A", "hotel_id": "h1"}])
+        self.hotels = FakeCollection([{"id": "h1", "name": "Grand Otel", "address": "İstanbul"}])
+        self.users = FakeCollection([{"id": "u1", "email": "ayse@example.com", "full_name": "Ayşe"}])
+
+class _RecordingEmailService:
+    def __init__(self):
+        self.batches = []
+
+    def send_booking_reminders(self, reminders):
+        self.batches.append(reminders)
+        return [True] * len(reminders)
+
+def _booking(booking_id, hours_ahead, status="confirmed", **extra):
+    return {
+        "id": booking_id, "room_id": "r1", "customer_id": "u1", "status": status,
+        "start_date": NOW + timedelta(hours=hours_ahead), "booking_type": "daily", **extra,
+    }
+
+def test_scan_reminds_only_due_confirmed_bookings_once():
+    """Test the lead window, status filter and that a second scan sends nothing"""
+    db = _FakeDB([
+        _booking("due", 5),
+        _booking("hourly", 20, booking_type="hourly"),
+        _booking("too-late", 30),
+        _booking("past", -2),
+        _booking("pending", 3, status="pending"),
+        _booking("done", 4, reminder_sent_at=NOW - timedelta(hours=1)),
+    ])
+    emails = _RecordingEmailService()
+    scheduler = BookingReminderScheduler(db, emails, lead_hours=24)
+
+    assert asyncio.run(scheduler.scan_once(NOW)) == 2
+    assert asyncio.run(scheduler.scan_once(NOW)) == 0
+
+    reminders = emails.batches[0]
+    assert [r["booking"]["booking_id"] for r in reminders] == ["due", "hourly"]
+    assert reminders[0]["user_email"] == "ayse@example.com"
+    assert reminders[0]["booking"]["hotel_name"] == "Grand Otel"
+    assert reminders[0]["booking"]["time"] == "Gün boyu"
+    assert reminders[1]["booking"]["time"] == "04:00"
+    stats = scheduler.stats()
+    assert stats["scans"] == 2 and stats["reminders_sent"] == 2 and stats["last_scan_ms"] is not None
+
+def test_concurrent_scans_do_not_double_send():
+    """Test that two workers scanning at once claim disjoint bookings"""
+    db = _FakeDB([_booking(f"b{i}", 1 + i % 20) for i in range(50)])
+    emails = _RecordingEmailService()
+    workers = [BookingReminderScheduler(db, emails, batch_size=7) for _ in range(2)]
+
+    async def scenario():
+        return await asyncio.gather(*[worker.scan_once(NOW) for worker in workers])
+
+    assert sum(asyncio.run(scenario())) == 50
+    sent_ids = [r["booking"]["booking_id"] for batch in emails.batches for r in batch]
+    assert sorted(sent_ids) == sorted(f"b{i}" for i in range(50))
+
+class _FailingEmailService(_RecordingEmailService):
+    def send_booking_reminders(self, reminders):
+        raise RuntimeError("outbox unavailable")
+
+def test_failed_enqueue_releases_the_claim():
+    """Test bookings claimed by a scan whose enqueue fails are reminded by the next scan"""
+    db = _FakeDB([_booking("due", 5)])
+    scheduler = BookingReminderScheduler(db, _FailingEmailService())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scheduler.scan_once(NOW))
+    assert db.bookings.docs[0]["reminder_sent_at"] is None and "reminder_claim" not in db.bookings.docs[0]
+    assert scheduler.stats()["scan_failures"] == 1
+
+    scheduler.email_service = emails = _RecordingEmailService()
+    assert asyncio.run(scheduler.scan_once(NOW)) == 1
+    assert emails.batches[0][0]["booking"]["booking_id"] == "due"
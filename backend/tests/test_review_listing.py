@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection, FakeCursor
+from review_listing import HotelReviewListing, review_sort, review_summary_pipeline, shape_review_summary
+
+class _FakeReviews(FakeCollection):
+    """The shared fake; the summary aggregation returns a canned result"""
+
+    def __init__(self, docs):
+        super().__init__(docs)
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor([{"total": [{"count": len(self.docs)}], "distribution": [{"_id": 5, "count": 1}]}])
+
+def _db():
+    reviews = [{"id": f"r{i}", "hotel_id": "h1", "rating": i % 3} for i in range(5)] + [{"id": "x", "hotel_id": "h2"}]
+    return SimpleNamespace(hotels=FakeCollection([{"id": "h1", "average_rating": 4.5, "total_reviews": 5}]),
+                           reviews=_FakeReviews(reviews))
+
+def test_pages_are_keyset_finds_and_summary_one_facet():
+    """Test pages follow the hotel's index order across cursors, while only the counts are aggregated (once)"""
+    db = _db()
+    listing = HotelReviewListing(db)
+
+    async def walk(**options):
+        pages, cursor = [], None
+        while True:
+            page = await listing.get("h1", sort_by="rating", limit=2, cursor=cursor, **options)
+            pages.append([review["id"] for review in page["reviews"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages, page
+
+    pages, last = asyncio.run(walk())
+    assert pages == [["r2", "r4"], ["r1", "r3"], ["r0"]]
+    assert last["total_count"] == 6 and last["rating_distribution"]["5"] == 1 and last["average_rating"] == 4.5
+    assert asyncio.run(walk(skip=1))[0] == [["r4", "r1"], ["r0"]]
+    # Every page of the hotel reused its cached summary
+    assert db.reviews.pipelines == [review_summary_pipeline("h1")]
+    assert set(db.reviews.pipelines[0][1]["$facet"]) == {"total", "distribution"}
+    assert review_sort("password") == [("created_at", -1), ("id", -1)]
+
+def test_summary_fills_distribution():
+    """Test histogram buckets for both review shapes and an empty hotel"""
+    summary = shape_review_summary([{
+        "total": [{"count": 7}],
+        "distribution": [{"_id": 5, "count": 4}, {"_id": 3, "count": 2}, {"_id": None, "count": 1}],
+    }])
+    assert summary["total_count"] == 7
+    assert summary["rating_distribution"] == {"1": 0, "2": 0, "3": 2, "4": 0, "5": 4}
+    assert shape_review_summary([]) == {"total_count": 0, "rating_distribution": {str(r): 0 for r in range(1, 6)}}
+
+def test_cache_is_dropped_per_hotel_on_writes():
+    """Test cached pages and summaries are served until that hotel's reviews change"""
+    db = _db()
+    listing = HotelReviewListing(db)
+
+    async def scenario():
+        await listing.get("h1")
+        await listing.get("h1")
+        listing.invalidate("h2")
+        await listing.get("h1")
+        listing.invalidate("h1")
+        await listing.get("h1")
+        return await listing.get("missing")
+
+    assert asyncio.run(scenario()) is None
+    assert db.reviews.queries == 2 and len(db.reviews.pipelines) == 2
+    assert listing.cache.stats()["hits"] == 2
+
+def test_generations_expire_and_racing_writes_are_not_cached():
+    """Test a page fetched across a review write is not cached, and generations age out with the pages"""
+    db = _db()
+    listing = HotelReviewListing(db, ttl_seconds=0.05)
+    original_find_one = db.hotels.find_one
+
+    async def find_one_during_a_write(*args, **kwargs):
+        listing.invalidate("h1")
+        return await original_find_one(*args, **kwargs)
+
+    async def scenario():
+        db.hotels.find_one = find_one_during_a_write
+        await listing.get("h1")
+        db.hotels.find_one = original_find_one
+        # The summary was read after the write and is kept; the page is not
+        assert len(listing.cache) == 0 and len(listing.summaries) == 1
+        await listing.get("h1")
+        assert len(listing.cache) == 1
+        await asyncio.sleep(0.06)
+        assert listing.generation("h1") == 0 and len(listing._generations) == 0
+
+    asyncio.run(scenario())
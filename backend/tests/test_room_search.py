@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection, FakeCursor
+from room_search import SORTS, RoomSearchIndex, build_document, facets_pipeline, resolve_sort, search_filter
+
+HOTEL = {"id": "h1", "name": "Çırağan Palace", "city": "İstanbul", "is_active": True,
+         "approval_status": "approved", "average_rating": 4.6, "star_rating": 5}
+
+def _room(**changes):
+    room = {"id": "r1", "hotel_id": "h1", "name": "Boğaziçi Salonu", "description": "Deniz manzaralı",
+            "capacity": 120, "price_per_day": 1000.0, "currency": "USD", "features": ["projector", "wifi"],
+            "is_available": True, "approval_status": "approved", "average_rating": 4.0,
+            "created_at": datetime(2026, 1, 1)}
+    room.update(changes)
+    return room
+
+def test_only_approved_available_rooms_are_indexed():
+    """Test search document eligibility and the canonical EUR price"""
+    to_eur = {"USD": 0.9, "EUR": 1.0}.get
+    doc = build_document(_room(), HOTEL, to_eur)
+    assert doc["city_key"] == "istanbul" and doc["price_eur"] == 900.0
+    assert {"bogazici", "ciragan", "istanbul", "projector"} <= set(doc["text"].split())
+
+    assert build_document(_room(approval_status="pending"), HOTEL, to_eur) is None
+    assert build_document(_room(is_available=False), HOTEL, to_eur) is None
+    assert build_document(_room(), {**HOTEL, "approval_status": "rejected"}, to_eur) is None
+    assert build_document(_room(), None, to_eur) is None
+
+def test_filter_and_sort_resolution():
+    """Test folded text/city filters and relevance as the default text sort"""
+    query = search_filter(q="Boğaziçi", city="ISTANBUL", min_capacity=50, max_price=1000, features=["wifi"])
+    assert query == {"$text": {"$search": "bogazici"}, "city_key": {"$regex": "^istanbul"}, "capacity": {"$gte": 50},
+                     "price_eur": {"$lte": 1000}, "features": {"$all": ["wifi"]}}
+
+    assert resolve_sort(None, has_text=True) is None
+    assert resolve_sort("rating", has_text=True) == SORTS["rating"]
+    assert resolve_sort("relevance", has_text=False) == SORTS["created_at"]
+    assert resolve_sort("bogus", has_text=False) == SORTS["created_at"]
+
+    facets = facets_pipeline(query)
+    assert facets[0] == {"$match": query} and set(facets[1]["$facet"]) == {"total", "cities", "features", "capacity"}
+
+FACETS = [{
+    "total": [{"count": 3}],
+    "cities": [{"_id": "istanbul", "city": "İstanbul", "count": 3}],
+    "features": [{"_id": "wifi", "count": 2}],
+    "capacity": [{"_id": 1, "count": 1}, {"_id": 101, "count": 1}, {"_id": 501, "count": 1}],
+}]
+
+class _FakeSearch(FakeCollection):
+    """The shared fake; the facet aggregation returns canned counts"""
+
+    def __init__(self, docs):
+        super().__init__(docs)
+        self.projections = []
+        self.pipelines = []
+
+    def find(self, query=None, projection=None):
+        # Every fixture room matches the text search
+        self.projections.append(projection)
+        return super().find({k: v for k, v in query.items() if k != "$text"}, projection)
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(FACETS)
+
+def test_page_is_an_indexed_find_and_facets_only_count():
+    """Test keyset and relevance pages are finds in index order while $facet only computes the counts"""
+    collection = _FakeSearch([{"room_id": f"r{i}", "city_key": "istanbul" if i < 4 else "izmir", "rating": i % 2}
+                              for i in range(6)])
+    index = RoomSearchIndex(SimpleNamespace(room_search=collection), None)
+    query = {"city_key": "istanbul"}
+
+    first = asyncio.run(index.search(query, sort_by="rating", limit=3))
+    assert [r["room_id"] for r in first["results"]] == ["r3", "r1", "r2"] and first["next_cursor"]
+    second = asyncio.run(index.search(query, sort_by="rating", limit=3, cursor=first["next_cursor"]))
+    assert [r["room_id"] for r in second["results"]] == ["r0"] and second["next_cursor"] is None
+    assert collection.projections[0] == {"_id": 0, "text": 0, "synced_at": 0}
+    assert collection.pipelines[0] == facets_pipeline(query) and first["total"] == 3
+    assert first["facets"]["cities"] == [{"city": "İstanbul", "city_key": "istanbul", "count": 3}]
+    assert [b["range"] for b in first["facets"]["capacity"]] == ["1-25", "101-250", "501+"]
+
+    relevance = asyncio.run(index.search({"$text": {"$search": "salon"}}, skip=2, limit=2))
+    assert collection.projections[-1]["score"] == {"$meta": "textScore"}
+    assert len(relevance["results"]) == 2 and relevance["next_cursor"] is None
@@ -0,0 +1,30 @@
+import os
+import re
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from text_normalization import fold, prefix_match, search_text, tokenize
+
+def test_turkish_letters_fold_to_ascii():
+    """Test İ/I/ı/i and the other Turkish letters fold to the same key"""
+    for city in ["İstanbul", "ISTANBUL", "istanbul", "Istanbul", "ıstanbul", "İstanbul"]:
+        assert fold(city) == "istanbul"
+    assert fold("Şanlıurfa") == "sanliurfa"
+    assert fold("  MUĞLA   Çeşme ") == "mugla cesme"
+    assert fold("Ödemiş Ünye") == "odemis unye"
+    assert fold("Café") == "cafe"
+    assert fold(None) == ""
+
+def test_tokens_for_search_text():
+    """Test tokenization of names and feature keys"""
+    assert tokenize("Boğaziçi Salonu (VIP)") == ["bogazici", "salonu", "vip"]
+    assert search_text(["Grand Salon", None, "air_conditioning", "GRAND"]) == "grand salon air conditioning"
+
+def test_prefix_match_is_anchored_on_the_folded_key():
+    """Test "istanbul" and "İst" match the stored key of "İstanbul" as an anchored prefix"""
+    stored = fold("İstanbul")
+    for typed in ["istanbul", "İstanbul", "ISTANBUL", "İst", "ist"]:
+        pattern = prefix_match(typed)["$regex"]
+        assert pattern.startswith("^") and re.match(pattern, stored)
+    assert not re.match(prefix_match("tanbul")["$regex"], stored)
+    assert prefix_match("a.b(c")["$regex"] == r"^a\.b\(c"
+    assert prefix_match("  ") is None and prefix_match(None) is None
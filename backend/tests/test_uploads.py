@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conftest import FakeCollection
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from uploads import UploadOffsetMismatch, UploadSessions, UploadSizeLimit, UploadTooLarge, UploadWriter
+
+class _FakeUpload:
+    def __init__(self, data: bytes):
+        self.file = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+async def _pieces(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+def test_save_hashes_while_streaming_and_enforces_the_limit(tmp_path):
+    """Test a saved upload reports size and sha256, and an oversized one leaves no file behind"""
+    writer = UploadWriter(max_workers=1, chunk_size=4)
+    data = b"0123456789abcdef!"
+
+    stored = asyncio.run(writer.save(_FakeUpload(data), tmp_path / "ok.jpg", max_bytes=len(data)))
+    assert stored.size == len(data) and stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert (tmp_path / "ok.jpg").read_bytes() == data
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(writer.save(_FakeUpload(data), tmp_path / "big.jpg", max_bytes=10))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ok.jpg"]
+    assert writer.stats()["rejected_too_large"] == 1 and writer.stats()["files_written"] == 1
+    writer.shutdown()
+
+def test_resumable_session_survives_a_restart_and_a_bad_offset(tmp_path):
+    """Test chunked session upload: offset checks, hash recomputed after restart, final file and digest"""
+    collection = FakeCollection()
+    writer = UploadWriter(max_workers=1, chunk_size=1024)
+    data = os.urandom(3000)
+
+    async def scenario():
+        sessions = UploadSessions(collection, writer, tmp_path)
+        session = await sessions.create("u1", "hotel_360_video", "h1", "mp4", "video/mp4", len(data))
+        session = await sessions.append(session, 0, _pieces(data[:700], data[700:1200]))
+        assert session["received"] == 1200
+
+        with pytest.raises(UploadOffsetMismatch) as mismatch:
+            await sessions.append(session, 0, _pieces(data[:10]))
+        assert mismatch.value.expected == 1200
+        with pytest.raises(UploadTooLarge):
+            await sessions.append(session, 1200, _pieces(data[1200:], b"extra"))
+
+        # A new process has no running hash and rebuilds it from the part file
+        restarted = UploadSessions(collection, writer, tmp_path)
+        session = await restarted.get(session["id"])
+        created_expiry = session["expires_at"]
+        session = await restarted.append(session, session["received"], _pieces(data[1200:]))
+        assert restarted.resumed_hashes == 1 and session["received"] == len(data)
+        assert collection.docs[0]["expires_at"] > created_expiry
+        stored = await restarted.finish(session, tmp_path / "tour.mp4")
+        assert collection.docs[0]["status"] == "processing"
+        await restarted.complete(session, video_url="/api/videos/hotels/tour.mp4")
+        return stored, session
+
+    stored, session = asyncio.run(scenario())
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert (tmp_path / "tour.mp4").read_bytes() == data
+    assert not (tmp_path / f"{session['id']}.part").exists()
+    assert collection.docs[0]["status"] == "complete"
+    writer.shutdown()
+
+def test_finished_session_refuses_retried_chunks(tmp_path):
+    """Test a retried last chunk or second finish gets an offset mismatch, not a missing part file"""
+    collection = FakeCollection()
+    writer = UploadWriter(max_workers=1, chunk_size=1024)
+    data = os.urandom(100)
+
+    async def scenario():
+        sessions = UploadSessions(collection, writer, tmp_path)
+        session = await sessions.create("u1", "room_video", "r1", "mp4", "video/mp4", len(data))
+        session = await sessions.append(session, 0, _pieces(data))
+        stored = await sessions.finish(session, tmp_path / "a.upload")
+        for retry in (sessions.append(session, 0, _pieces(data)), sessions.append(session, 100, _pieces(b"")),
+                      sessions.finish(session, tmp_path / "b.upload")):
+            with pytest.raises(UploadOffsetMismatch):
+                await retry
+        await sessions.fail(session, stored, "ingest failed")
+        return sessions
+
+    sessions = asyncio.run(scenario())
+    doc = collection.docs[0]
+    assert doc["status"] == "failed" and doc["sha256"] == hashlib.sha256(data).hexdigest()
+    assert list(tmp_path.iterdir()) == [] and sessions.stats()["failed"] == 1
+    writer.shutdown()
+
+def test_periodic_purge_drops_idle_part_files_and_their_state(tmp_path):
+    """Test the background purge removes part files idle past the TTL along with their hash and lock"""
+    writer = UploadWriter(max_workers=1, chunk_size=1024)
+
+    async def scenario():
+        sessions = UploadSessions(FakeCollection(), writer, tmp_path, ttl_seconds=60, purge_interval_seconds=0.01)
+        idle = await sessions.append(await sessions.create("u1", "room_video", "r1", "mp4", "video/mp4", 10),
+                                     0, _pieces(b"12345"))
+        active = await sessions.append(await sessions.create("u1", "room_video", "r1", "mp4", "video/mp4", 10),
+                                       0, _pieces(b"12345"))
+        an_hour_ago = time.time() - 3600
+        os.utime(sessions.part_path(idle), (an_hour_ago, an_hour_ago))
+        sessions.start()
+        await asyncio.sleep(0.05)
+        await sessions.stop()
+        return sessions, idle, active
+
+    sessions, idle, active = asyncio.run(scenario())
+    assert [p.name for p in tmp_path.iterdir()] == [f"{active['id']}.part"]
+    assert set(sessions._hashers) == set(sessions._locks) == {active["id"]}
+    assert sessions.stats()["in_progress"] == 1
+    writer.shutdown()
+
+def test_size_limit_middleware_rejects_declared_oversize_before_reading():
+    """Test the ASGI guard answers 413 from Content-Length and passes other requests through"""
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+
+    guard = UploadSizeLimit(app, limits={"/upload-video": 1024 * 1024}, overhead=100)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    def request(method, path, length):
+        scope = {"type": "http", "method": method, "path": path,
+                 "headers": [(b"content-length", str(length).encode())]}
+        asyncio.run(guard(scope, None, send))
+
+    request("POST", "/api/hotels/h1/upload-video", 1024 * 1024 + 101)
+    assert sent[0]["status"] == 413 and "1MB" in json.loads(sent[1]["body"])["detail"]
+    request("POST", "/api/hotels/h1/upload-video", 1024 * 1024 + 100)
+    request("GET", "/api/hotels/h1/upload-video", 10 ** 9)
+    assert calls == ["/api/hotels/h1/upload-video"] * 2 and len(sent) == 2
+
+def test_size_limit_middleware_counts_chunked_bodies():
+    """Test a body without Content-Length is cut off with 413 once it passes the limit"""
+    app = FastAPI()
+    received = []
+
+    @app.post("/api/hotels/{hotel_id}/upload-video")
+    async def upload(hotel_id: str, file: UploadFile = File(...)):
+        received.append(len(await file.read()))
+        return {"ok": True}
+
+    app.add_middleware(UploadSizeLimit, limits={"/upload-video": 1024 * 1024}, overhead=1024)
+    client = TestClient(app)
+
+    def multipart(size):
+        boundary = b"x" * 16
+        yield b"--" + boundary + b'\r\nContent-Disposition: form-data; name="file"; filename="a.mp4"\r\n\r\n'
+        for _ in range(size // 65536):
+            yield b"\0" * 65536
+        yield b"\r\n--" + boundary + b"--\r\n"
+
+    headers = {"content-type": "multipart/form-data; boundary=" + "x" * 16}
+    small = client.post("/api/hotels/h1/upload-video", content=multipart(512 * 1024), headers=headers)
+    assert small.status_code == 200 and received == [512 * 1024]
+    large = client.post("/api/hotels/h1/upload-video", content=multipart(4 * 1024 * 1024), headers=headers)
+    assert large.status_code == 413 and "1MB" in large.json()["detail"]
+    assert received == [512 * 1024]
+
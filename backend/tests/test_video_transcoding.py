@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from video_transcoding import (
+    TranscodeError, VideoInfo, VideoTranscoder, parse_probe, rendition_size, select_ladder, stream_urls, transcode_command
+)
+
+def test_probe_ladder_and_sizes_follow_the_short_side():
+    """Test probe parsing (rotation, audio), rungs up to the source size, and portrait rendition sizes"""
+    probe = json.dumps({
+        "streams": [{"codec_type": "video", "width": 1920, "height": 1080,
+                     "side_data_list": [{"rotation": -90}]}, {"codec_type": "audio"}],
+        "format": {"duration": "31.5"},
+    })
+    info = parse_probe(probe)
+    assert info == VideoInfo(1080, 1920, 31.5, True)
+    rungs = select_ladder(info)
+    assert [r.name for r in rungs] == ["360p", "720p", "1080p"]
+    assert [rendition_size(info, r) for r in rungs] == [(360, 640), (720, 1280), (1080, 1920)]
+
+    assert [r.name for r in select_ladder(VideoInfo(426, 241, 5, False))] == ["240p"]
+    with pytest.raises(TranscodeError):
+        parse_probe(json.dumps({"streams": [{"codec_type": "audio"}]}))
+
+def test_transcode_command_maps_every_rendition():
+    """Test one ffmpeg call maps a scaled video (and the audio, if any) per rung into named HLS variants"""
+    info = VideoInfo(1280, 720, 10, False)
+    command = transcode_command(Path("/in.mp4"), Path("/out"), "ab" * 32, info, select_ladder(info), 6, 2)
+    assert command[command.index("-var_stream_map") + 1] == "v:0,name:360p v:1,name:720p"
+    assert "[s1]scale=-2:720[v1]" in command[command.index("-filter_complex") + 1]
+    assert "0:a:0" not in command and command[-1] == f"/out/{'ab' * 32}_hls_%v.m3u8"
+
+    with_audio = transcode_command(Path("/in.mp4"), Path("/out"), "ab" * 32, info._replace(has_audio=True),
+                                   select_ladder(info), 6, 2)
+    assert with_audio.count("0:a:0") == 2
+    assert with_audio[with_audio.index("-var_stream_map") + 1] == "v:0,a:0,name:360p v:1,a:1,name:720p"
+
+    ready = {"status": "ready", "playlist": "x_hls.m3u8", "poster": "x_poster.jpg", "duration": 10}
+    assert stream_urls("/api/videos/rooms", ready)["playlist_url"] == "/api/videos/rooms/x_hls.m3u8"
+    assert stream_urls("/api/videos/rooms", {"status": "queued"}) == {"status": "queued"}
+
+class _FakeTranscoder(VideoTranscoder):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.available = True
+        self.active = 0
+        self.peak = 0
+
+    async def transcode(self, sha256, source, output_dir):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if source.name == "broken.mp4":
+            raise TranscodeError("Invalid data found when processing input")
+        return {"status": "ready", "playlist": f"{sha256}_hls.m3u8", "poster": f"{sha256}_poster.jpg"}
+
+def test_queue_limits_concurrency_and_reports_status():
+    """Test at most max_jobs transcodes run at once, duplicates are queued once, and failures are reported"""
+    updates = {}
+
+    async def on_update(sha256, stream):
+        updates.setdefault(sha256, []).append(stream["status"])
+
+    async def scenario():
+        transcoder = _FakeTranscoder(max_jobs=2)
+        assert transcoder.schedule("a", Path("a.mp4"), Path("."), on_update) is False  # not started
+        transcoder.start()
+        for name in ["v1", "v2", "v3", "v4", "v1"]:
+            assert transcoder.schedule(name, Path(f"{name}.mp4"), Path("."), on_update)
+        transcoder.schedule("bad", Path("broken.mp4"), Path("."), on_update)
+        await transcoder._queue.join()
+        await asyncio.sleep(0)
+        await transcoder.stop()
+        return transcoder
+
+    transcoder = asyncio.run(scenario())
+    assert transcoder.peak == 2
+    assert updates["v1"] == ["processing", "ready"] and len(updates) == 5
+    assert updates["bad"] == ["processing", "failed"]
+    assert transcoder.stats()["completed"] == 4 and transcoder.stats()["failed"] == 1
@@ -0,0 +1,63 @@
+"""
+Turkish-aware text folding for search keys.
+
+`fold` maps text to a lowercase ASCII key so "İstanbul", "ISTANBUL",
+"istanbul" and "Istanbul" all compare equal: the Turkish letters are mapped
+explicitly first (Python's lower() turns "I" into "i" and "İ" into "i̇",
+neither of which matches what Turkish users type), then the remaining
+diacritics are stripped after NFKD decomposition. Dotted and dotless i both
+fold to "i" because users routinely type one for the other.
+
+Folded keys are stored next to the original field on write, so filters are
+equality or `prefix_match` lookups on an indexed key instead of
+case-insensitive regexes, which Mongo can only answer with a full scan and
+which do not know that "i" and "İ" are the same letter.
+"""
+
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+_TURKISH_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i",
+    "Ş": "s", "ş": "s",
+    "Ğ": "g", "ğ": "g",
+    "Ç": "c", "ç": "c",
+    "Ö": "o", "ö": "o",
+    "Ü": "u", "ü": "u",
+})
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: Optional[str]) -> str:
+    """Casefolded, diacritic-free form of `text` with whitespace collapsed"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.translate(_TURKISH_FOLD))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+def prefix_match(text: Optional[str]) -> Optional[dict]:
+    """Filter matching folded keys that start with `text`, or None if nothing is left after folding
+
+    The pattern is anchored and case-sensitive, so Mongo turns it into a
+    bounded index range on the key instead of scanning every document.
+    """
+    key = fold(text)
+    if not key:
+        return None
+    return {"$regex": "^" + re.escape(key)}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(fold(text))
+
+
+def search_text(parts: Iterable[Optional[str]]) -> str:
+    """Folded tokens of all `parts`, de-duplicated, for a text index"""
+    seen = {}
+    for part in parts:
+        for token in tokenize(part):
+            seen.setdefault(token, None)
+    return " ".join(seen)
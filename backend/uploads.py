@@ -0,0 +1,455 @@
+"""
+Streaming uploads with off-loop disk writes.
+
+`UploadWriter.save` copies an upload to disk in `chunk_size` pieces: each
+chunk is counted against the size limit as it is read (the copy stops with
+UploadTooLarge as soon as the limit is crossed), fed to a running SHA-256,
+and written on a small dedicated thread pool so slow disks never block the
+event loop. Files are written to `<name>.part` and renamed into place only
+when complete, so a failed upload never leaves a truncated file behind.
+
+Large videos (360° tours in particular) can also be sent as a resumable
+upload session, stored in the upload_sessions collection:
+
+    {id, owner_id, kind, target_id, extension, content_type, size,
+     received, status, created_at, expires_at, sha256, video_url, error}
+
+The client creates a session with the total size, then sends the bytes in
+any number of requests, each starting at the session's `received` offset.
+A dropped connection only loses the chunk in flight: the client asks for
+the session, and resumes from `received`. The running hash of each session
+is kept in memory between chunks; after a restart it is recomputed from
+the part file on the next chunk. Each chunk extends the session's expiry,
+so only uploads left idle for the whole TTL are removed: `start` runs
+`purge_stale` every `purge_interval_seconds` in the background.
+
+A session is "uploading" until every byte has arrived, then "processing"
+while the file is published, and finally "complete" (or "failed").
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Request header carrying the byte offset of a session chunk (409 responses carry the expected one)
+UPLOAD_OFFSET_HEADER = "Upload-Offset"
+
+
+class UploadTooLarge(Exception):
+    """The upload is larger than the limit it was saved with"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class UploadOffsetMismatch(Exception):
+    """A session chunk does not start where the previous one ended"""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Upload offset must be {expected}")
+        self.expected = expected
+
+
+class StoredUpload(NamedTuple):
+    path: Path
+    size: int
+    sha256: str
+
+
+def size_limit_detail(max_bytes: int, label: str = "File") -> str:
+    return f"{label} size must be less than {max_bytes // (1024 * 1024)}MB"
+
+
+async def read_chunks(source, chunk_size: int) -> AsyncIterator[bytes]:
+    """Chunks of an UploadFile (Starlette reads rolled-over spool files off the loop)"""
+    while True:
+        chunk = await source.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _truncate(path: Path, size: int) -> None:
+    with open(path, "r+b") as handle:
+        handle.truncate(size)
+
+
+def _hash_file(path: Path, size: int, chunk_size: int):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as handle:
+        remaining = size
+        while remaining > 0:
+            chunk = handle.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+def _remove(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class UploadSizeLimit:
+    """ASGI middleware refusing upload bodies over the limit with 413
+
+    Multipart bodies are parsed before the endpoint runs, so without this an
+    oversized file would be received in full before UploadWriter rejects it.
+    A declared Content-Length over the limit is refused before anything is
+    read; chunked bodies, which declare none, are counted as they are
+    received and cut off with the same 413 once they pass it. `limits` maps
+    POST path suffixes to their file size limit; `overhead` allows for the
+    multipart framing around the file.
+    """
+
+    def __init__(self, app, limits: Dict[str, int], overhead: int = 64 * 1024):
+        self.app = app
+        self.limits = limits
+        self.overhead = overhead
+
+    def limit_for(self, method: str, path: str) -> Optional[int]:
+        if method != "POST":
+            return None
+        return next((limit for suffix, limit in self.limits.items() if path.endswith(suffix)), None)
+
+    async def reject(self, send, limit: int) -> None:
+        body = json.dumps({"detail": size_limit_detail(limit)}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limit_for(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit + self.overhead:
+            await self.reject(send, limit)
+            return
+
+        state = {"received": 0, "exceeded": False, "started": False, "rejected": False}
+
+        async def counted_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > limit + self.overhead:
+                    state["exceeded"] = True
+                    raise UploadTooLarge(limit)
+            return message
+
+        async def guarded_send(message):
+            # Whatever the app makes of the cut-off body (a 400 parse error), the client gets the 413
+            if state["exceeded"] and not state["started"]:
+                if not state["rejected"]:
+                    state["rejected"] = True
+                    await self.reject(send, limit)
+                return
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, counted_receive, guarded_send)
+        except UploadTooLarge:
+            if not state["exceeded"]:
+                raise
+            if not state["started"] and not state["rejected"]:
+                await self.reject(send, limit)
+
+
+class UploadWriter:
+    def __init__(self, max_workers: int = 4, chunk_size: int = 1024 * 1024):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        self.files_written = 0
+        self.bytes_written = 0
+        self.rejected_too_large = 0
+        self.failed = 0
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def append(self, chunks: AsyncIterator[bytes], path: Path, max_bytes: int, hasher) -> int:
+        """Append `chunks` to `path`, hashing as they arrive; returns bytes written
+
+        Raises UploadTooLarge once more than `max_bytes` have been read. The
+        caller decides what to do with the partially written file.
+        """
+        handle = await self.run(open, path, "ab")
+        written = 0
+        # Request bodies arrive in small pieces; batch them so each thread hop writes a full chunk
+        buffer = bytearray()
+        try:
+            async for chunk in chunks:
+                written += len(chunk)
+                if written > max_bytes:
+                    self.rejected_too_large += 1
+                    raise UploadTooLarge(max_bytes)
+                hasher.update(chunk)
+                buffer += chunk
+                if len(buffer) >= self.chunk_size:
+                    await self.run(handle.write, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await self.run(handle.write, bytes(buffer))
+        finally:
+            await self.run(handle.close)
+        self.bytes_written += written
+        return written
+
+    async def save(self, source, destination: Path, max_bytes: int) -> StoredUpload:
+        """Stream an UploadFile to `destination`; raises UploadTooLarge past `max_bytes`"""
+        part = destination.with_name(destination.name + ".part")
+        hasher = hashlib.sha256()
+        try:
+            size = await self.append(read_chunks(source, self.chunk_size), part, max_bytes, hasher)
+            await self.run(os.replace, part, destination)
+        except BaseException as e:
+            if not isinstance(e, UploadTooLarge):
+                self.failed += 1
+            await self.run(_remove, part)
+            raise
+        self.files_written += 1
+        return StoredUpload(destination, size, hasher.hexdigest())
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "chunk_size": self.chunk_size,
+            "files_written": self.files_written,
+            "bytes_written": self.bytes_written,
+            "rejected_too_large": self.rejected_too_large,
+            "failed": self.failed,
+        }
+
+
+class UploadSessions:
+    def __init__(
+        self,
+        collection,
+        writer: UploadWriter,
+        directory: Path,
+        ttl_seconds: float = 24 * 3600,
+        purge_interval_seconds: float = 3600.0,
+    ):
+        self.collection = collection
+        self.writer = writer
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        # session id -> (bytes hashed, running sha256)
+        self._hashers: Dict[str, tuple] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.created = 0
+        self.completed = 0
+        self.failed = 0
+        self.resumed_hashes = 0
+
+    def part_path(self, session: dict) -> Path:
+        return self.directory / f"{session['id']}.part"
+
+    async def create(
+        self,
+        owner_id: str,
+        kind: str,
+        target_id: str,
+        extension: str,
+        content_type: str,
+        size: int,
+    ) -> dict:
+        now = datetime.now(timezone.utc)
+        session = {
+            "id": str(uuid.uuid4()),
+            "owner_id": owner_id,
+            "kind": kind,
+            "target_id": target_id,
+            "extension": extension,
+            "content_type": content_type,
+            "size": size,
+            "received": 0,
+            "status": "uploading",
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl_seconds),
+        }
+        await self.writer.run(self.part_path(session).touch)
+        await self.collection.insert_one(dict(session))
+        self.created += 1
+        return session
+
+    async def get(self, session_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": session_id}, {"_id": 0})
+
+    async def _hasher_at(self, session: dict, offset: int):
+        """Running hash of the first `offset` bytes of the part file"""
+        known = self._hashers.get(session["id"])
+        if known and known[0] == offset:
+            return known[1]
+        self.resumed_hashes += 1
+        return await self.writer.run(_hash_file, self.part_path(session), offset, self.writer.chunk_size)
+
+    def _expires_at(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+
+    async def append(self, session: dict, offset: int, chunks: AsyncIterator[bytes]) -> dict:
+        """Write one chunk request at `offset`; returns the updated session
+
+        Raises UploadOffsetMismatch if `offset` is not the session's current
+        `received` (or the session is no longer uploading), and UploadTooLarge
+        if the chunk runs past the declared size (the chunk is discarded; the
+        session stays resumable). Every chunk pushes `expires_at` back by the TTL.
+        """
+        lock = self._locks.setdefault(session["id"], asyncio.Lock())
+        async with lock:
+            session = await self.get(session["id"]) or session
+            if session["status"] != "uploading" or offset != session["received"]:
+                raise UploadOffsetMismatch(session["received"])
+            part = self.part_path(session)
+            # Drop bytes of an earlier chunk that failed after being partly written
+            await self.writer.run(_truncate, part, offset)
+            hasher = await self._hasher_at(session, offset)
+            try:
+                written = await self.writer.append(chunks, part, session["size"] - offset, hasher)
+            except BaseException:
+                self._hashers.pop(session["id"], None)
+                await self.writer.run(_truncate, part, offset)
+                raise
+            received = offset + written
+            expires_at = self._expires_at()
+            await self.collection.update_one(
+                {"id": session["id"], "received": offset},
+                {"$set": {"received": received, "expires_at": expires_at}}
+            )
+            self._hashers[session["id"]] = (received, hasher)
+            session.update(received=received, expires_at=expires_at)
+            return session
+
+    async def finish(self, session: dict, destination: Path) -> StoredUpload:
+        """Move a fully received session into place, leaving it "processing"
+
+        Runs under the session's lock and marks the session before the part
+        file moves, so a retried last chunk sees it is no longer uploading
+        (UploadOffsetMismatch) instead of looking for the part file. The
+        caller publishes the file and then calls `complete` or `fail`.
+        """
+        lock = self._locks.setdefault(session["id"], asyncio.Lock())
+        async with lock:
+            session = await self.get(session["id"]) or session
+            if session["status"] != "uploading" or session["received"] != session["size"]:
+                raise UploadOffsetMismatch(session["received"])
+            _, hasher = self._hashers.pop(session["id"], None) or (None, None)
+            if hasher is None:
+                hasher = await self._hasher_at(session, session["received"])
+            digest = hasher.hexdigest()
+            await self.collection.update_one(
+                {"id": session["id"], "status": "uploading"},
+                {"$set": {"status": "processing", "sha256": digest}}
+            )
+            try:
+                await self.writer.run(os.replace, self.part_path(session), destination)
+            except BaseException:
+                await self.collection.update_one({"id": session["id"]}, {"$set": {"status": "uploading"}})
+                raise
+        self._locks.pop(session["id"], None)
+        self.writer.files_written += 1
+        return StoredUpload(destination, session["received"], digest)
+
+    async def complete(self, session: dict, **fields) -> None:
+        """Mark a finished session complete, storing `fields` on it"""
+        await self.collection.update_one({"id": session["id"]}, {"$set": {"status": "complete", **fields}})
+        self.completed += 1
+
+    async def fail(self, session: dict, stored: StoredUpload, error: str) -> None:
+        """Mark a finished session whose file could not be published and remove what is left of the file
+
+        The client has to start a new upload.
+        """
+        await self.collection.update_one({"id": session["id"]}, {"$set": {"status": "failed", "error": error}})
+        await self.writer.run(_remove, stored.path)
+        self.failed += 1
+
+    async def abort(self, session: dict) -> None:
+        self._hashers.pop(session["id"], None)
+        self._locks.pop(session["id"], None)
+        await self.collection.delete_one({"id": session["id"]})
+        await self.writer.run(_remove, self.part_path(session))
+
+    def _purge_stale_sync(self, skip: set) -> list:
+        cutoff = time.time() - self.ttl_seconds
+        removed = []
+        for entry in os.scandir(self.directory):
+            session_id = entry.name[:-len(".part")]
+            if entry.name.endswith(".part") and session_id not in skip and entry.stat().st_mtime < cutoff:
+                _remove(Path(entry.path))
+                removed.append(session_id)
+        return removed
+
+    async def purge_stale(self) -> int:
+        """Delete part files of sessions untouched for longer than the TTL; returns files removed
+
+        The running hashes and locks of those sessions are dropped with
+        them; sessions with a chunk in flight are left alone. The session
+        documents themselves expire through a TTL index on expires_at.
+        """
+        busy = {session_id for session_id, lock in self._locks.items() if lock.locked()}
+        try:
+            removed = await self.writer.run(self._purge_stale_sync, busy)
+        except Exception as e:
+            logger.error(f"Upload part cleanup failed: {e}")
+            return 0
+        for session_id in removed:
+            self._hashers.pop(session_id, None)
+            self._locks.pop(session_id, None)
+        return len(removed)
+
+    async def _run(self) -> None:
+        while True:
+            removed = await self.purge_stale()
+            if removed:
+                logger.info(f"Removed {removed} abandoned upload part files")
+            await asyncio.sleep(self.purge_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "created": self.created,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_progress": len(self._hashers),
+            "resumed_hashes": self.resumed_hashes,
+        }
@@ -0,0 +1,341 @@
+"""
+Adaptive HLS renditions of uploaded hotel, room and 360° videos.
+
+After a video is stored in the blob store, `VideoTranscoder.schedule` puts
+it on a local queue. Each queued video is transcoded by one ffmpeg process
+into an H.264/AAC ladder of the configured sizes up to the source size
+(scaled on the short side, so portrait videos keep their detail), cut into
+`segment_seconds` segments with aligned keyframes, plus a master playlist
+and a poster frame. Everything is written next to the blob:
+
+    <sha256>_hls.m3u8                 master playlist
+    <sha256>_hls_<size>p.m3u8         one playlist per rendition
+    <sha256>_hls_<size>p_00001.ts     its segments
+    <sha256>_poster.jpg
+
+so the blob store deletes them with the video, and the existing video routes
+serve them (the playlists refer to each other by file name only). At most
+`max_jobs` ffmpeg processes run at once, by default one per core, each with
+an equal share of the cores as encoder threads.
+
+The status goes to the `on_update(sha256, stream)` callback as the job moves
+from queued to processing to ready or failed:
+
+    {"status": "ready", "playlist": "<sha256>_hls.m3u8",
+     "poster": "<sha256>_poster.jpg", "duration": 42.1, "width": 1920,
+     "height": 1080, "renditions": [{"name": "360p", "width": 640,
+     "height": 360, "bandwidth": 1056000, "playlist": "..."}, ...]}
+
+Without ffmpeg and ffprobe on PATH the transcoder stays disabled and videos
+are only offered as uploaded.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (short side in pixels, video bitrate in kbit/s)
+DEFAULT_LADDER = ((360, 800), (720, 2800), (1080, 5000))
+AUDIO_KBPS = 128
+MEDIA_TYPES = {"m3u8": "application/vnd.apple.mpegurl", "ts": "video/mp2t", "jpg": "image/jpeg"}
+
+
+class TranscodeError(Exception):
+    """ffmpeg or ffprobe failed on a video"""
+
+
+class VideoInfo(NamedTuple):
+    width: int
+    height: int
+    duration: float
+    has_audio: bool
+
+
+class Rung(NamedTuple):
+    name: str
+    short_side: int
+    video_kbps: int
+
+
+def ffmpeg_available() -> bool:
+    return bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+
+
+def master_playlist_name(sha256: str) -> str:
+    return f"{sha256}_hls.m3u8"
+
+
+def poster_name(sha256: str) -> str:
+    return f"{sha256}_poster.jpg"
+
+
+def stream_urls(base_url: str, stream: dict) -> dict:
+    """What a hotel/room document shows of a stream: the status, and the files as URLs under `base_url`"""
+    urls = {"status": stream["status"]}
+    if stream["status"] == "ready":
+        urls.update(
+            playlist_url=f"{base_url}/{stream['playlist']}",
+            poster_url=f"{base_url}/{stream['poster']}",
+            duration=stream.get("duration"),
+            width=stream.get("width"),
+            height=stream.get("height"),
+        )
+    return urls
+
+
+def parse_probe(output: str) -> VideoInfo:
+    """Dimensions, duration and audio presence from `ffprobe -print_format json` output"""
+    probe = json.loads(output or "{}")
+    streams = probe.get("streams") or []
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    if video is None:
+        raise TranscodeError("No video stream")
+    width, height = int(video.get("width") or 0), int(video.get("height") or 0)
+    # Phone videos are often stored landscape with a rotation flag; ffmpeg applies it when decoding
+    rotation = next((int(d.get("rotation", 0)) for d in video.get("side_data_list") or [] if "rotation" in d),
+                    int((video.get("tags") or {}).get("rotate", 0)))
+    if abs(rotation) % 180 == 90:
+        width, height = height, width
+    duration = float((probe.get("format") or {}).get("duration") or video.get("duration") or 0)
+    has_audio = any(s.get("codec_type") == "audio" for s in streams)
+    return VideoInfo(width, height, duration, has_audio)
+
+
+def select_ladder(info: VideoInfo, ladder: Sequence[Tuple[int, int]] = DEFAULT_LADDER) -> List[Rung]:
+    """The rungs no larger than the source; a source below the lowest rung gets one at its own size"""
+    short_side = min(info.width, info.height)
+    rungs = [Rung(f"{side}p", side, kbps) for side, kbps in sorted(ladder) if side <= short_side]
+    if not rungs:
+        side = max(2, short_side - short_side % 2)
+        rungs = [Rung(f"{side}p", side, min(kbps for _, kbps in ladder))]
+    return rungs
+
+
+def rendition_size(info: VideoInfo, rung: Rung) -> Tuple[int, int]:
+    """Width and height of a rung, as ffmpeg scales it (the long side rounded to even)"""
+    long_side = round(max(info.width, info.height) * rung.short_side / min(info.width, info.height))
+    long_side -= long_side % 2
+    if info.width >= info.height:
+        return long_side, rung.short_side
+    return rung.short_side, long_side
+
+
+def transcode_command(
+    source: Path,
+    output_dir: Path,
+    sha256: str,
+    info: VideoInfo,
+    rungs: Sequence[Rung],
+    segment_seconds: int,
+    threads: int,
+) -> List[str]:
+    """One ffmpeg invocation writing every rendition, its playlist and the master playlist"""
+    landscape = info.width >= info.height
+    split = f"[0:v]split={len(rungs)}" + "".join(f"[s{i}]" for i in range(len(rungs)))
+    scales = [
+        f"[s{i}]scale={'-2:' + str(rung.short_side) if landscape else str(rung.short_side) + ':-2'}[v{i}]"
+        for i, rung in enumerate(rungs)
+    ]
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+        "-i", str(source),
+        "-filter_complex", ";".join([split, *scales]),
+    ]
+    stream_map = []
+    for i, rung in enumerate(rungs):
+        command += [
+            "-map", f"[v{i}]",
+            f"-c:v:{i}", "libx264", f"-b:v:{i}", f"{rung.video_kbps}k",
+            f"-maxrate:v:{i}", f"{rung.video_kbps * 107 // 100}k", f"-bufsize:v:{i}", f"{rung.video_kbps * 3 // 2}k",
+        ]
+        if info.has_audio:
+            command += ["-map", "0:a:0"]
+            stream_map.append(f"v:{i},a:{i},name:{rung.name}")
+        else:
+            stream_map.append(f"v:{i},name:{rung.name}")
+    if info.has_audio:
+        command += ["-c:a", "aac", "-b:a", f"{AUDIO_KBPS}k", "-ac", "2"]
+    command += [
+        "-preset", "veryfast", "-pix_fmt", "yuv420p", "-threads", str(threads),
+        # Keyframes on every segment boundary, identical across renditions, so players can switch
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})", "-sc_threshold", "0",
+        "-f", "hls", "-hls_time", str(segment_seconds), "-hls_playlist_type", "vod",
+        "-hls_flags", "independent_segments",
+        "-hls_segment_filename", str(output_dir / f"{sha256}_hls_%v_%05d.ts"),
+        "-master_pl_name", master_playlist_name(sha256),
+        "-var_stream_map", " ".join(stream_map),
+        str(output_dir / f"{sha256}_hls_%v.m3u8"),
+    ]
+    return command
+
+
+def poster_command(source: Path, output: Path, info: VideoInfo) -> List[str]:
+    # A little into the video: first frames are often black or a fade-in
+    at = min(info.duration * 0.1, 5.0)
+    scale = "-2:'min(720,ih)'" if info.width >= info.height else "'min(720,iw)':-2"
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+        "-ss", f"{at:.2f}", "-i", str(source),
+        "-frames:v", "1", "-vf", f"scale={scale}", "-q:v", "3", str(output),
+    ]
+
+
+def _remove_outputs(output_dir: Path, sha256: str) -> None:
+    prefixes = (f"{sha256}_hls", poster_name(sha256))
+    for entry in os.scandir(output_dir):
+        if entry.name.startswith(prefixes):
+            os.unlink(entry.path)
+
+
+class VideoTranscoder:
+    def __init__(
+        self,
+        max_jobs: Optional[int] = None,
+        ladder: Sequence[Tuple[int, int]] = DEFAULT_LADDER,
+        segment_seconds: int = 6,
+        timeout_seconds: float = 3600.0,
+    ):
+        cores = os.cpu_count() or 1
+        self.max_jobs = max_jobs or cores
+        self.threads = max(1, cores // self.max_jobs)
+        self.ladder = tuple(ladder)
+        self.segment_seconds = segment_seconds
+        self.timeout_seconds = timeout_seconds
+        self.available = ffmpeg_available()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._pending: Set[str] = set()
+        self._processes: Set[asyncio.subprocess.Process] = set()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if not self.available:
+            logger.warning("ffmpeg/ffprobe not found - videos are served without HLS renditions")
+            return
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_jobs)]
+
+    def schedule(
+        self,
+        sha256: str,
+        source: Path,
+        output_dir: Path,
+        on_update: Callable[[str, dict], Awaitable[None]],
+    ) -> bool:
+        """Queue a video; False when the transcoder is disabled. A video already queued is not queued twice"""
+        if self._queue is None:
+            return False
+        if sha256 not in self._pending:
+            self._pending.add(sha256)
+            self._queue.put_nowait((sha256, source, output_dir, on_update))
+        return True
+
+    async def _run(self, command: List[str]) -> str:
+        process = await asyncio.create_subprocess_exec(
+            *command, stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        self._processes.add(process)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout_seconds)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            process.kill()
+            await process.wait()
+            raise
+        finally:
+            self._processes.discard(process)
+        if process.returncode != 0:
+            raise TranscodeError(stderr.decode(errors="replace").strip()[-500:] or f"{command[0]} exited with {process.returncode}")
+        return stdout.decode(errors="replace")
+
+    async def probe(self, source: Path) -> VideoInfo:
+        output = await self._run([
+            "ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", str(source)
+        ])
+        return parse_probe(output)
+
+    async def transcode(self, sha256: str, source: Path, output_dir: Path) -> dict:
+        """Write the HLS ladder and poster of one video; returns its `ready` stream manifest"""
+        info = await self.probe(source)
+        rungs = select_ladder(info, self.ladder)
+        try:
+            await self._run(transcode_command(
+                source, output_dir, sha256, info, rungs, self.segment_seconds, self.threads
+            ))
+            await self._run(poster_command(source, output_dir / poster_name(sha256), info))
+        except BaseException:
+            # Partial output would be served as if it were complete
+            _remove_outputs(output_dir, sha256)
+            raise
+        return {
+            "status": "ready",
+            "playlist": master_playlist_name(sha256),
+            "poster": poster_name(sha256),
+            "duration": round(info.duration, 2),
+            "width": info.width,
+            "height": info.height,
+            "renditions": [
+                {
+                    "name": rung.name,
+                    **dict(zip(("width", "height"), rendition_size(info, rung))),
+                    "bandwidth": (rung.video_kbps + (AUDIO_KBPS if info.has_audio else 0)) * 1000,
+                    "playlist": f"{sha256}_hls_{rung.name}.m3u8",
+                }
+                for rung in rungs
+            ],
+        }
+
+    async def _work(self) -> None:
+        while True:
+            sha256, source, output_dir, on_update = await self._queue.get()
+            self.running += 1
+            try:
+                await on_update(sha256, {"status": "processing"})
+                stream = await self.transcode(sha256, source, output_dir)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Video transcoding failed for {source.name}: {e}")
+                stream = {"status": "failed", "error": str(e)[-500:]}
+            finally:
+                self.running -= 1
+                self._pending.discard(sha256)
+                self._queue.task_done()
+            try:
+                await on_update(sha256, stream)
+            except Exception as e:
+                logger.error(f"Saving video stream status failed for {source.name}: {e}")
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        for process in list(self._processes):
+            process.kill()
+        self._workers = []
+        self._queue = None
+        self._pending.clear()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "available": self.available,
+            "workers": self.max_jobs,
+            "threads_per_job": self.threads,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
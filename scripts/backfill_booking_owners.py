@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Copy hotel_id and manager_id onto existing bookings
+
+New bookings get both fields when they are created; run this once after
+deploying to fill in older bookings (manager booking lists only match on
+the copied manager_id). It is idempotent and also repairs bookings whose
+copies disagree with their room's hotel, so it is safe to re-run.
+
+Usage:
+    python scripts/backfill_booking_owners.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from booking_owners import backfill
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+
+    print("="*60)
+    print("🏨 Rezervasyonlara Otel/Yönetici Bilgisi Ekleniyor")
+    print("="*60)
+
+    started = time.perf_counter()
+    updated = await backfill(db)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n✅ {updated} rezervasyon güncellendi ({elapsed:.1f} sn)")
+    print("="*60)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Store folded city_key/name_key on existing hotels
+
+New and updated hotels get both keys on write; GET /hotels filters on them,
+so hotels written before the keys existed do not match a city or name
+filter until this has run. It only writes hotels whose keys are missing or
+stale, so it is safe to re-run.
+
+Usage:
+    python scripts/backfill_hotel_keys.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from hotel_keys import backfill
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+
+    print("="*60)
+    print("🔤 Otellere Arama Anahtarları (city_key/name_key) Ekleniyor")
+    print("="*60)
+
+    started = time.perf_counter()
+    updated = await backfill(db)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n✅ {updated} otel güncellendi ({elapsed:.1f} sn)")
+    print("="*60)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark the availability index against the old booking-scan path
+
+The old path queried up to 1000 overlapping bookings from Mongo for every
+request and expanded them day by day. The new path loads a room's bookings
+once into backend/availability.py's RoomIntervals and answers from memory.
+
+Usage:
+    python scripts/benchmark_availability.py --bookings 5000
+    python scripts/benchmark_availability.py --offline   # no MongoDB needed
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from availability import AvailabilityIndex, RoomIntervals, expand_day_ranges
+
+ROOM_ID = "bench-room"
+EPOCH = datetime(2018, 1, 1)
+
+
+def make_bookings(count: int):
+    """Back-to-back historical bookings of 1-3 days with small gaps"""
+    bookings = []
+    cursor = EPOCH
+    for _ in range(count):
+        cursor += timedelta(days=random.randint(0, 2), hours=9)
+        end = cursor + timedelta(days=random.randint(0, 2), hours=8)
+        bookings.append({
+            "id": str(uuid.uuid4()),
+            "room_id": ROOM_ID,
+            "status": random.choice(["pending", "confirmed"]),
+            "start_date": cursor,
+            "end_date": end,
+        })
+        cursor = end.replace(hour=0) + timedelta(days=1)
+    return bookings
+
+
+def make_queries(bookings, count: int):
+    last = bookings[-1]["end_date"]
+    span = (last - EPOCH).days
+    queries = []
+    for _ in range(count):
+        start = EPOCH + timedelta(days=random.randint(0, span))
+        queries.append((start, start + timedelta(days=random.randint(1, 14))))
+    return queries
+
+
+def old_path_in_memory(bookings, start, end):
+    conflicts = [b for b in bookings if b["start_date"] <= end and b["end_date"] >= start][:1000]
+    booked_dates = []
+    for booking in conflicts:
+        current = booking["start_date"]
+        while current <= booking["end_date"]:
+            booked_dates.append(current.strftime("%Y-%m-%d"))
+            current += timedelta(days=1)
+    return len(conflicts) == 0, list(set(booked_dates))
+
+
+def new_path(intervals: RoomIntervals, start, end):
+    conflicts = intervals.overlapping(start, end)
+    return len(conflicts) == 0, expand_day_ranges(intervals.booked_ranges(start, end))
+
+
+def report(label: str, seconds: float, queries: int):
+    print(f"   {label:<32} {seconds * 1000:9.1f} ms total  {seconds / queries * 1e6:9.1f} µs/query")
+
+
+def run_offline(booking_count: int, query_count: int):
+    bookings = make_bookings(booking_count)
+    queries = make_queries(bookings, query_count)
+
+    started = time.perf_counter()
+    for start, end in queries:
+        old_path_in_memory(bookings, start, end)
+    old_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    intervals = RoomIntervals((b["start_date"], b["end_date"], b["id"]) for b in bookings)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for start, end in queries:
+        new_path(intervals, start, end)
+    new_seconds = time.perf_counter() - started
+
+    print(f"📊 {booking_count} bookings, {query_count} queries (offline)")
+    report("linear scan + day loop", old_seconds, query_count)
+    report("RoomIntervals (build once)", build_seconds, 1)
+    report("RoomIntervals queries", new_seconds, query_count)
+
+
+async def run_mongo(booking_count: int, query_count: int):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('BENCH_DB_NAME', 'meetdelux_bench')]
+    collection = db.bench_bookings
+    await collection.drop()
+    await collection.create_index([("room_id", 1), ("status", 1), ("start_date", 1), ("end_date", 1)])
+
+    bookings = make_bookings(booking_count)
+    await collection.insert_many([dict(b) for b in bookings])
+    queries = make_queries(bookings, query_count)
+
+    started = time.perf_counter()
+    for start, end in queries:
+        conflicts = await collection.find({
+            "room_id": ROOM_ID,
+            "status": {"$in": ["pending", "confirmed"]},
+            "$or": [{"start_date": {"$lte": end}, "end_date": {"$gte": start}}]
+        }).to_list(1000)
+        booked_dates = []
+        for booking in conflicts:
+            current = booking["start_date"]
+            while current <= booking["end_date"]:
+                booked_dates.append(current.strftime("%Y-%m-%d"))
+                current += timedelta(days=1)
+    old_seconds = time.perf_counter() - started
+
+    index = AvailabilityIndex(collection, ttl_seconds=3600)
+    started = time.perf_counter()
+    for start, end in queries:
+        new_path(await index.get(ROOM_ID), start, end)
+    new_seconds = time.perf_counter() - started
+
+    print(f"📊 {booking_count} bookings, {query_count} queries (MongoDB)")
+    report("Mongo scan + day loop", old_seconds, query_count)
+    report("AvailabilityIndex", new_seconds, query_count)
+    print(f"   cache: {index.stats()}")
+
+    await collection.drop()
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--offline", action="store_true", help="Compare in-memory paths without MongoDB")
+    args = parser.parse_args()
+
+    random.seed(42)
+    if args.offline:
+        run_offline(args.bookings, args.queries)
+    else:
+        asyncio.run(run_mongo(args.bookings, args.queries))
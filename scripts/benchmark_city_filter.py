@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark the folded city_key prefix filter against the old $regex path
+
+The old GET /hotels filter was {"city": {"$regex": city, "$options": "i"}}:
+unanchored and case-insensitive, so Mongo examines every hotel, and "i"
+does not match "İ" ("istanbul" misses "İstanbul"). The new filter is an
+anchored prefix match on the folded, indexed city_key.
+
+The default run measures both filters against MongoDB and reports query
+time plus the index keys and documents each plan examines (from explain).
+Those are the numbers that reflect the API. --offline is only an in-memory
+proxy: a Python regex over a list against bisect on a sorted key list. It
+shows the shape of the difference (scan vs range) and the İ/I matches,
+not MongoDB timings.
+
+Usage:
+    python scripts/benchmark_city_filter.py --hotels 20000
+    python scripts/benchmark_city_filter.py --offline   # in-memory proxy, no MongoDB needed
+"""
+
+import argparse
+import asyncio
+import bisect
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from hotel_keys import hotel_keys
+from text_normalization import fold, prefix_match
+
+CITIES = ["İstanbul", "İzmir", "Ankara", "Antalya", "Muğla", "Şanlıurfa", "Çanakkale", "Eskişehir",
+          "Diyarbakır", "Gaziantep", "Kırklareli", "Bursa", "Trabzon", "Ağrı", "Iğdır", "Uşak"]
+# What users type: lowercase ASCII, partial names, Turkish capitals
+TYPED = ["istanbul", "izmir", "ankara", "ant", "mugla", "sanliurfa", "CANAKKALE", "eskişehir",
+         "İstanbul", "IZMIR", "igdir", "usak"]
+
+
+def make_hotels(count: int):
+    hotels = []
+    for _ in range(count):
+        hotel = {"id": str(uuid.uuid4()), "name": f"Hotel {uuid.uuid4().hex[:6]}", "city": random.choice(CITIES),
+                 "is_active": True, "approval_status": "approved"}
+        hotel.update(hotel_keys(hotel))
+        hotels.append(hotel)
+    return hotels
+
+
+def report(label: str, seconds: float, queries: int, matched: int):
+    print(f"   {label:<28} {seconds * 1000:9.1f} ms total  {seconds / queries * 1e6:9.1f} µs/query  {matched:>8} matches")
+
+
+def run_offline(hotel_count: int, rounds: int):
+    hotels = make_hotels(hotel_count)
+    queries = TYPED * rounds
+
+    started = time.perf_counter()
+    old_matches = 0
+    for typed in queries:
+        pattern = re.compile(typed, re.IGNORECASE)
+        old_matches += sum(1 for h in hotels if pattern.search(h["city"]))
+    old_seconds = time.perf_counter() - started
+
+    # A sorted key list stands in for the B-tree the index provides
+    keys = sorted(h["city_key"] for h in hotels)
+    started = time.perf_counter()
+    new_matches = 0
+    for typed in queries:
+        key = fold(typed)
+        new_matches += bisect.bisect_left(keys, key + "￿") - bisect.bisect_left(keys, key)
+    new_seconds = time.perf_counter() - started
+
+    print(f"📊 {hotel_count} hotels, {len(queries)} queries (offline in-memory proxy, not MongoDB timings)")
+    report("regex scan (case-insensitive)", old_seconds, len(queries), old_matches)
+    report("city_key prefix range", new_seconds, len(queries), new_matches)
+
+
+async def run_mongo(hotel_count: int, rounds: int):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('BENCH_DB_NAME', 'meetdelux_bench')]
+    collection = db.bench_hotels
+    await collection.drop()
+    await collection.create_index([("is_active", 1), ("approval_status", 1), ("city", 1)])
+    await collection.create_index([("is_active", 1), ("approval_status", 1), ("city_key", 1),
+                                   ("created_at", -1), ("id", -1)])
+    await collection.insert_many(make_hotels(hotel_count))
+    queries = TYPED * rounds
+    base = {"is_active": True, "approval_status": "approved"}
+
+    async def timed(build):
+        matched = keys_examined = docs_examined = 0
+        started = time.perf_counter()
+        for typed in queries:
+            matched += len(await collection.find({**base, **build(typed)}, {"_id": 0, "id": 1}).to_list(None))
+        seconds = time.perf_counter() - started
+        for typed in TYPED:
+            plan = await collection.find({**base, **build(typed)}).explain()
+            keys_examined += plan["executionStats"]["totalKeysExamined"]
+            docs_examined += plan["executionStats"]["totalDocsExamined"]
+        return seconds, matched, keys_examined // len(TYPED), docs_examined // len(TYPED)
+
+    old = await timed(lambda typed: {"city": {"$regex": typed, "$options": "i"}})
+    new = await timed(lambda typed: {"city_key": prefix_match(typed)})
+
+    print(f"📊 {hotel_count} hotels, {len(queries)} queries (MongoDB)")
+    report("city $regex /i", old[0], len(queries), old[1])
+    report("city_key prefix", new[0], len(queries), new[1])
+    print(f"   index keys examined per query: regex {old[2]}, city_key {new[2]}")
+    print(f"   documents examined per query:  regex {old[3]}, city_key {new[3]}")
+
+    await collection.drop()
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=20, help="Times each typed city is queried")
+    parser.add_argument("--offline", action="store_true", help="In-memory proxy without MongoDB (not MongoDB timings)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    if args.offline:
+        run_offline(args.hotels, args.rounds)
+    else:
+        asyncio.run(run_mongo(args.hotels, args.rounds))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: email rendering with compiled Jinja2 templates
+
+Compares the old inline f-string booking reminder with the compiled
+template (one render per call) and render_many (one call for a batch).
+
+Usage:
+    python scripts/benchmark_email_templates.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+sys.path.append(str(ROOT_DIR))
+
+from email_templates import EmailTemplates
+
+APP_URL = "https://www.meetdelux.com"
+
+
+def old_reminder(user_name, booking_details):
+    return f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+                .header {{ background: linear-gradient(135deg, #f59e0b 0%, #d97706 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
+                .content {{ background: #f9f9f9; padding: 30px; }}
+                .reminder-icon {{ font-size: 60px; text-align: center; margin: 20px 0; }}
+                .booking-box {{ background: white; padding: 20px; margin: 20px 0; border-radius: 8px; border: 2px solid #f59e0b; }}
+                .footer {{ text-align: center; margin-top: 30px; color: #666; font-size: 12px; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1 style="margin: 0;">Etkinlik Hatırlatması</h1>
+                </div>
+                <div class="content">
+                    <div class="reminder-icon">⏰</div>
+                    <p>Sayın <strong>{user_name}</strong>,</p>
+                    <p>Yarın etkinliğiniz var! Unutmayın:</p>
+                    <div class="booking-box">
+                        <h3 style="margin-top: 0;">Etkinlik Detayları</h3>
+                        <p><strong>Otel:</strong> {booking_details.get('hotel_name', 'N/A')}</p>
+                        <p><strong>Salon:</strong> {booking_details.get('room_name', 'N/A')}</p>
+                        <p><strong>Tarih:</strong> {booking_details.get('date', 'N/A')}</p>
+                        <p><strong>Saat:</strong> {booking_details.get('time', 'N/A')}</p>
+                        <p><strong>Adres:</strong> {booking_details.get('address', 'N/A')}</p>
+                    </div>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+
+
+def make_reminders(count: int):
+    return [
+        {
+            "user_name": f"Misafir {i}",
+            "booking": {
+                "hotel_name": "Grand Otel",
+                "room_name": f"Salon {i % 7}",
+                "date": "15.03.2026",
+                "time": "09:00",
+                "address": "Kadıköy, İstanbul",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    print("="*60)
+    print("✉️  Email rendering (per-message cost)")
+    print("="*60)
+
+    start = timeit.default_timer()
+    templates = EmailTemplates(app_url=APP_URL)
+    compile_ms = (timeit.default_timer() - start) * 1000
+    print(f"Compiled {len(templates.names)} templates once in {compile_ms:.1f} ms\n")
+
+    print(f"{'batch':>6} {'f-string µs':>12} {'render µs':>10} {'render_many µs':>15}")
+    for count in (1, 100, 1000):
+        reminders = make_reminders(count)
+        repeat = max(1, 2000 // count)
+        old = min(timeit.repeat(
+            lambda: [old_reminder(r["user_name"], r["booking"]) for r in reminders], number=repeat, repeat=3))
+        single = min(timeit.repeat(
+            lambda: [templates.render("booking_reminder", **r) for r in reminders], number=repeat, repeat=3))
+        bulk = min(timeit.repeat(
+            lambda: templates.render_many("booking_reminder", reminders), number=repeat, repeat=3))
+        per_message = lambda total: total / repeat / count * 1e6
+        print(f"{count:>6} {per_message(old):>12.1f} {per_message(single):>10.1f} {per_message(bulk):>15.1f}")
+
+    # What the templates replaced: building the environment on every send
+    start = timeit.default_timer()
+    for _ in range(5):
+        EmailTemplates(app_url=APP_URL).render("booking_reminder", **make_reminders(1)[0])
+    cold_ms = (timeit.default_timer() - start) / 5 * 1000
+    print(f"\nParsing templates per send instead: {cold_ms:.1f} ms per message")
+
+
+if __name__ == "__main__":
+    main()
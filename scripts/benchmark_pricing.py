@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-item Decimal/pydantic pricing vs batch integer-cent pricing
+
+The old listing path built a Decimal and a PricingInfo model for every
+room, then .dict()-ed it back. backend/pricing.py converts the whole list
+in one pass grouped by base currency.
+
+Usage:
+    python scripts/benchmark_pricing.py
+"""
+
+import random
+import sys
+import timeit
+import warnings
+from decimal import Decimal, ROUND_HALF_UP
+from enum import Enum
+from pathlib import Path
+from typing import Optional
+from pydantic import BaseModel
+
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+sys.path.append(str(ROOT_DIR))
+
+from pricing import price_listings
+
+
+class CurrencyCode(str, Enum):
+    USD = "USD"
+    EUR = "EUR"
+    TRY = "TRY"
+
+
+class PricingInfo(BaseModel):
+    base_price: float
+    base_currency: CurrencyCode
+    display_price: float
+    display_currency: CurrencyCode
+    exchange_rate: Optional[float] = None
+
+
+RATES = {"EUR": 37.0, "USD": 34.0}
+
+
+def make_rooms(count: int):
+    return [
+        {
+            "id": str(i),
+            "currency": random.choice(["EUR", "USD", "TRY"]),
+            "price_per_day": round(random.uniform(500, 30000), 2),
+            "price_per_hour": round(random.uniform(50, 3000), 2) if i % 2 else None,
+        }
+        for i in range(count)
+    ]
+
+
+def old_path(rooms, display_currency="TRY"):
+    for room in rooms:
+        base_currency = room.get("currency", "EUR")
+        if base_currency != display_currency:
+            exchange_rate = RATES[base_currency]
+            display_price = room["price_per_day"] * exchange_rate
+            display_price = float(Decimal(str(display_price)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+            room["pricing_info"] = PricingInfo(
+                base_price=room["price_per_day"],
+                base_currency=CurrencyCode(base_currency),
+                display_price=display_price,
+                display_currency=CurrencyCode(display_currency),
+                exchange_rate=exchange_rate
+            ).dict()
+            if room.get("price_per_hour"):
+                room["pricing_info"]["display_price_per_hour"] = float(
+                    Decimal(str(room["price_per_hour"] * exchange_rate)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                )
+    return rooms
+
+
+def new_path(rooms, display_currency="TRY"):
+    return price_listings(rooms, "price_per_day", display_currency, RATES, hourly_field="price_per_hour")
+
+
+def main():
+    # The old path used pydantic's deprecated .dict(); keep the output readable
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    random.seed(42)
+    print("="*60)
+    print("💱 Listing price conversion (per-item cost)")
+    print("="*60)
+    print(f"{'items':>6} {'old µs/item':>14} {'batch µs/item':>15} {'speedup':>9}")
+    for count in (10, 100, 1000):
+        rooms = make_rooms(count)
+        repeat = max(1, 20000 // count)
+        old = min(timeit.repeat(lambda: old_path([dict(r) for r in rooms]), number=repeat, repeat=3))
+        new = min(timeit.repeat(lambda: new_path([dict(r) for r in rooms]), number=repeat, repeat=3))
+        old_us = old / repeat / count * 1e6
+        new_us = new / repeat / count * 1e6
+        print(f"{count:>6} {old_us:>14.2f} {new_us:>15.2f} {old_us / new_us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Delete uploaded media no hotel or room points at any more
+
+Blob reference counts (see backend/blob_store.py) follow every URL added to
+or removed from a hotel or room, but deleting a hotel drops its document
+(and its rooms) without releasing their media. This recounts references
+from the documents, fixes drifted counts, and deletes unreferenced blobs,
+blob files without a media_blobs document, and files uploaded before the
+blob store existed that nothing references. Anything touched within the
+grace period is left alone, since an upload may still be in flight.
+
+Usage:
+    python scripts/gc_media.py --dry-run
+    python scripts/gc_media.py --grace-hours 24
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from blob_store import BlobStore, legacy_orphans, scan_references
+from uploads import UploadWriter
+
+UPLOAD_DIR = Path("/app/uploads")
+BLOB_DIR = UPLOAD_DIR / "blobs"
+LEGACY_DIRS = [UPLOAD_DIR / name for name in ("hotels", "rooms", "hotel_videos", "room_videos")]
+
+
+async def main(dry_run: bool, grace_hours: float):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+    writer = UploadWriter(max_workers=1)
+    blob_store = BlobStore(db.media_blobs, BLOB_DIR, writer)
+    grace_seconds = grace_hours * 3600
+
+    print("="*60)
+    print("🧹 Kullanılmayan Medya Dosyaları Temizleniyor" + (" (deneme)" if dry_run else ""))
+    print("="*60)
+
+    started = time.perf_counter()
+    report = await blob_store.collect_garbage(db, grace_seconds=grace_seconds, dry_run=dry_run)
+    print(f"✅ {report['blobs']} blob incelendi, {report['recounted']} sayaç düzeltildi")
+    print(f"   {report['deleted']} blob ve {report['stray_files']} sahipsiz dosya silindi")
+
+    _, legacy = await scan_references(db)
+    orphans = await writer.run(legacy_orphans, LEGACY_DIRS, legacy, grace_seconds)
+    freed = 0
+    for path in orphans:
+        freed += path.stat().st_size
+        if not dry_run:
+            path.unlink()
+    print(f"✅ {len(orphans)} eski dosya silindi ({freed / (1024 * 1024):.1f} MB)")
+    elapsed = time.perf_counter() - started
+
+    print(f"\n⏱️  {elapsed:.1f} sn")
+    print("="*60)
+
+    writer.shutdown()
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    parser.add_argument("--grace-hours", type=float, default=1.0, help="Skip media touched more recently (default: 1)")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.grace_hours))
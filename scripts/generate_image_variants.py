@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Render resized/WebP variants for images uploaded before the pipeline existed
+
+New uploads are processed in the background by the API. This walks every
+hotel and room, renders the variants of each locally stored image that has
+no manifest yet (or of all of them with --force), and stores the manifests
+on the documents. Until an image has a manifest it is served as uploaded.
+
+Usage:
+    python scripts/generate_image_variants.py
+    python scripts/generate_image_variants.py --force --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from blob_store import BlobStore, blob_hash
+from image_variants import ImageProcessor, image_stem
+from uploads import UploadWriter
+
+UPLOAD_DIR = Path("/app/uploads")
+BLOB_DIR = UPLOAD_DIR / "blobs"
+SOURCES = [
+    ("hotels", "/api/images/hotels/", UPLOAD_DIR / "hotels"),
+    ("conference_rooms", "/api/images/rooms/", UPLOAD_DIR / "rooms"),
+]
+
+
+async def process_collection(db, processor, blob_store, name, url_marker, directory, force):
+    jobs = []
+    async for doc in db[name].find({}, {"_id": 0, "id": 1, "images": 1, "image_variants": 1}):
+        existing = doc.get("image_variants") or {}
+        for url in doc.get("images") or []:
+            if url_marker not in url:
+                continue  # external image
+            filename = url.rsplit("/", 1)[-1]
+            source = blob_store.path_for(filename) if blob_hash(filename) else directory / filename
+            if (image_stem(filename) in existing and not force) or not source.exists():
+                continue
+            jobs.append((doc["id"], source))
+
+    # Keep every worker process busy, but no more
+    semaphore = asyncio.Semaphore(processor.max_workers)
+
+    async def render(owner_id, source):
+        stem = image_stem(source.name)
+        # Blob variants sit next to the blob and are shared by every document using it
+        output_dir = blob_store.directory_for(stem) if blob_hash(source.name) else None
+        async with semaphore:
+            try:
+                manifest = await processor.render(source, stem, output_dir)
+            except Exception as e:
+                print(f"   ⚠️  {source.name}: {e}")
+                return False
+        if output_dir:
+            await blob_store.set_variants(stem, manifest)
+        await db[name].update_one({"id": owner_id}, {"$set": {f"image_variants.{stem}": manifest}})
+        return True
+
+    results = await asyncio.gather(*(render(owner_id, source) for owner_id, source in jobs))
+    return sum(results), len(results) - sum(results)
+
+
+async def main(force: bool, workers: int):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+    processor = ImageProcessor(max_workers=workers)
+    writer = UploadWriter(max_workers=1)
+    blob_store = BlobStore(db.media_blobs, BLOB_DIR, writer)
+
+    print("="*60)
+    print("🖼️  Görsel Varyantları Oluşturuluyor")
+    print(f"   Genişlikler: {list(processor.widths)}  Formatlar: {list(processor.formats)}")
+    print("="*60)
+
+    started = time.perf_counter()
+    for name, url_marker, directory in SOURCES:
+        rendered, failed = await process_collection(db, processor, blob_store, name, url_marker, directory, force)
+        print(f"✅ {name}: {rendered} görsel işlendi, {failed} hata")
+    elapsed = time.perf_counter() - started
+
+    print(f"\n⏱️  {elapsed:.1f} sn")
+    print("="*60)
+
+    await processor.stop()
+    writer.shutdown()
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Re-render images that already have variants")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: up to 2)")
+    args = parser.parse_args()
+    asyncio.run(main(args.force, args.workers))
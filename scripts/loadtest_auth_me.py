@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Load test for GET /api/auth/me with and without the principal cache
+
+In-process mode (default) drives the FastAPI app through httpx's ASGI
+transport against the configured MongoDB, once with the cache disabled and
+once enabled, and prints p50/p99 for both. HTTP mode hits a running server
+instead; start it with AUTH_CACHE_TTL_SECONDS=0 and again with the default
+to compare.
+
+Usage:
+    python scripts/loadtest_auth_me.py --email admin@meetdelux.com
+    python scripts/loadtest_auth_me.py --url http://localhost:8001 --token <jwt>
+    python scripts/loadtest_auth_me.py --email admin@meetdelux.com --requests 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(client: httpx.AsyncClient, token: str, total: int, concurrency: int):
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get("/api/auth/me", headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "mean": statistics.fmean(latencies),
+        "rps": total / elapsed,
+        "errors": errors,
+    }
+
+
+def print_result(label, result):
+    print(f"{label:<14} p50 {result['p50']:7.2f} ms   p99 {result['p99']:7.2f} ms   "
+          f"mean {result['mean']:7.2f} ms   {result['rps']:8.0f} req/s   errors {result['errors']}")
+
+
+async def in_process(email: str, total: int, concurrency: int):
+    import server
+
+    token = server.create_access_token(data={"sub": email}, expires_delta=timedelta(hours=1))
+    cache = server.principal_cache
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        cache.enabled = False
+        await run_load(client, token, min(total, 200), concurrency)  # warm-up
+        before = await run_load(client, token, total, concurrency)
+
+        cache.enabled = True
+        cache.invalidate()
+        await run_load(client, token, min(total, 200), concurrency)
+        after = await run_load(client, token, total, concurrency)
+
+    print_result("cache off", before)
+    print_result("cache on", after)
+    print(f"\np50 {before['p50'] / after['p50']:.1f}x, p99 {before['p99'] / after['p99']:.1f}x faster with the cache")
+    print(f"MongoDB user loads: {cache.db_loads}")
+    server.client.close()
+
+
+async def over_http(url: str, token: str, total: int, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await run_load(client, token, min(total, 200), concurrency)
+        print_result(url, await run_load(client, token, total, concurrency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", help="Existing user to authenticate as (in-process mode)")
+    parser.add_argument("--url", help="Base URL of a running server (HTTP mode)")
+    parser.add_argument("--token", help="Bearer token for HTTP mode")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🔐 /api/auth/me yük testi")
+    print("="*60)
+    if args.url:
+        if not args.token:
+            parser.error("--token is required with --url")
+        asyncio.run(over_http(args.url, args.token, args.requests, args.concurrency))
+    elif args.email:
+        asyncio.run(in_process(args.email, args.requests, args.concurrency))
+    else:
+        parser.error("give --email (in-process) or --url and --token (HTTP)")
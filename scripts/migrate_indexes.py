@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Create (or just report) the MongoDB indexes declared in backend/db_indexes.py
+
+Usage:
+    python scripts/migrate_indexes.py            # create missing indexes
+    python scripts/migrate_indexes.py --check    # only report missing/extra
+    python scripts/migrate_indexes.py --drop-extra
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from db_indexes import check_indexes, ensure_indexes
+
+
+async def main(check_only: bool, drop_extra: bool):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+
+    print("="*60)
+    print("🗂️  MongoDB Index Migration" + (" (check only)" if check_only else ""))
+    print("="*60)
+
+    if check_only:
+        report = await check_indexes(db)
+    else:
+        report = await ensure_indexes(db, drop_extra=drop_extra)
+
+    problems = 0
+    for collection, result in sorted(report.items()):
+        print(f"\n📁 {collection}")
+        for key, label in [("missing", "❌ Eksik"), ("created", "✅ Oluşturuldu"),
+                           ("failed", "⚠️  Başarısız"), ("dropped", "🗑️  Silindi"), ("conflicting", "🔁 Değiştirilecek"),
+                           ("extra", "➕ Fazla")]:
+            for name in result.get(key, []):
+                print(f"   {label}: {name}")
+        problems += len(result.get("missing", [])) + len(result.get("failed", []))
+
+    print("\n" + "="*60)
+    print("🎉 TAMAMLANDI!" if problems == 0 else f"⚠️  {problems} index sorunlu")
+    print("="*60)
+
+    client.close()
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Only report missing/extra indexes")
+    parser.add_argument("--drop-extra", action="store_true", help="Drop indexes that are not declared")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.check, args.drop_extra)) else 0)
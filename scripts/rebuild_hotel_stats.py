@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Rebuild the hotel_stats_daily rollups from bookings
+
+Use it once to backfill after deploying the rollups, or whenever the
+counters are suspected to have drifted. Bookings written while a hotel is
+being rebuilt can be missed, so run it during low traffic.
+
+Usage:
+    python scripts/rebuild_hotel_stats.py                      # all hotels
+    python scripts/rebuild_hotel_stats.py --hotel-id <id> ...  # selected hotels
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from hotel_stats import HotelStatsRollup
+
+
+async def main(hotel_ids):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+
+    print("="*60)
+    print("📊 Otel İstatistikleri Yeniden Hesaplanıyor")
+    print("="*60)
+
+    started = time.perf_counter()
+    rows = await HotelStatsRollup(db).rebuild(hotel_ids)
+    elapsed = time.perf_counter() - started
+
+    scope = f"{len(hotel_ids)} otel" if hotel_ids else "tüm oteller"
+    print(f"\n✅ {scope}: {rows} günlük satır yazıldı ({elapsed:.1f} sn)")
+    print("="*60)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotel-id", action="append", dest="hotel_ids", help="Only rebuild this hotel (repeatable)")
+    args = parser.parse_args()
+    asyncio.run(main(args.hotel_ids))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Rebuild the room_search collection from hotels and conference rooms
+
+The API builds the collection on its first start and keeps it in sync on
+every approval, hotel update and rating change; run this after bulk
+imports or direct database edits, or to re-convert EUR prices after large
+exchange rate moves.
+
+Usage:
+    python scripts/rebuild_room_search.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from exchange_rates import ExchangeRateCache
+from http_clients import http_clients
+from room_search import RoomSearchIndex
+
+CURRENCIES = ["USD", "EUR", "TRY"]
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+
+    print("="*60)
+    print("🔎 Salon Arama İndeksi Yeniden Oluşturuluyor")
+    print("="*60)
+
+    # Stored rates first, then one refresh so EUR prices use current rates
+    rates = ExchangeRateCache(db.exchange_rates, CURRENCIES)
+    await rates.load()
+    await rates.refresh()
+
+    started = time.perf_counter()
+    searchable = await RoomSearchIndex(db, rates.get_rate).rebuild()
+    elapsed = time.perf_counter() - started
+
+    print(f"\n✅ {searchable} salon indekslendi ({elapsed:.1f} sn)")
+    print("="*60)
+
+    await http_clients.close()
+    client.close()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Reconcile hotel and room rating counters with the reviews collection
+
+Recomputes rating_sum / rating_count for every hotel and conference room
+from the reviews and repairs documents that drifted (the server also does
+this every RATING_RECONCILE_INTERVAL_SECONDS). Run it once after deploying
+the running counters to backfill existing hotels and rooms.
+
+Usage:
+    python scripts/reconcile_ratings.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from ratings import RatingAggregates
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+
+    print("="*60)
+    print("⭐ Puan Sayaçları Kontrol Ediliyor")
+    print("="*60)
+
+    aggregates = RatingAggregates(db)
+    report = await aggregates.reconcile()
+
+    print(f"\n✅ {report['hotels_repaired']} otel, {report['rooms_repaired']} salon düzeltildi "
+          f"({aggregates.last_reconcile_ms} ms)")
+    print("="*60)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Standalone booking reminder worker
+
+Runs the same scheduler as the API (backend/reminders.py) outside the web
+process. Reminders are written to the email outbox; the API's outbox worker
+delivers them. Set REMINDER_SCHEDULER_ENABLED=False on the API when this
+worker runs continuously (running both is safe, just redundant).
+
+Usage:
+    python scripts/send_booking_reminders.py                 # one scan
+    python scripts/send_booking_reminders.py --loop          # scan every REMINDER_INTERVAL_SECONDS
+    python scripts/send_booking_reminders.py --lead-hours 48
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from email_outbox import EmailOutbox
+from email_service import email_service
+from reminders import BookingReminderScheduler
+
+
+async def main(loop: bool, lead_hours: float, interval: float):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+
+    # Enqueue only; the worker is not started here
+    outbox = EmailOutbox(db.email_outbox, email_service.smtp_sender(), email_service.build_outbox_message)
+    email_service.attach_outbox(outbox)
+    scheduler = BookingReminderScheduler(db, email_service, lead_hours=lead_hours, interval_seconds=interval)
+
+    print("="*60)
+    print(f"⏰ Rezervasyon Hatırlatmaları (önümüzdeki {lead_hours:g} saat)")
+    print("="*60)
+
+    try:
+        while True:
+            sent = await scheduler.scan_once()
+            stats = scheduler.stats()
+            print(f"📨 {sent} hatırlatma kuyruğa eklendi ({stats['last_scan_ms']} ms)")
+            if not loop:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        await outbox.stop()
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loop", action="store_true", help="Keep scanning instead of running once")
+    parser.add_argument("--lead-hours", type=float, default=float(os.environ.get('REMINDER_LEAD_HOURS', 24)))
+    parser.add_argument("--interval", type=float, default=float(os.environ.get('REMINDER_INTERVAL_SECONDS', 900)))
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.loop, args.lead_hours, args.interval))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Transcode HLS renditions for videos uploaded before the queue existed
+
+New uploads are queued by the API. This walks every hotel and room, finds
+content-addressed videos without renditions (or all of them with --force),
+transcodes each once with the same ffmpeg ladder, and stores the stream on
+the blob and on every hotel/room showing it. Videos uploaded before the
+blob store have no hash to name their renditions after and are skipped.
+
+Needs ffmpeg and ffprobe on PATH.
+
+Usage:
+    python scripts/transcode_videos.py
+    python scripts/transcode_videos.py --force --workers 2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+sys.path.append(str(ROOT_DIR))
+
+from blob_store import MEDIA_FIELDS, BlobStore, blob_hash
+from uploads import UploadWriter
+from video_transcoding import VideoTranscoder, stream_urls
+
+UPLOAD_DIR = Path("/app/uploads")
+BLOB_DIR = UPLOAD_DIR / "blobs"
+APP_URL = os.environ.get('APP_URL', 'http://localhost:3000')
+VIDEO_URL_PATHS = {"hotels": "hotels", "conference_rooms": "rooms"}
+
+
+async def find_videos(db):
+    """sha256 -> (blob filename, owners) of every content-addressed video on a hotel or room"""
+    filenames, owners = {}, defaultdict(list)
+    for collection, fields in MEDIA_FIELDS.items():
+        video_fields = [field for field in fields if field != "images"]
+        async for doc in db[collection].find({}, {"_id": 0, "id": 1, **{field: 1 for field in video_fields}}):
+            for field in video_fields:
+                for url in doc.get(field) or []:
+                    filename = url.rsplit("/", 1)[-1]
+                    sha256 = blob_hash(filename)
+                    owner = {"collection": collection, "id": doc["id"]}
+                    if sha256 and owner not in owners[sha256]:
+                        filenames[sha256] = filename
+                        owners[sha256].append(owner)
+    return {sha256: (filename, owners[sha256]) for sha256, filename in filenames.items()}
+
+
+async def main(force: bool, workers: int):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'meetdelux')]
+    transcoder = VideoTranscoder(max_jobs=workers)
+    writer = UploadWriter(max_workers=1)
+    blob_store = BlobStore(db.media_blobs, BLOB_DIR, writer)
+
+    print("="*60)
+    print("🎬 Video HLS Dönüşümleri Oluşturuluyor")
+    print(f"   Eşzamanlı ffmpeg: {transcoder.max_jobs}  İş başına thread: {transcoder.threads}")
+    print("="*60)
+
+    if not transcoder.available:
+        print("❌ ffmpeg/ffprobe bulunamadı")
+        client.close()
+        return
+
+    videos = await find_videos(db)
+    semaphore = asyncio.Semaphore(transcoder.max_jobs)
+
+    async def publish(sha256, stream, owners):
+        await blob_store.set_stream(sha256, stream)
+        for owner in owners:
+            base_url = f"{APP_URL}/api/videos/{VIDEO_URL_PATHS[owner['collection']]}"
+            await db[owner["collection"]].update_one(
+                {"id": owner["id"]}, {"$set": {f"video_streams.{sha256}": stream_urls(base_url, stream)}}
+            )
+
+    async def transcode(sha256, filename, owners):
+        existing = None
+        for owner in owners:
+            existing = await blob_store.add_stream_owner(sha256, owner)
+        if existing and existing.get("status") == "ready" and not force:
+            await publish(sha256, existing, owners)
+            return None
+        source = blob_store.path_for(filename)
+        if not source.exists():
+            return None
+        async with semaphore:
+            await publish(sha256, {"status": "processing"}, owners)
+            try:
+                stream = await transcoder.transcode(sha256, source, blob_store.directory_for(sha256))
+            except Exception as e:
+                print(f"   ⚠️  {filename}: {e}")
+                stream = {"status": "failed", "error": str(e)[-500:]}
+        await publish(sha256, stream, owners)
+        return stream["status"] == "ready"
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        transcode(sha256, filename, owners) for sha256, (filename, owners) in videos.items()
+    ))
+    elapsed = time.perf_counter() - started
+
+    done = [r for r in results if r is not None]
+    print(f"✅ {len(videos)} video bulundu, {sum(done)} dönüştürüldü, {len(done) - sum(done)} hata")
+    print(f"\n⏱️  {elapsed:.1f} sn")
+    print("="*60)
+
+    writer.shutdown()
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Re-transcode videos that already have renditions")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent ffmpeg processes (default: one per core)")
+    args = parser.parse_args()
+    asyncio.run(main(args.force, args.workers))